@@ -27,19 +27,180 @@ class Config:
     REQUEST_TIMEOUT = int(os.getenv("REQUEST_TIMEOUT", "10"))
     ASYNC_TIMEOUT = int(os.getenv("ASYNC_TIMEOUT", "30"))
     
-    # Username platforms to check
-    USERNAME_PLATFORMS = {
-        "GitHub": "https://github.com/{}",
-        "Twitter": "https://twitter.com/{}",
-        "Reddit": "https://reddit.com/user/{}",
-        "Instagram": "https://instagram.com/{}",
-        "LinkedIn": "https://linkedin.com/in/{}",
-        "YouTube": "https://youtube.com/@{}",
-        "TikTok": "https://tiktok.com/@{}",
-        "Medium": "https://medium.com/@{}",
-        "DeviantArt": "https://deviantart.com/{}",
-        "Twitch": "https://twitch.tv/{}",
+    # HTTP connection pool
+    HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "100"))
+    HTTP_POOL_PER_HOST = int(os.getenv("HTTP_POOL_PER_HOST", "10"))
+    HTTP_KEEPALIVE = int(os.getenv("HTTP_KEEPALIVE", "30"))
+    HTTP_DNS_CACHE_TTL = int(os.getenv("HTTP_DNS_CACHE_TTL", "300"))
+    USER_AGENT = os.getenv("USER_AGENT", "ShadowRecon-OSINT/1.0 (Educational Purpose)")
+    
+    # IP geolocation (ip-api.com); point IP_API_URL at a stub server for testing
+    IP_API_URL = os.getenv("IP_API_URL", "http://ip-api.com").rstrip("/")
+    GEO_BATCH_ENABLED = os.getenv("GEO_BATCH_ENABLED", "true").lower() == "true"
+    GEO_BATCH_SIZE = int(os.getenv("GEO_BATCH_SIZE", "100"))
+    GEO_BATCH_WINDOW = float(os.getenv("GEO_BATCH_WINDOW", "0.05"))
+    
+    # DNS engine (DNS_RESOLVERS empty = use system resolvers)
+    DNS_RESOLVERS = [ns.strip() for ns in os.getenv("DNS_RESOLVERS", "").split(",") if ns.strip()]
+    DNS_PORT = int(os.getenv("DNS_PORT", "53"))
+    DNS_TIMEOUT = float(os.getenv("DNS_TIMEOUT", "5"))
+    DNS_CACHE_SIZE = int(os.getenv("DNS_CACHE_SIZE", "100000"))
+    DNS_MAX_TTL = int(os.getenv("DNS_MAX_TTL", "86400"))
+    DNS_NEGATIVE_TTL = int(os.getenv("DNS_NEGATIVE_TTL", "300"))
+    # UDP sockets per nameserver, each replaced after DNS_SOCKET_QUERIES queries
+    # so replies must match a changing random source port as well as the query ID
+    DNS_SOCKETS_PER_SERVER = int(os.getenv("DNS_SOCKETS_PER_SERVER", "16"))
+    DNS_SOCKET_QUERIES = int(os.getenv("DNS_SOCKET_QUERIES", "100"))
+    DKIM_SELECTORS = [
+        s.strip() for s in os.getenv("DKIM_SELECTORS", "default,google,selector1,selector2,k1,dkim,mail").split(",")
+        if s.strip()
+    ]
+    
+    # Subdomain enumeration
+    SUBDOMAIN_CONCURRENCY = int(os.getenv("SUBDOMAIN_CONCURRENCY", "1000"))
+    SUBDOMAIN_WILDCARD_PROBES = int(os.getenv("SUBDOMAIN_WILDCARD_PROBES", "3"))
+    
+    # TLS certificate harvesting
+    TLS_CONCURRENCY = int(os.getenv("TLS_CONCURRENCY", "200"))
+    TLS_CONNECT_TIMEOUT = float(os.getenv("TLS_CONNECT_TIMEOUT", "5"))
+    TLS_CERT_CACHE_SIZE = int(os.getenv("TLS_CERT_CACHE_SIZE", "10000"))
+    TLS_PORTS = [int(p) for p in os.getenv("TLS_PORTS", "443").split(",") if p.strip()]
+    
+    # Active TCP port scanning (opt-in; Shodan stays the passive source)
+    ENABLE_PORTSCAN = os.getenv("ENABLE_PORTSCAN", "false").lower() == "true"
+    PORTSCAN_PORTS = os.getenv("PORTSCAN_PORTS", "top100")
+    PORTSCAN_CONCURRENCY = int(os.getenv("PORTSCAN_CONCURRENCY", "2000"))
+    PORTSCAN_PER_HOST = int(os.getenv("PORTSCAN_PER_HOST", "100"))
+    PORTSCAN_TIMEOUT = float(os.getenv("PORTSCAN_TIMEOUT", "1.0"))
+    PORTSCAN_BANNERS = os.getenv("PORTSCAN_BANNERS", "true").lower() == "true"
+    PORTSCAN_BANNER_TIMEOUT = float(os.getenv("PORTSCAN_BANNER_TIMEOUT", "1.0"))
+    
+    # Offline GeoIP/ASN databases (.mmdb or IP-range .csv); remote APIs are the fallback
+    GEOIP_DB_PATH = os.getenv("GEOIP_DB_PATH", "")
+    ASN_DB_PATH = os.getenv("ASN_DB_PATH", "")
+    
+    # Per-host rate limits as (requests, per_seconds); override with
+    # RATE_LIMITS="www.virustotal.com=4/60,ip-api.com=45/60". A "host/path"
+    # key gives requests under that path their own budget
+    RATE_LIMITS = {
+        "www.virustotal.com": (4, 60),
+        "ip-api.com": (45, 60),
+        "ip-api.com/batch": (15, 60),
+        "haveibeenpwned.com": (10, 60),
+        "api.shodan.io": (1, 1),
     }
+    RATE_LIMITS.update({
+        host.strip(): tuple(int(n) for n in limit.split("/"))
+        for host, limit in (
+            item.split("=") for item in os.getenv("RATE_LIMITS", "").split(",") if "=" in item
+        )
+    })
+    RATE_LIMIT_RETRIES = int(os.getenv("RATE_LIMIT_RETRIES", "1"))
+    
+    # Result cache (per-source TTLs in seconds, override with CACHE_TTL_<SOURCE>)
+    CACHE_ENABLED = os.getenv("CACHE_ENABLED", "true").lower() == "true"
+    CACHE_PATH = os.getenv("CACHE_PATH", ".shadowrecon_cache.db")
+    CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "100000"))
+    CACHE_EVICT_INTERVAL = int(os.getenv("CACHE_EVICT_INTERVAL", "500"))
+    # Cache hits whose access times are written together (reads never commit on their own)
+    CACHE_TOUCH_BATCH = int(os.getenv("CACHE_TOUCH_BATCH", "500"))
+    CACHE_DEFAULT_TTL = int(os.getenv("CACHE_DEFAULT_TTL", "3600"))
+    CACHE_TTLS = {
+        source: int(os.getenv(f"CACHE_TTL_{source.upper()}", str(ttl)))
+        for source, ttl in {
+            "whois": 3 * 86400,
+            "dns": 3600,
+            "ssl": 86400,
+            "hosting_ip": 3600,
+            "geolocation": 7 * 86400,
+            "shodan": 86400,
+            "portscan": 3600,
+            "asn": 7 * 86400,
+            "organization": 7 * 86400,
+            "hibp": 86400,
+            "email_domain": 86400,
+            "virustotal": 6 * 3600,
+        }.items()
+    }
+    
+    # Bulk scan settings
+    BULK_CONCURRENCY = int(os.getenv("BULK_CONCURRENCY", "20"))
+    # Worker processes for --processes; targets go out in chunks and results
+    # come back in batches (flushed at least every SHARD_FLUSH_SECONDS)
+    BULK_PROCESSES = int(os.getenv("BULK_PROCESSES", "1"))
+    SHARD_CHUNK_SIZE = int(os.getenv("SHARD_CHUNK_SIZE", "64"))
+    SHARD_BATCH_SIZE = int(os.getenv("SHARD_BATCH_SIZE", "100"))
+    SHARD_FLUSH_SECONDS = float(os.getenv("SHARD_FLUSH_SECONDS", "0.5"))
+    # Rate limit budgets shared by --processes workers
+    RATE_LIMIT_PATH = os.getenv("RATE_LIMIT_PATH", ".shadowrecon_ratelimit.db")
+    # Tokens a process leases from a shared budget at once (capped at a quarter of the bucket)
+    RATE_LIMIT_LEASE_TOKENS = int(os.getenv("RATE_LIMIT_LEASE_TOKENS", "10"))
+    
+    # Distributed mode (--coordinator / --worker): SQLite job queue with leases;
+    # workers also share rate limits through it
+    QUEUE_PATH = os.getenv("QUEUE_PATH", ".shadowrecon_queue.db")
+    QUEUE_LEASE_SECONDS = float(os.getenv("QUEUE_LEASE_SECONDS", "300"))
+    QUEUE_MAX_ATTEMPTS = int(os.getenv("QUEUE_MAX_ATTEMPTS", "3"))
+    QUEUE_BATCH_SIZE = int(os.getenv("QUEUE_BATCH_SIZE", "50"))
+    QUEUE_COMPLETE_BATCH = int(os.getenv("QUEUE_COMPLETE_BATCH", "20"))
+    QUEUE_POLL_SECONDS = float(os.getenv("QUEUE_POLL_SECONDS", "2"))
+    QUEUE_IDLE_SECONDS = float(os.getenv("QUEUE_IDLE_SECONDS", "30"))
+    
+    # Bulk run checkpoint journal (--resume); appended lines are fsynced in
+    # batches of CHECKPOINT_SYNC_EVERY or every CHECKPOINT_SYNC_SECONDS
+    CHECKPOINT_ENABLED = os.getenv("CHECKPOINT_ENABLED", "true").lower() == "true"
+    CHECKPOINT_PATH = os.getenv("CHECKPOINT_PATH", ".shadowrecon_checkpoint.ndjson")
+    CHECKPOINT_SYNC_EVERY = int(os.getenv("CHECKPOINT_SYNC_EVERY", "500"))
+    CHECKPOINT_SYNC_SECONDS = float(os.getenv("CHECKPOINT_SYNC_SECONDS", "2"))
+    
+    # Username platform signatures (JSON data file) and per-check body read cap
+    USERNAME_PLATFORMS_FILE = os.getenv(
+        "USERNAME_PLATFORMS_FILE",
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), "modules", "data", "platforms.json")
+    )
+    USERNAME_BODY_LIMIT = int(os.getenv("USERNAME_BODY_LIMIT", "65536"))
+    
+    # Username check scheduling: requests in flight overall and per host, and
+    # the per-request timeout (ASYNC_TIMEOUT bounds the whole sweep)
+    USERNAME_CONCURRENCY = int(os.getenv("USERNAME_CONCURRENCY", "100"))
+    USERNAME_PER_HOST = int(os.getenv("USERNAME_PER_HOST", "4"))
+    USERNAME_REQUEST_TIMEOUT = float(os.getenv("USERNAME_REQUEST_TIMEOUT", "10"))
+    
+    # Suffixes appended to compact name permutations (johndoe -> johndoe99)
+    USERNAME_PERMUTATION_SUFFIXES = [
+        s.strip() for s in os.getenv("USERNAME_PERMUTATION_SUFFIXES", "1,99,123").split(",") if s.strip()
+    ]
+    
+    # Report output: 'json' writes one file per report, 'ndjson' appends to
+    # rotating (optionally compressed: none, gzip, zstd) stream files
+    REPORT_SINK = os.getenv("REPORT_SINK", "json")
+    REPORT_COMPRESSION = os.getenv("REPORT_COMPRESSION", "none")
+    REPORT_ROTATE_MB = int(os.getenv("REPORT_ROTATE_MB", "256"))
+    REPORT_ROTATE_SECONDS = int(os.getenv("REPORT_ROTATE_SECONDS", "3600"))
+    REPORT_BUFFER_KB = int(os.getenv("REPORT_BUFFER_KB", "1024"))
+    REPORT_GZIP_LEVEL = int(os.getenv("REPORT_GZIP_LEVEL", "6"))
+    REPORT_ZSTD_LEVEL = int(os.getenv("REPORT_ZSTD_LEVEL", "3"))
+    
+    # Columnar export (--export, needs pyarrow): format, rows per row group
+    # and Parquet compression codec
+    EXPORT_FORMAT = os.getenv("EXPORT_FORMAT", "parquet")
+    EXPORT_ROW_GROUP_SIZE = int(os.getenv("EXPORT_ROW_GROUP_SIZE", "50000"))
+    EXPORT_COMPRESSION = os.getenv("EXPORT_COMPRESSION", "zstd")
+    
+    # Lookup pipeline: domain scans follow the hosting IP into IP recon;
+    # identical sub-lookups across targets are shared for PIPELINE_MEMO_SECONDS
+    FOLLOW_HOSTING_IP = os.getenv("FOLLOW_HOSTING_IP", "true").lower() == "true"
+    PIPELINE_MEMO_SIZE = int(os.getenv("PIPELINE_MEMO_SIZE", "10000"))
+    PIPELINE_MEMO_SECONDS = float(os.getenv("PIPELINE_MEMO_SECONDS", "300"))
+    
+    # Scan history (every recon_* result, queried with --history / --latest)
+    HISTORY_ENABLED = os.getenv("HISTORY_ENABLED", "true").lower() == "true"
+    HISTORY_PATH = os.getenv("HISTORY_PATH", ".shadowrecon_history.db")
+    HISTORY_BATCH_SIZE = int(os.getenv("HISTORY_BATCH_SIZE", "500"))
+    HISTORY_FLUSH_SECONDS = float(os.getenv("HISTORY_FLUSH_SECONDS", "5"))
+    # Full findings snapshot every N scans of a target, deltas in between
+    HISTORY_SNAPSHOT_INTERVAL = int(os.getenv("HISTORY_SNAPSHOT_INTERVAL", "20"))
+    HISTORY_HEAD_CACHE = int(os.getenv("HISTORY_HEAD_CACHE", "10000"))
     
     # Logging configuration
     LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
@@ -0,0 +1,48 @@
+"""
+ShadowRecon Engine Package
+Scheduling and infrastructure for high-volume scans
+"""
+
+from .scanner import BulkScanner
+from .http import HTTPClient
+from .ratelimit import RateLimiter, TokenBucket, SharedTokenBucket
+from .cache import ResultCache, cached
+from .geoip import OfflineGeoDB
+from .resolver import DNSEngine, DNSLookupError
+from .subdomains import SubdomainEnumerator
+from .tls import TLSHarvester, X509Parser
+from .portscan import PortScanner
+from .scheduler import RequestScheduler
+from .history import ScanHistory
+from .diff import diff_findings
+from .pipeline import Pipeline
+from .singleflight import SingleFlight
+from .shards import ShardedScanner
+from .workqueue import WorkQueue, QueueWorker
+from .checkpoint import CheckpointJournal
+
+__all__ = [
+    'BulkScanner',
+    'HTTPClient',
+    'RateLimiter',
+    'TokenBucket',
+    'SharedTokenBucket',
+    'ResultCache',
+    'cached',
+    'OfflineGeoDB',
+    'DNSEngine',
+    'DNSLookupError',
+    'SubdomainEnumerator',
+    'TLSHarvester',
+    'X509Parser',
+    'PortScanner',
+    'RequestScheduler',
+    'ScanHistory',
+    'diff_findings',
+    'Pipeline',
+    'SingleFlight',
+    'ShardedScanner',
+    'WorkQueue',
+    'QueueWorker',
+    'CheckpointJournal'
+]
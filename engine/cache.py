@@ -0,0 +1,286 @@
+"""
+ShadowRecon Result Cache
+Persistent SQLite cache for lookup results with per-source TTLs
+"""
+
+import asyncio
+import contextvars
+import functools
+import json
+import sqlite3
+import threading
+import time
+import logging
+from config import Config
+from utils import Utils
+from .checkpoint import CheckpointJournal
+from .singleflight import SingleFlight
+
+logger = logging.getLogger("ShadowRecon")
+
+# Per-scan record of which sources were served from cache, see ResultCache.trace()
+_trace = contextvars.ContextVar("shadowrecon_cache_trace", default=None)
+
+class ResultCache:
+    """
+    On-disk cache keyed by (source, target)
+    Uses WAL mode so concurrent readers never block the writer, and evicts
+    least-recently-used entries once the table grows past max_entries.
+    Reads do not write: access times are batched and stored with the next
+    write (or every Config.CACHE_TOUCH_BATCH reads). The @cached wrapper
+    calls get/set off the event loop, since the database may be shared
+    with other processes and a lock wait can take up to the busy timeout
+    """
+    
+    _default = None
+    _default_lock = threading.Lock()
+    
+    # Global switches, set from the CLI (--no-cache / --refresh)
+    enabled = Config.CACHE_ENABLED
+    refresh = False
+    
+    def __init__(self, path=None, max_entries=None):
+        self.path = path or Config.CACHE_PATH
+        self.max_entries = max_entries or Config.CACHE_MAX_ENTRIES
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._touched = {}
+        
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "source TEXT NOT NULL, "
+            "target TEXT NOT NULL, "
+            "value TEXT NOT NULL, "
+            "created REAL NOT NULL, "
+            "accessed REAL NOT NULL, "
+            "PRIMARY KEY (source, target))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_results_accessed ON results (accessed)")
+        self._conn.commit()
+    
+    @classmethod
+    def default(cls):
+        """Return the process-wide cache, opening it on first use"""
+        with cls._default_lock:
+            if cls._default is None:
+                cls._default = cls()
+            return cls._default
+    
+    @classmethod
+    def configure(cls, enabled=True, refresh=False):
+        """
+        Set global cache behaviour
+        enabled: False bypasses the cache entirely (--no-cache)
+        refresh: True skips reads but still stores fresh results (--refresh)
+        """
+        cls.enabled = enabled
+        cls.refresh = refresh
+    
+    @staticmethod
+    def trace():
+        """
+        Start recording cached lookups for the current task
+        Returns a dict filled in as the scan runs: {source: 'cached' | 'fetched'}.
+        Tasks and executor calls started afterwards share the same record
+        """
+        record = {}
+        _trace.set(record)
+        return record
+    
+    @staticmethod
+    def replay(sources, reused=False):
+        """
+        Add outcomes recorded elsewhere to the active trace
+        Used for results shared between scans (the pipeline memo, in-flight
+        calls, a resumed journal): reused=True counts them all as 'cached',
+        since this scan fetched nothing for them
+        """
+        for source, outcome in sources.items():
+            ResultCache._note(source, "cached" if reused else outcome)
+    
+    @staticmethod
+    def _note(source, outcome):
+        """Add a lookup outcome to the active trace, if any"""
+        record = _trace.get()
+        if record is not None:
+            record[source] = outcome
+    
+    @staticmethod
+    def ttl_for(source):
+        """Return the configured TTL in seconds for a source"""
+        return Config.CACHE_TTLS.get(source, Config.CACHE_DEFAULT_TTL)
+    
+    def get(self, source, target):
+        """
+        Return the cached value, or None if missing or expired
+        Expired rows are left for set() to replace or eviction to drop
+        """
+        now = time.time()
+        
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created FROM results WHERE source = ? AND target = ?",
+                (source, target)
+            ).fetchone()
+            
+            if row is None:
+                return None
+            
+            value, created = row
+            
+            if now - created > self.ttl_for(source):
+                return None
+            
+            self._touched[(source, target)] = now
+            if len(self._touched) >= Config.CACHE_TOUCH_BATCH:
+                self._store_touched()
+                self._conn.commit()
+        
+        return json.loads(value)
+    
+    def _store_touched(self):
+        """Write batched access times (caller holds the lock and commits)"""
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE results SET accessed = ? WHERE source = ? AND target = ?",
+                [(accessed, source, target) for (source, target), accessed in self._touched.items()]
+            )
+            self._touched = {}
+    
+    def set(self, source, target, value):
+        """Store a value, evicting old entries if the cache is over capacity"""
+        now = time.time()
+        payload = json.dumps(value, default=str)
+        
+        with self._lock:
+            self._touched.pop((source, target), None)
+            self._store_touched()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results (source, target, value, created, accessed) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (source, target, payload, now, now)
+            )
+            self._conn.commit()
+            
+            self._writes += 1
+            if self._writes % Config.CACHE_EVICT_INTERVAL == 0:
+                self._evict()
+    
+    def _evict(self):
+        """Drop least-recently-used rows beyond max_entries (caller holds the lock)"""
+        count = self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        excess = count - self.max_entries
+        
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM results WHERE rowid IN "
+                "(SELECT rowid FROM results ORDER BY accessed ASC LIMIT ?)",
+                (excess,)
+            )
+            self._conn.commit()
+            logger.debug(f"Cache evicted {excess} entries")
+    
+    def clear(self, source=None):
+        """Remove all entries, or only those for one source"""
+        with self._lock:
+            if source:
+                self._conn.execute("DELETE FROM results WHERE source = ?", (source,))
+            else:
+                self._conn.execute("DELETE FROM results")
+            self._conn.commit()
+    
+    def close(self):
+        """Store pending access times and close the underlying database connection"""
+        with self._lock:
+            self._store_touched()
+            self._conn.commit()
+            self._conn.close()
+
+def _cache_key(instance, key):
+    """Resolve a cache key from an attribute name or a callable"""
+    return key(instance) if callable(key) else getattr(instance, key)
+
+def _cacheable(value):
+    """Only successful lookups are worth keeping"""
+    return isinstance(value, dict) and not value.get("error")
+
+def cached(source, key):
+    """
+    Decorator caching a recon method's result under (source, key)
+    key: attribute name on the instance (e.g. 'domain') or a callable taking it
+    Works on both plain and async methods. Async methods are also coalesced:
+    concurrent calls with the same key (cached or not) make one request.
+    Inside a checkpointed bulk scan, each target's successful lookups are
+    journaled (with or without the cache), and on --resume lookups
+    journaled by the interrupted run are answered from the journal
+    """
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(self, *args, **kwargs):
+                target = _cache_key(self, key)
+                
+                async def fetch():
+                    value = await func(self, *args, **kwargs)
+                    if _cacheable(value) and ResultCache.enabled:
+                        await Utils.run_blocking(ResultCache.default().set, source, target, value)
+                    return value
+                
+                resumed = CheckpointJournal.recall(source, target)
+                if resumed is not None:
+                    ResultCache._note(source, "cached")
+                    CheckpointJournal.remember(source, target, resumed)
+                    return resumed
+                
+                if ResultCache.enabled and not ResultCache.refresh:
+                    hit = await Utils.run_blocking(ResultCache.default().get, source, target)
+                    if hit is not None:
+                        logger.debug(f"Cache hit: {source} {target}")
+                        ResultCache._note(source, "cached")
+                        CheckpointJournal.remember(source, target, hit)
+                        return hit
+                
+                # Concurrent misses for the same key share one upstream request
+                ResultCache._note(source, "fetched")
+                value = await SingleFlight.for_running_loop().do((source, target), fetch)
+                
+                # Journaled here, in each caller's context, so a coalesced
+                # lookup is credited to every target that asked for it
+                if _cacheable(value):
+                    CheckpointJournal.remember(source, target, value)
+                return value
+            
+            return async_wrapper
+        
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            target = _cache_key(self, key)
+            
+            resumed = CheckpointJournal.recall(source, target)
+            if resumed is not None:
+                ResultCache._note(source, "cached")
+                CheckpointJournal.remember(source, target, resumed)
+                return resumed
+            
+            if ResultCache.enabled and not ResultCache.refresh:
+                hit = ResultCache.default().get(source, target)
+                if hit is not None:
+                    logger.debug(f"Cache hit: {source} {target}")
+                    ResultCache._note(source, "cached")
+                    CheckpointJournal.remember(source, target, hit)
+                    return hit
+            
+            ResultCache._note(source, "fetched")
+            value = func(self, *args, **kwargs)
+            if _cacheable(value):
+                if ResultCache.enabled:
+                    ResultCache.default().set(source, target, value)
+                CheckpointJournal.remember(source, target, value)
+            return value
+        
+        return wrapper
+    
+    return decorator
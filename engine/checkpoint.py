@@ -0,0 +1,257 @@
+"""
+ShadowRecon Checkpoint Journal
+Append-only record of a bulk run, so an interrupted run can resume
+"""
+
+import asyncio
+import contextvars
+import copy
+import json
+import os
+import threading
+import time
+import logging
+from config import Config
+
+logger = logging.getLogger("ShadowRecon")
+
+# (journal, target) for the scan running in the current task, see CheckpointJournal.bind()
+_active = contextvars.ContextVar("shadowrecon_checkpoint", default=None)
+
+END = b'{"s":"end"}\n'
+
+class CheckpointJournal:
+    """
+    NDJSON journal of finished targets and the lookups made for them
+    Five kinds of line:
+      {"s": "done", "t": target}
+      {"s": "failed", "t": target, "e": error}
+      {"k": source, "c": key, "v": value}    a lookup's result, once per run
+      {"p": target, "k": source, "c": key}   a target used that lookup
+      {"s": "end"}                            the run finished
+    A value shared by many targets (a hosting IP's Shodan data, say) is
+    written once and referenced by key, so the journal grows with distinct
+    lookups rather than with targets, and resuming needs neither the
+    result cache nor its TTLs. Lines are buffered and written with a
+    single write + fsync every sync_every records or sync_seconds, off the
+    event loop; a crash loses at most that window.
+    On resume, done targets are skipped and the lookups already answered
+    for failed or unfinished targets are reused instead of fetched again.
+    Starting a new run over a journal without the end marker raises
+    FileExistsError rather than throwing the unfinished run away
+    """
+    
+    def __init__(self, path, resume=False, sync_every=None, sync_seconds=None):
+        """resume: load and extend an existing journal instead of starting a new one"""
+        self.path = path
+        self.sync_every = max(1, sync_every or Config.CHECKPOINT_SYNC_EVERY)
+        self.sync_seconds = Config.CHECKPOINT_SYNC_SECONDS if sync_seconds is None else sync_seconds
+        self.done = set()
+        self.failed = {}
+        self.lookups = {}
+        self.stats = {"records": 0, "syncs": 0, "skipped": 0, "reused": 0}
+        
+        self._lock = threading.Lock()
+        # Held while writing, so buffers reach the file in order
+        self._write_lock = threading.Lock()
+        self._buffer = []
+        self._synced = time.monotonic()
+        self._syncing = None
+        # (source, key) pairs whose value is already in the file
+        self._written = set()
+        
+        if resume and os.path.exists(path):
+            self._load()
+        elif not resume and not self.finished(path):
+            raise FileExistsError(
+                f"{path} holds an unfinished run; resume it with --resume, "
+                f"or remove it (or pick another --checkpoint) to start over"
+            )
+        
+        self._file = open(path, 'ab' if resume else 'wb')
+    
+    @staticmethod
+    def finished(path):
+        """True if there is no journal at path, or its run ran to the end"""
+        try:
+            with open(path, 'rb') as f:
+                f.seek(0, os.SEEK_END)
+                size = f.tell()
+                if size == 0:
+                    return True
+                f.seek(max(0, size - len(END)))
+                return f.read() == END
+        except FileNotFoundError:
+            return True
+    
+    def _load(self):
+        """
+        Read an existing journal: finished targets first, then the lookups
+        of targets that still need work (a torn last line is dropped)
+        """
+        end = 0
+        with open(self.path, 'rb') as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                end += len(line)
+                
+                if not line.startswith(b'{"s"'):
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                
+                if record["s"] == "done":
+                    self.done.add(record["t"])
+                    self.failed.pop(record["t"], None)
+                elif record["s"] == "failed":
+                    self.failed[record["t"]] = record.get("e")
+        
+        needed = set()
+        for record in self._records(b'{"p"', end):
+            if record["p"] not in self.done:
+                needed.add((record["k"], record["c"]))
+        
+        for record in self._records(b'{"k"', end):
+            lookup = (record["k"], record["c"])
+            self._written.add(lookup)
+            if lookup in needed:
+                self.lookups[lookup] = record["v"]
+        
+        # Drop a torn last line, so appended records start on a line of their own
+        if end < os.path.getsize(self.path):
+            with open(self.path, 'r+b') as f:
+                f.truncate(end)
+        
+        logger.info(
+            f"Resuming from {self.path}: {len(self.done)} target(s) done, "
+            f"{len(self.failed)} failed, {len(self.lookups)} lookup(s) reusable"
+        )
+    
+    def _records(self, prefix, end):
+        """Parsed lines starting with prefix, up to byte offset end"""
+        with open(self.path, 'rb') as f:
+            offset = 0
+            for line in f:
+                offset += len(line)
+                if offset > end:
+                    break
+                if not line.startswith(prefix):
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+    
+    def unfinished(self, targets):
+        """Yield the targets not already done"""
+        for target in targets:
+            if target in self.done:
+                self.stats["skipped"] += 1
+                continue
+            yield target
+    
+    async def unfinished_async(self, targets):
+        """unfinished() for an async iterable"""
+        async for target in targets:
+            if target in self.done:
+                self.stats["skipped"] += 1
+                continue
+            yield target
+    
+    def bind(self, target):
+        """Attribute lookups in the current task (and tasks it starts) to target"""
+        _active.set((self, target))
+    
+    @staticmethod
+    def recall(source, key):
+        """Result of a lookup journaled by an earlier attempt of this run, or None"""
+        active = _active.get()
+        if active is None:
+            return None
+        
+        journal = active[0]
+        value = journal.lookups.get((source, key))
+        if value is None:
+            return None
+        journal.stats["reused"] += 1
+        return copy.deepcopy(value)
+    
+    @staticmethod
+    def remember(source, key, value):
+        """Journal a successful lookup for the target bound to this task"""
+        active = _active.get()
+        if active is None:
+            return
+        
+        journal, target = active
+        lookup = (source, key)
+        
+        with journal._lock:
+            first = lookup not in journal._written
+            journal._written.add(lookup)
+        
+        if first:
+            journal._append({"k": source, "c": key, "v": value})
+        journal._append({"p": target, "k": source, "c": key})
+    
+    def mark(self, target, error=None):
+        """Record a target as done, or failed with error"""
+        if error:
+            self._append({"s": "failed", "t": target, "e": str(error)})
+        else:
+            self.done.add(target)
+            self._append({"s": "done", "t": target})
+    
+    def finish(self):
+        """Mark the run as complete, so a new run may replace the journal"""
+        self._append({"s": "end"})
+    
+    def _append(self, record):
+        line = (json.dumps(record, default=str, separators=(",", ":")) + "\n").encode("utf-8")
+        
+        with self._lock:
+            self._buffer.append(line)
+            self.stats["records"] += 1
+            
+            due = (len(self._buffer) >= self.sync_every
+                   or time.monotonic() - self._synced >= self.sync_seconds)
+            if due:
+                self._synced = time.monotonic()
+        
+        if due:
+            self._schedule_sync()
+    
+    def _schedule_sync(self):
+        """Sync in the executor when called on an event loop, else right here"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.sync()
+            return
+        
+        if self._syncing is None or self._syncing.done():
+            self._syncing = loop.run_in_executor(None, self.sync)
+    
+    def sync(self):
+        """Write and fsync everything buffered so far (blocking)"""
+        with self._write_lock:
+            with self._lock:
+                data = b"".join(self._buffer)
+                self._buffer = []
+            
+            if not data or self._file.closed:
+                return
+            
+            self._file.write(data)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self.stats["syncs"] += 1
+    
+    def close(self):
+        """Sync and close the journal (blocking)"""
+        self.sync()
+        with self._write_lock:
+            self._file.close()
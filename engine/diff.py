@@ -0,0 +1,133 @@
+"""
+ShadowRecon Findings Diff
+Structural comparison of two scans of the same target
+"""
+
+import json
+
+# Keys that change on every scan without saying anything about the target
+IGNORED_KEYS = frozenset({"timestamp"})
+
+def _item_key(item):
+    """Hashable identity for a list item (dicts and lists by canonical JSON)"""
+    if isinstance(item, (dict, list)):
+        return json.dumps(item, sort_keys=True, default=str)
+    return item
+
+def diff_findings(old, new, ignore=IGNORED_KEYS, path=""):
+    """
+    List the changes between two findings dicts
+    Each change is {"path": "dns.mx_records", "op": ..., ...} where op is
+      added    key (or list items) present only in new: "value" / "items"
+      removed  key (or list items) present only in old: "value" / "items"
+      changed  value differs: "old" and "new"
+    Nested dicts are compared key by key and lists as sets of items, so
+    reordered DNS answers are not reported as a change, and a new service
+    shows up as one added item rather than a whole new list
+    """
+    changes = []
+    
+    if isinstance(old, dict) and isinstance(new, dict):
+        for key in sorted(set(old) | set(new), key=str):
+            if key in ignore:
+                continue
+            
+            child = f"{path}.{key}" if path else str(key)
+            
+            if key not in old:
+                changes.append({"path": child, "op": "added", "value": new[key]})
+            elif key not in new:
+                changes.append({"path": child, "op": "removed", "value": old[key]})
+            else:
+                changes.extend(diff_findings(old[key], new[key], ignore, child))
+        
+        return changes
+    
+    if isinstance(old, list) and isinstance(new, list):
+        old_items = {_item_key(item) for item in old}
+        new_items = {_item_key(item) for item in new}
+        added = [item for item in new if _item_key(item) not in old_items]
+        removed = [item for item in old if _item_key(item) not in new_items]
+        
+        if added:
+            changes.append({"path": path, "op": "added", "items": added})
+        if removed:
+            changes.append({"path": path, "op": "removed", "items": removed})
+        
+        return changes
+    
+    if old != new:
+        changes.append({"path": path, "op": "changed", "old": old, "new": new})
+    
+    return changes
+
+def delta(old, new, path=()):
+    """
+    Compact delta turning old into new exactly (see apply_delta)
+    A list of ops, each [op, path, value?] with path a list of dict keys:
+      ["=", path, value]  set a key (or the whole document for path [])
+      ["-", path]         delete a key
+      ["+", path, items]  append items to a list
+      ["x", path, items]  remove items from a list
+    List ops are only used when they rebuild the new list in order;
+    otherwise the whole list is set
+    """
+    if isinstance(old, dict) and isinstance(new, dict):
+        ops = []
+        
+        for key in old:
+            if key not in new:
+                ops.append(["-", list(path + (key,))])
+        
+        for key, value in new.items():
+            if key not in old:
+                ops.append(["=", list(path + (key,)), value])
+            else:
+                ops.extend(delta(old[key], value, path + (key,)))
+        
+        return ops
+    
+    if type(old) is type(new) and old == new:
+        return []
+    
+    if isinstance(old, list) and isinstance(new, list):
+        new_items = {_item_key(item) for item in new}
+        kept = [item for item in old if _item_key(item) in new_items]
+        removed = [item for item in old if _item_key(item) not in new_items]
+        added = new[len(kept):]
+        
+        if kept + added == new and len(added) + len(removed) < len(new):
+            ops = []
+            if removed:
+                ops.append(["x", list(path), removed])
+            if added:
+                ops.append(["+", list(path), added])
+            return ops
+    
+    return [["=", list(path), new]]
+
+def apply_delta(document, ops):
+    """Apply delta() ops to document in place and return the result"""
+    for op in ops:
+        action, path = op[0], op[1]
+        
+        if not path:
+            document = op[2]
+            continue
+        
+        parent = document
+        for key in path[:-1]:
+            parent = parent[key]
+        key = path[-1]
+        
+        if action == "=":
+            parent[key] = op[2]
+        elif action == "-":
+            parent.pop(key, None)
+        elif action == "+":
+            parent[key].extend(op[2])
+        elif action == "x":
+            removed = {_item_key(item) for item in op[2]}
+            parent[key] = [item for item in parent[key] if _item_key(item) not in removed]
+    
+    return document
@@ -0,0 +1,188 @@
+"""
+ShadowRecon Offline GeoIP/ASN Engine
+Local lookups from MaxMind MMDB files or IP-range CSV databases
+"""
+
+import bisect
+import csv
+import ipaddress
+import logging
+import threading
+from array import array
+
+try:
+    import maxminddb
+    MAXMIND_AVAILABLE = True
+except ImportError:
+    MAXMIND_AVAILABLE = False
+
+logger = logging.getLogger("ShadowRecon")
+
+class OfflineGeoDB:
+    """
+    Read-only IP database answering country, city, ASN and prefix lookups
+    
+    Two formats are supported:
+    - .mmdb files (MaxMind GeoLite2/GeoIP2 City, Country or ASN), memory-mapped
+      through the maxminddb package
+    - CSV files with either a 'network' (CIDR) column or 'start'/'end' columns
+      plus any of: country, country_code, city, latitude, longitude, timezone,
+      isp, asn, asn_name. Ranges are loaded once into sorted integer arrays
+      and searched with bisect
+    """
+    
+    FIELDS = (
+        "country", "country_code", "city", "latitude", "longitude",
+        "timezone", "isp", "asn", "asn_name"
+    )
+    
+    _instances = {}
+    _lock = threading.Lock()
+    
+    def __init__(self, path):
+        self.path = path
+        self._reader = None
+        self._starts = array('Q')
+        self._ends = array('Q')
+        self._prefix_lens = array('B')
+        self._record_ids = array('L')
+        self._records = []
+        
+        if path.lower().endswith('.mmdb'):
+            self._open_mmdb(path)
+        else:
+            self._load_csv(path)
+    
+    @classmethod
+    def get(cls, path):
+        """Return a shared database for path, or None if unset or unloadable"""
+        if not path:
+            return None
+        
+        with cls._lock:
+            if path not in cls._instances:
+                try:
+                    cls._instances[path] = cls(path)
+                    logger.info(f"Loaded offline IP database: {path}")
+                except Exception as e:
+                    cls._instances[path] = None
+                    logger.warning(f"Could not load offline IP database {path}: {str(e)}")
+            
+            return cls._instances[path]
+    
+    def _open_mmdb(self, path):
+        """Memory-map a MaxMind database"""
+        if not MAXMIND_AVAILABLE:
+            raise RuntimeError("maxminddb package not installed")
+        
+        self._reader = maxminddb.open_database(path, maxminddb.MODE_MMAP)
+    
+    def _load_csv(self, path):
+        """Load an IP-range CSV into sorted start/end arrays"""
+        rows = []
+        interned = {}
+        
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            for row in csv.DictReader(f):
+                try:
+                    if row.get('network'):
+                        network = ipaddress.ip_network(row['network'].strip(), strict=False)
+                        if network.version != 4:
+                            continue
+                        start = int(network.network_address)
+                        end = int(network.broadcast_address)
+                        prefix_len = network.prefixlen
+                    else:
+                        start = int(ipaddress.IPv4Address(row['start'].strip()))
+                        end = int(ipaddress.IPv4Address(row['end'].strip()))
+                        prefix_len = 0
+                except (KeyError, ValueError):
+                    continue
+                
+                # Many ranges share the same attributes; store each combination once
+                record = tuple(row.get(field) or None for field in self.FIELDS)
+                record_id = interned.setdefault(record, len(interned))
+                rows.append((start, end, prefix_len, record_id))
+        
+        rows.sort()
+        self._records = [None] * len(interned)
+        for record, record_id in interned.items():
+            self._records[record_id] = self._coerce(dict(zip(self.FIELDS, record)))
+        
+        for start, end, prefix_len, record_id in rows:
+            self._starts.append(start)
+            self._ends.append(end)
+            self._prefix_lens.append(prefix_len)
+            self._record_ids.append(record_id)
+    
+    @staticmethod
+    def _coerce(record):
+        """Convert numeric CSV columns to numbers"""
+        for field, cast in (("latitude", float), ("longitude", float), ("asn", int)):
+            if record[field] is not None:
+                value = str(record[field])
+                if field == "asn" and value.upper().startswith("AS"):
+                    value = value[2:]
+                try:
+                    record[field] = cast(value)
+                except ValueError:
+                    pass
+        return record
+    
+    def lookup(self, ip):
+        """
+        Look up an IP address
+        Returns a flat dict of the FIELDS plus 'prefix', or None if not covered
+        """
+        if self._reader is not None:
+            return self._lookup_mmdb(ip)
+        
+        try:
+            value = int(ipaddress.IPv4Address(ip))
+        except ValueError:
+            return None
+        
+        index = bisect.bisect_right(self._starts, value) - 1
+        if index < 0 or value > self._ends[index]:
+            return None
+        
+        result = dict(self._records[self._record_ids[index]])
+        
+        start, end = self._starts[index], self._ends[index]
+        if self._prefix_lens[index]:
+            result["prefix"] = f"{ipaddress.IPv4Address(start)}/{self._prefix_lens[index]}"
+        else:
+            result["prefix"] = f"{ipaddress.IPv4Address(start)}-{ipaddress.IPv4Address(end)}"
+        
+        return result
+    
+    def _lookup_mmdb(self, ip):
+        """Look up an IP in a MaxMind database and flatten the record"""
+        record, prefix_len = self._reader.get_with_prefix_len(ip)
+        if not record:
+            return None
+        
+        country = record.get('country') or record.get('registered_country') or {}
+        city = record.get('city') or {}
+        location = record.get('location') or {}
+        
+        network = ipaddress.ip_network(f"{ip}/{prefix_len}", strict=False)
+        
+        return {
+            "country": country.get('names', {}).get('en'),
+            "country_code": country.get('iso_code'),
+            "city": city.get('names', {}).get('en'),
+            "latitude": location.get('latitude'),
+            "longitude": location.get('longitude'),
+            "timezone": location.get('time_zone'),
+            "isp": record.get('isp') or record.get('autonomous_system_organization'),
+            "asn": record.get('autonomous_system_number'),
+            "asn_name": record.get('autonomous_system_organization'),
+            "prefix": str(network)
+        }
+    
+    def close(self):
+        """Release the memory-mapped database, if any"""
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
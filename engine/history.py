@@ -0,0 +1,370 @@
+"""
+ShadowRecon Scan History
+Local SQLite store of every scan, indexed for per-target and time-range queries
+"""
+
+import json
+import re
+import sqlite3
+import threading
+import time
+import logging
+from collections import OrderedDict
+from datetime import datetime
+from config import Config
+from .diff import delta, apply_delta, diff_findings
+
+logger = logging.getLogger("ShadowRecon")
+
+class ScanHistory:
+    """
+    Append-only log of scan results
+    Each row keeps the target, scan type, time and risk score/level. Findings
+    are stored as base-plus-delta chains: a full JSON snapshot every
+    snapshot_interval scans of a target, and in between only the delta from
+    the previous scan (engine.diff.delta), so a re-scan that found nothing
+    new costs a few bytes. Any past snapshot is rebuilt by walking back to
+    its base (at most snapshot_interval - 1 deltas).
+    Inserts are buffered and committed in batches; indexes on
+    (target, type, time), (type, time), (risk_level, time) and time keep
+    history, latest-state and filtered lookups to a few index probes even
+    with millions of rows
+    """
+    
+    _default = None
+    _default_lock = threading.Lock()
+    
+    def __init__(self, path=None, batch_size=None, flush_seconds=None, snapshot_interval=None):
+        """snapshot_interval: store a full snapshot every N scans of a target (1 disables deltas)"""
+        self.path = path or Config.HISTORY_PATH
+        self.batch_size = max(1, batch_size or Config.HISTORY_BATCH_SIZE)
+        self.flush_seconds = Config.HISTORY_FLUSH_SECONDS if flush_seconds is None else flush_seconds
+        self.snapshot_interval = max(1, snapshot_interval or Config.HISTORY_SNAPSHOT_INTERVAL)
+        self._lock = threading.Lock()
+        self._pending = []
+        self._last_flush = time.monotonic()
+        
+        # Latest (scanned_at, depth, snapshot) per (target, type), so deltas are
+        # computed without reading the chain back. Never smaller than a batch:
+        # every pending row's key is then among the most recently used
+        self._heads = OrderedDict()
+        self._heads_max = max(Config.HISTORY_HEAD_CACHE, self.batch_size)
+        
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS scans ("
+            "id INTEGER PRIMARY KEY, "
+            "target TEXT NOT NULL, "
+            "type TEXT NOT NULL, "
+            "scanned_at REAL NOT NULL, "
+            "risk_score INTEGER, "
+            "risk_level TEXT, "
+            "parent_at REAL, "
+            "depth INTEGER NOT NULL DEFAULT 0, "
+            "findings TEXT NOT NULL)"
+        )
+        
+        # Databases from before delta storage hold full snapshots only
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(scans)")}
+        if "parent_at" not in columns:
+            self._conn.execute("ALTER TABLE scans ADD COLUMN parent_at REAL")
+            self._conn.execute("ALTER TABLE scans ADD COLUMN depth INTEGER NOT NULL DEFAULT 0")
+        
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_scans_target ON scans (target, type, scanned_at)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_scans_type ON scans (type, scanned_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_scans_time ON scans (scanned_at)")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_scans_risk ON scans (risk_level, scanned_at)"
+        )
+        self._conn.commit()
+    
+    @classmethod
+    def default(cls):
+        """Return the process-wide history store, opening it on first use"""
+        with cls._default_lock:
+            if cls._default is None:
+                cls._default = cls()
+            return cls._default
+    
+    @staticmethod
+    def parse_time(text):
+        """
+        Parse a time bound into a Unix timestamp
+        Accepts ISO dates/datetimes ('2024-05-01', '2024-05-01T12:00') or an age
+        relative to now ('90m', '12h', '30d', '2w')
+        """
+        if text is None:
+            return None
+        
+        match = re.fullmatch(r'(\d+)([mhdw])', text.strip().lower())
+        if match:
+            seconds = {"m": 60, "h": 3600, "d": 86400, "w": 604800}[match.group(2)]
+            return time.time() - int(match.group(1)) * seconds
+        
+        try:
+            return datetime.fromisoformat(text.strip()).timestamp()
+        except ValueError:
+            raise ValueError(f"Invalid time: {text} (use YYYY-MM-DD[THH:MM] or an age like 30d)")
+    
+    @staticmethod
+    def _risk(findings):
+        """Risk score and level, falling back to an embedded reputation check"""
+        reputation = findings.get("reputation") or {}
+        score = findings.get("risk_score")
+        level = findings.get("risk_level")
+        
+        if score is None:
+            score = reputation.get("risk_score")
+        if level is None:
+            level = reputation.get("risk_level")
+        
+        return score, level
+    
+    def add(self, target, scan_type, findings, scanned_at=None):
+        """Queue one scan (as a delta from the previous one where possible); written with the next batch"""
+        score, level = self._risk(findings)
+        scanned_at = scanned_at or time.time()
+        payload = json.dumps(findings, default=str)
+        # Diff the JSON form, so the delta matches what a rebuild starts from
+        snapshot = json.loads(payload)
+        parent_at, depth = None, 0
+        
+        with self._lock:
+            head = self._head(target, scan_type)
+            
+            if head is not None and head[1] + 1 < self.snapshot_interval and head[0] < scanned_at:
+                ops = json.dumps(delta(head[2], snapshot), separators=(",", ":"))
+                # A delta bigger than the snapshot is not worth a longer chain
+                if len(ops) < len(payload):
+                    payload, parent_at, depth = ops, head[0], head[1] + 1
+            
+            self._set_head(target, scan_type, (scanned_at, depth, snapshot))
+            self._pending.append((target, scan_type, scanned_at, score, level, parent_at, depth, payload))
+            
+            if (len(self._pending) >= self.batch_size
+                    or time.monotonic() - self._last_flush >= self.flush_seconds):
+                self._flush()
+    
+    def flush(self):
+        """Write all queued scans in one transaction"""
+        with self._lock:
+            self._flush()
+    
+    def _flush(self):
+        """Insert pending rows (caller holds the lock)"""
+        self._last_flush = time.monotonic()
+        
+        if not self._pending:
+            return
+        
+        with self._conn:
+            self._conn.executemany(
+                "INSERT INTO scans (target, type, scanned_at, risk_score, risk_level, parent_at, depth, findings) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                self._pending
+            )
+        
+        logger.debug(f"History stored {len(self._pending)} scan(s)")
+        self._pending = []
+    
+    def _head(self, target, scan_type):
+        """Latest (scanned_at, depth, snapshot) of a target, from memory or the database (caller holds the lock)"""
+        key = (target, scan_type)
+        head = self._heads.get(key)
+        
+        if head is not None:
+            self._heads.move_to_end(key)
+            return head
+        
+        row = self._conn.execute(
+            "SELECT scanned_at, depth, parent_at, findings FROM scans "
+            "WHERE target = ? AND type = ? ORDER BY scanned_at DESC LIMIT 1",
+            (target, scan_type)
+        ).fetchone()
+        
+        if row is None:
+            return None
+        
+        head = (row[0], row[1], self._rebuild(target, scan_type, row[2], row[3], {}))
+        self._set_head(target, scan_type, head)
+        return head
+    
+    def _set_head(self, target, scan_type, head):
+        key = (target, scan_type)
+        self._heads[key] = head
+        self._heads.move_to_end(key)
+        
+        if len(self._heads) > self._heads_max:
+            self._heads.popitem(last=False)
+    
+    def _rebuild(self, target, scan_type, parent_at, payload, chains):
+        """
+        Snapshot of one stored row: its base with every delta up to it applied
+        chains caches (parent_at, payload) by scanned_at, so rows of one query
+        sharing a chain read each ancestor once (caller holds the lock)
+        """
+        deltas = []
+        
+        while parent_at is not None:
+            deltas.append(payload)
+            
+            key = (target, scan_type, parent_at)
+            if key not in chains:
+                row = self._conn.execute(
+                    "SELECT parent_at, findings FROM scans WHERE target = ? AND type = ? AND scanned_at = ?",
+                    key
+                ).fetchone()
+                
+                if row is None:
+                    raise ValueError(f"History chain broken for {target} ({scan_type}) at {parent_at}")
+                chains[key] = row
+            
+            parent_at, payload = chains[key]
+        
+        snapshot = json.loads(payload)
+        for ops in reversed(deltas):
+            snapshot = apply_delta(snapshot, json.loads(ops))
+        
+        return snapshot
+    
+    def _query(self, sql, params, include_findings):
+        """Run a SELECT over scans (pending rows are flushed first) and build dicts"""
+        results = []
+        chains = {}
+        
+        with self._lock:
+            self._flush()
+            rows = self._conn.execute(sql, params).fetchall()
+            
+            for target, scan_type, scanned_at, score, level, parent_at, findings in rows:
+                entry = {
+                    "target": target,
+                    "type": scan_type,
+                    "scanned_at": datetime.fromtimestamp(scanned_at).isoformat(timespec="seconds"),
+                    "risk_score": score,
+                    "risk_level": level
+                }
+                if include_findings:
+                    chains[(target, scan_type, scanned_at)] = (parent_at, findings)
+                    entry["findings"] = self._rebuild(target, scan_type, parent_at, findings, chains)
+                results.append(entry)
+        
+        return results
+    
+    @staticmethod
+    def _filters(target=None, scan_type=None, risk_level=None, since=None, until=None):
+        """WHERE clause and parameters for the optional filters"""
+        clauses, params = [], []
+        
+        for column, value in (("target", target), ("type", scan_type), ("risk_level", risk_level)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        
+        if since is not None:
+            clauses.append("scanned_at >= ?")
+            params.append(since)
+        
+        if until is not None:
+            clauses.append("scanned_at < ?")
+            params.append(until)
+        
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+    
+    def history(self, target, scan_type=None, since=None, until=None, limit=100, include_findings=False):
+        """
+        Scans of one target, newest first
+        since/until: Unix timestamps (see parse_time)
+        """
+        where, params = self._filters(target, scan_type, None, since, until)
+        columns = "target, type, scanned_at, risk_score, risk_level, parent_at, " + ("findings" if include_findings else "''")
+        
+        return self._query(
+            f"SELECT {columns} FROM scans{where} ORDER BY scanned_at DESC LIMIT ?",
+            params + [limit],
+            include_findings
+        )
+    
+    def latest(self, target, scan_type=None, until=None):
+        """Most recent scan of a target (as of until, if given), with findings; None if never scanned"""
+        rows = self.history(target, scan_type, until=until, limit=1, include_findings=True)
+        return rows[0] if rows else None
+    
+    def search(self, scan_type=None, risk_level=None, since=None, until=None, limit=100):
+        """Scans across all targets matching the filters, newest first (no findings)"""
+        where, params = self._filters(None, scan_type, risk_level, since, until)
+        
+        return self._query(
+            f"SELECT target, type, scanned_at, risk_score, risk_level, NULL, '' FROM scans{where} "
+            f"ORDER BY scanned_at DESC LIMIT ?",
+            params + [limit],
+            False
+        )
+    
+    def changes(self, target, scan_type=None, since=None, until=None, limit=100):
+        """
+        What changed between consecutive scans of a target, newest first
+        Each entry is {"target", "type", "from", "to", "changes"} with changes
+        as in engine.diff.diff_findings; scans with no change are skipped.
+        The scan just before since is included as the first baseline;
+        limit caps the number of scan pairs compared
+        """
+        scans = self.history(target, scan_type, since, until, limit + 1, include_findings=True)
+        
+        if since is not None and len(scans) <= limit:
+            baseline = self.latest(target, scan_type, until=since)
+            if baseline is not None:
+                scans.append(baseline)
+        
+        results = []
+        for new, old in zip(scans, scans[1:]):
+            if new["type"] != old["type"]:
+                continue
+            
+            changes = diff_findings(old["findings"], new["findings"])
+            if changes:
+                results.append({
+                    "target": target,
+                    "type": new["type"],
+                    "from": old["scanned_at"],
+                    "to": new["scanned_at"],
+                    "changes": changes
+                })
+        
+        return results[:limit]
+    
+    def storage(self):
+        """Row and byte counts for full snapshots vs deltas"""
+        with self._lock:
+            self._flush()
+            rows = self._conn.execute(
+                "SELECT parent_at IS NULL, COUNT(*), SUM(LENGTH(findings)) FROM scans GROUP BY 1"
+            ).fetchall()
+        
+        stats = {"snapshots": 0, "snapshot_bytes": 0, "deltas": 0, "delta_bytes": 0}
+        for is_base, count, size in rows:
+            prefix = "snapshot" if is_base else "delta"
+            stats[f"{prefix}s"] = count
+            stats[f"{prefix}_bytes"] = size or 0
+        
+        return stats
+    
+    def count(self):
+        """Number of stored scans"""
+        with self._lock:
+            self._flush()
+            return self._conn.execute("SELECT COUNT(*) FROM scans").fetchone()[0]
+    
+    def close(self):
+        """Write pending scans and close the database connection"""
+        with self._lock:
+            self._flush()
+            self._conn.close()
+        
+        with ScanHistory._default_lock:
+            if ScanHistory._default is self:
+                ScanHistory._default = None
@@ -0,0 +1,127 @@
+"""
+ShadowRecon HTTP Client
+Process-wide pooled aiohttp session shared by every module
+"""
+
+import asyncio
+import aiohttp
+import logging
+from contextlib import asynccontextmanager
+from config import Config
+from .ratelimit import RateLimiter
+from .resolver import DNSEngine
+
+logger = logging.getLogger("ShadowRecon")
+
+class HTTPClient:
+    """
+    Shared HTTP connection pool
+    One keep-alive session per event loop, so repeated lookups against the
+    same API hosts reuse TCP/TLS connections instead of re-handshaking
+    """
+    
+    _sessions = {}
+    
+    pool_size = None
+    pool_per_host = None
+    
+    @classmethod
+    def configure(cls, pool_size=None, per_host=None):
+        """
+        Override Config.HTTP_POOL_SIZE / HTTP_POOL_PER_HOST for pools opened
+        from now on (None restores the configured value); close() the current
+        pool for the change to apply to it
+        """
+        cls.pool_size = pool_size
+        cls.pool_per_host = per_host
+    
+    @classmethod
+    async def get_session(cls):
+        """Return the pooled session for the running event loop, creating it on first use"""
+        loop = asyncio.get_running_loop()
+        session = cls._sessions.get(loop)
+        
+        if session is None or session.closed:
+            limit = cls.pool_size or Config.HTTP_POOL_SIZE
+            per_host = cls.pool_per_host or Config.HTTP_POOL_PER_HOST
+            
+            connector = aiohttp.TCPConnector(
+                limit=limit,
+                limit_per_host=per_host,
+                use_dns_cache=True,
+                ttl_dns_cache=Config.HTTP_DNS_CACHE_TTL,
+                keepalive_timeout=Config.HTTP_KEEPALIVE
+            )
+            
+            session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=Config.REQUEST_TIMEOUT),
+                headers={"User-Agent": Config.USER_AGENT}
+            )
+            
+            cls._sessions[loop] = session
+            logger.debug(f"Opened HTTP pool (limit={limit}, per_host={per_host})")
+        
+        return session
+    
+    @classmethod
+    @asynccontextmanager
+    async def request(cls, method, url, **kwargs):
+        """
+        Send a request through the shared pool, respecting per-host rate limits
+        A 429 backs off the host's bucket (honoring Retry-After) and the
+        request is retried up to Config.RATE_LIMIT_RETRIES times
+        """
+        session = await cls.get_session()
+        host = RateLimiter.key_for(url)
+        attempts = Config.RATE_LIMIT_RETRIES + 1
+        
+        for attempt in range(attempts):
+            await RateLimiter.acquire(host)
+            response = await session.request(method, url, **kwargs)
+            
+            if response.status != 429 or RateLimiter.bucket_for(host) is None:
+                break
+            
+            await RateLimiter.penalize(host, response.headers.get("Retry-After"))
+            
+            if attempt == attempts - 1:
+                break
+            
+            response.release()
+        
+        try:
+            yield response
+        finally:
+            response.release()
+    
+    @classmethod
+    def get(cls, url, **kwargs):
+        """Rate-limited GET through the shared pool"""
+        return cls.request("GET", url, **kwargs)
+    
+    @classmethod
+    def post(cls, url, **kwargs):
+        """Rate-limited POST through the shared pool"""
+        return cls.request("POST", url, **kwargs)
+    
+    @classmethod
+    async def close(cls):
+        """Close the pooled session for the running event loop"""
+        loop = asyncio.get_running_loop()
+        session = cls._sessions.pop(loop, None)
+        
+        if session is not None and not session.closed:
+            await session.close()
+    
+    @classmethod
+    def run_sync(cls, coro):
+        """Run a coroutine to completion in a fresh event loop, closing the pools afterwards"""
+        async def runner():
+            try:
+                return await coro
+            finally:
+                await cls.close()
+                DNSEngine.close_default()
+        
+        return asyncio.run(runner())
@@ -0,0 +1,175 @@
+"""
+ShadowRecon Lookup Pipeline
+Dependency graph of lookups that start as soon as their inputs are ready
+"""
+
+import asyncio
+import copy
+import json
+import time
+import logging
+from collections import OrderedDict
+from config import Config
+from .cache import ResultCache
+from .checkpoint import CheckpointJournal
+from .singleflight import SingleFlight
+
+logger = logging.getLogger("ShadowRecon")
+
+class Pipeline:
+    """
+    Directed acyclic graph of async lookups
+    Each node names the nodes (or seed values) it takes as inputs. A run
+    starts every node needed for the requested outputs at once, and each
+    begins as soon as its own inputs resolve, so independent branches
+    overlap and a value like the hosting IP is computed once and shared.
+    A node whose input is None is skipped and yields None itself, unless
+    that input is listed as optional.
+    Nodes with a key are shared across runs: concurrent runs asking for the
+    same key await one call, and results are kept in a bounded memo for
+    memo_seconds, so two domains on one IP cost a single Shodan lookup.
+    Results carrying an error are not memoized, and --refresh
+    (ResultCache.refresh) bypasses the memo. In a checkpointed bulk scan,
+    every keyed result is journaled for the target that received it,
+    whether it came from a call, an in-flight call or the memo, so a
+    resumed run answers it from the journal
+    """
+    
+    def __init__(self, memo_size=None, memo_seconds=None):
+        self.nodes = {}
+        self.memo_size = Config.PIPELINE_MEMO_SIZE if memo_size is None else memo_size
+        self.memo_seconds = Config.PIPELINE_MEMO_SECONDS if memo_seconds is None else memo_seconds
+        self._flights = SingleFlight()
+        self._memo = OrderedDict()
+        self.stats = {"runs": 0, "calls": 0, "shared": 0, "memo_hits": 0, "resumed": 0, "skipped": 0}
+    
+    def node(self, name, inputs=(), key=None, optional=()):
+        """
+        Decorator registering an async function as node name
+        It is called with the values of inputs, in order. key: optional
+        function of the same values returning a hashable identity for
+        cross-run sharing (e.g. lambda ip: ("shodan", ip)). optional: inputs
+        passed through as None instead of skipping the node
+        """
+        def register(func):
+            required = [i for i, dependency in enumerate(inputs) if dependency not in optional]
+            self.nodes[name] = (tuple(inputs), func, key, required)
+            return func
+        
+        return register
+    
+    async def run(self, outputs, **seeds):
+        """
+        Evaluate the named output nodes and return {name: value}
+        seeds supply input values by node name, and override nodes of the
+        same name (an IP scan seeds "ip" instead of resolving a domain)
+        """
+        self.stats["runs"] += 1
+        tasks = {}
+        
+        def start(name):
+            task = tasks.get(name)
+            
+            if task is None:
+                if name in seeds:
+                    task = asyncio.get_running_loop().create_future()
+                    task.set_result(seeds[name])
+                elif name in self.nodes:
+                    task = asyncio.ensure_future(self._evaluate(name, start))
+                else:
+                    raise KeyError(f"Unknown pipeline node: {name}")
+                
+                tasks[name] = task
+            
+            return task
+        
+        try:
+            values = await asyncio.gather(*(start(name) for name in outputs))
+        finally:
+            for task in tasks.values():
+                task.cancel()
+        
+        return dict(zip(outputs, values))
+    
+    async def _evaluate(self, name, start):
+        """Wait for a node's inputs, then compute it (sharing keyed calls)"""
+        inputs, func, key, required = self.nodes[name]
+        values = await asyncio.gather(*(start(dependency) for dependency in inputs))
+        
+        if any(values[i] is None for i in required):
+            self.stats["skipped"] += 1
+            return None
+        
+        if key is None:
+            self.stats["calls"] += 1
+            return await func(*values)
+        
+        return await self._shared(key(*values), func, values)
+    
+    async def _shared(self, key, func, values):
+        """Return a keyed result from the journal, the memo, an in-flight call or a new call"""
+        journal_key = json.dumps(key, default=str)
+        
+        resumed = CheckpointJournal.recall("pipeline", journal_key)
+        if resumed is not None:
+            self.stats["resumed"] += 1
+            ResultCache.replay(resumed["sources"], reused=True)
+            CheckpointJournal.remember("pipeline", journal_key, resumed)
+            return resumed["value"]
+        
+        value, sources = await self._memoized(key, func, values)
+        
+        # In each caller's context, so every target sharing the call has it journaled
+        if value is not None and not (isinstance(value, dict) and value.get("error")):
+            CheckpointJournal.remember("pipeline", journal_key, {"value": value, "sources": sources})
+        return value
+    
+    async def _memoized(self, key, func, values):
+        """
+        Return (value, sources) from the memo, an in-flight call, or a new call
+        sources are the cache outcomes of the lookups behind value; they are
+        added to the caller's ResultCache trace, as 'cached' unless this
+        caller made the call itself
+        """
+        entry = None if ResultCache.refresh else self._memo.get(key)
+        
+        if entry is not None:
+            if time.monotonic() - entry[0] < self.memo_seconds:
+                self._memo.move_to_end(key)
+                self.stats["memo_hits"] += 1
+                ResultCache.replay(entry[2], reused=True)
+                return copy.deepcopy(entry[1]), dict(entry[2])
+            del self._memo[key]
+        
+        shared = self._flights.in_flight(key)
+        if shared:
+            self.stats["shared"] += 1
+        else:
+            self.stats["calls"] += 1
+        
+        async def call():
+            # Runs in its own task, so this trace only sees the call's own lookups
+            sources = ResultCache.trace()
+            value = await func(*values)
+            self._remember(key, value, sources)
+            return value, sources
+        
+        value, sources = copy.deepcopy(await self._flights.do(key, call))
+        ResultCache.replay(sources, reused=shared)
+        return value, sources
+    
+    def _remember(self, key, value, sources):
+        """Memoize a finished keyed call; failures are left for the next run to retry"""
+        if not self.memo_size or ResultCache.refresh:
+            return
+        
+        if isinstance(value, dict) and value.get("error"):
+            return
+        
+        self._memo[key] = (time.monotonic(), value, sources)
+        if len(self._memo) > self.memo_size:
+            self._memo.popitem(last=False)
+    
+    def clear(self):
+        """Forget memoized results"""
+        self._memo.clear()
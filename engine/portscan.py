@@ -0,0 +1,503 @@
+"""
+ShadowRecon Port Scanner
+Asyncio TCP connect scanning with banner grabbing, producing the same
+open_ports/services shape as the Shodan lookup
+"""
+
+import asyncio
+import errno
+import logging
+import os
+import re
+import socket
+import time
+import weakref
+from config import Config
+from utils import Utils
+
+try:
+    import resource
+    RESOURCE_AVAILABLE = True
+except ImportError:
+    RESOURCE_AVAILABLE = False
+
+logger = logging.getLogger("ShadowRecon")
+
+# Connect failures caused by this machine running out of sockets or ports, not by the target
+LOCAL_ERRORS = {errno.EMFILE, errno.ENFILE, errno.ENOBUFS, errno.ENOMEM, errno.EADDRNOTAVAIL}
+
+class PortScanner:
+    """
+    TCP connect scanner for many hosts at once
+    A fixed pool of workers pulls (host, port) pairs that are interleaved
+    across a window of hosts, so the global cap keeps thousands of connects
+    in flight while the per-host cap stops any single target being flooded.
+    The global cap holds across concurrent scan_many() calls on one scanner;
+    share one per event loop with for_running_loop()
+    A connect that fails for local reasons (out of file descriptors or
+    ephemeral ports) is retried with backoff; if it still fails, the port is
+    left unscanned and the host's result carries an error instead of
+    reporting it closed
+    """
+    
+    _instances = weakref.WeakKeyDictionary()
+    
+    # nmap's most common TCP ports, in range notation
+    TOP_100 = (
+        "7,9,13,21-23,25-26,37,53,79-81,88,106,110-111,113,119,135,139,143-144,179,199,"
+        "389,427,443-445,465,513-515,543-544,548,554,587,631,646,873,990,993,995,"
+        "1025-1029,1110,1433,1720,1723,1755,1900,2000-2001,2049,2121,2717,3000,3128,3306,"
+        "3389,3986,4899,5000,5009,5051,5060,5101,5190,5357,5432,5631,5666,5800,5900,"
+        "6000-6001,6646,7070,8000,8008-8009,8080-8081,8443,8888,9100,9999-10000,32768,"
+        "49152-49157"
+    )
+    
+    TOP_1000 = (
+        "1,3-4,6-7,9,13,17,19-26,30,32-33,37,42-43,49,53,70,79-85,88-90,99-100,106,"
+        "109-111,113,119,125,135,139,143-144,146,161,163,179,199,211-212,222,254-256,259,"
+        "264,280,301,306,311,340,366,389,406-407,416-417,425,427,443-445,458,464-465,481,"
+        "497,500,512-515,524,541,543-545,548,554-555,563,587,593,616-617,625,631,636,646,"
+        "648,666-668,683,687,691,700,705,711,714,720,722,726,749,765,777,783,787,800-801,"
+        "808,843,873,880,888,898,900-903,911-912,981,987,990,992-993,995,999-1002,1007,"
+        "1009-1011,1021-1100,1102,1104-1108,1110-1114,1117,1119,1121-1124,1126,1130-1132,"
+        "1137-1138,1141,1145,1147-1149,1151-1152,1154,1163-1166,1169,1174-1175,1183,"
+        "1185-1187,1192,1198-1199,1201,1213,1216-1218,1233-1234,1236,1244,1247-1248,1259,"
+        "1271-1272,1277,1287,1296,1300-1301,1309-1311,1322,1328,1334,1352,1417,1433-1434,"
+        "1443,1455,1461,1494,1500-1501,1503,1521,1524,1533,1556,1580,1583,1594,1600,1641,"
+        "1658,1666,1687-1688,1700,1717-1721,1723,1755,1761,1782-1783,1801,1805,1812,"
+        "1839-1840,1862-1864,1875,1900,1914,1935,1947,1971-1972,1974,1984,1998-2010,2013,"
+        "2020-2022,2030,2033-2035,2038,2040-2043,2045-2049,2065,2068,2099-2100,2103,"
+        "2105-2107,2111,2119,2121,2126,2135,2144,2160-2161,2170,2179,2190-2191,2196,2200,"
+        "2222,2251,2260,2288,2301,2323,2366,2381-2383,2393-2394,2399,2401,2492,2500,2522,"
+        "2525,2557,2601-2602,2604-2605,2607-2608,2638,2701-2702,2710,2717-2718,2725,2800,"
+        "2809,2811,2869,2875,2909-2910,2920,2967-2968,2998,3000-3001,3003,3005-3007,3011,"
+        "3013,3017,3030-3031,3052,3071,3077,3128,3168,3211,3221,3260-3261,3268-3269,3283,"
+        "3300-3301,3306,3322-3325,3333,3351,3367,3369-3372,3389-3390,3404,3476,3493,3517,"
+        "3527,3546,3551,3580,3659,3689-3690,3703,3737,3766,3784,3800-3801,3809,3814,"
+        "3826-3828,3851,3869,3871,3878,3880,3889,3905,3914,3918,3920,3945,3971,3986,3995,"
+        "3998,4000-4006,4045,4111,4125-4126,4129,4224,4242,4279,4321,4343,4443-4446,4449,"
+        "4550,4567,4662,4848,4899-4900,4998,5000-5004,5009,5030,5033,5050-5051,5054,"
+        "5060-5061,5080,5087,5100-5102,5120,5190,5200,5214,5221-5222,5225-5226,5269,5280,"
+        "5298,5357,5405,5414,5431-5432,5440,5500,5510,5544,5550,5555,5560,5566,5631,5633,"
+        "5666,5678-5679,5718,5730,5800-5802,5810-5811,5815,5822,5825,5850,5859,5862,5877,"
+        "5900-5904,5906-5907,5910-5911,5915,5922,5925,5950,5952,5959-5963,5987-5989,"
+        "5998-6007,6009,6025,6059,6100-6101,6106,6112,6123,6129,6156,6346,6389,6502,6510,"
+        "6543,6547,6565-6567,6580,6646,6666-6669,6689,6692,6699,6779,6788-6789,6792,6839,"
+        "6881,6901,6969,7000-7002,7004,7007,7019,7025,7070,7100,7103,7106,7200-7201,7402,"
+        "7435,7443,7496,7512,7625,7627,7676,7741,7777-7778,7800,7911,7920-7921,7937-7938,"
+        "7999-8002,8007-8011,8021-8022,8031,8042,8045,8080-8090,8093,8099-8100,8180-8181,"
+        "8192-8194,8200,8222,8254,8290-8292,8300,8333,8383,8400,8402,8443,8500,8600,8649,"
+        "8651-8652,8654,8701,8800,8873,8888,8899,8994,9000-9003,9009-9011,9040,9050,9071,"
+        "9080-9081,9090-9091,9099-9103,9110-9111,9200,9207,9220,9290,9415,9418,9485,9500,"
+        "9502-9503,9535,9575,9593-9595,9618,9666,9876-9878,9898,9900,9917,9929,9943-9944,"
+        "9968,9998-10004,10009-10010,10012,10024-10025,10082,10180,10215,10243,10566,"
+        "10616-10617,10621,10626,10628-10629,10778,11110-11111,11967,12000,12174,12265,"
+        "12345,13456,13722,13782-13783,14000,14238,14441-14442,15000,15002-15004,15660,"
+        "15742,16000-16001,16012,16016,16018,16080,16113,16992-16993,17877,17988,18040,"
+        "18101,18988,19101,19283,19315,19350,19780,19801,19842,20000,20005,20031,"
+        "20221-20222,20828,21571,22939,23502,24444,24800,25734-25735,26214,27000,"
+        "27352-27353,27355-27356,27715,28201,30000,30718,30951,31038,31337,32768-32785,"
+        "33354,33899,34571-34573,35500,38292,40193,40911,41511,42510,44176,44442-44443,"
+        "44501,45100,48080,49152-49161,49163,49165,49167,49175-49176,49400,49999-50003,"
+        "50006,50300,50389,50500,50636,50800,51103,51493,52673,52822,52848,52869,54045,"
+        "54328,55055-55056,55555,55600,56737-56738,57294,57797,58080,60020,60443,61532,"
+        "61900,62078,63331,64623,64680,65000,65129,65389"
+    )
+    
+    # Backoff for local resource errors: LOCAL_BACKOFF, doubling, LOCAL_RETRIES times
+    LOCAL_RETRIES = 4
+    LOCAL_BACKOFF = 0.05
+    
+    # Ports where the server waits for the client to speak first
+    HTTP_PORTS = {80, 81, 591, 3000, 5000, 8000, 8008, 8080, 8081, 8088, 8888, 9000, 9090}
+    
+    PRODUCT_PATTERNS = (
+        re.compile(r"^SSH-[\d.]+-(?P<product>[A-Za-z]+)[_-](?P<version>[\w.]+)"),
+        re.compile(r"^Server:\s*(?P<product>[^/\s\r\n]+)(?:/(?P<version>[\w.]+))?", re.I | re.M),
+        re.compile(r"^220[ -].*?(?P<product>Postfix|Exim|Sendmail|ProFTPD|vsFTPd|Pure-FTPd|FileZilla)"
+                   r"(?:[ /](?P<version>[\d.]+\w*))?", re.I),
+    )
+    
+    def __init__(self, ports=None, concurrency=None, per_host=None, timeout=None, banners=None):
+        """
+        Initialize port scanner
+        ports: port spec ('top100', 'top1000', '22,80,8000-8100') or list of ints
+        concurrency: global cap on connection attempts in flight
+        per_host: cap on attempts in flight against a single host
+        timeout: connect timeout in seconds
+        banners: grab service banners from open ports
+        """
+        self.ports = self.parse_ports(ports or Config.PORTSCAN_PORTS)
+        self.concurrency = max(1, concurrency or Config.PORTSCAN_CONCURRENCY)
+        self.per_host = max(1, per_host or Config.PORTSCAN_PER_HOST)
+        self.timeout = timeout or Config.PORTSCAN_TIMEOUT
+        self.banners = Config.PORTSCAN_BANNERS if banners is None else banners
+        self.stats = {
+            "hosts": 0,
+            "attempts": 0,
+            "open": 0,
+            "unscanned": 0,
+            "elapsed": 0.0,
+            "attempts_per_second": 0.0
+        }
+        
+        # Attempts in flight across every scan on this scanner (created on first scan)
+        self._slots = None
+        
+        self._raise_fd_limit(self.concurrency + 256)
+    
+    @classmethod
+    def for_running_loop(cls):
+        """Return the scanner (with Config defaults) bound to the running event loop"""
+        loop = asyncio.get_running_loop()
+        scanner = cls._instances.get(loop)
+        
+        if scanner is None:
+            scanner = cls()
+            cls._instances[loop] = scanner
+        
+        return scanner
+    
+    @classmethod
+    def parse_ports(cls, spec):
+        """Turn a port spec into a sorted list of unique ports"""
+        if isinstance(spec, (list, tuple, set)):
+            return sorted({int(port) for port in spec})
+        
+        spec = {"top100": cls.TOP_100, "top1000": cls.TOP_1000}.get(spec.strip().lower(), spec)
+        ports = set()
+        
+        for part in spec.split(","):
+            part = part.strip()
+            if not part:
+                continue
+            
+            first, _, last = part.partition("-")
+            first, last = int(first), int(last or first)
+            if not 0 < first <= last <= 65535:
+                raise ValueError(f"Invalid port range: {part}")
+            
+            ports.update(range(first, last + 1))
+        
+        return sorted(ports)
+    
+    @staticmethod
+    def _raise_fd_limit(needed):
+        """Lift the soft open-file limit towards `needed` where the OS allows it"""
+        if not RESOURCE_AVAILABLE:
+            return
+        
+        try:
+            soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+            if soft != resource.RLIM_INFINITY and soft < needed:
+                target = needed if hard == resource.RLIM_INFINITY else min(needed, hard)
+                resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+        except (ValueError, OSError) as e:
+            logger.debug(f"Could not raise open-file limit: {str(e)}")
+    
+    @staticmethod
+    def _service_name(port):
+        """Well-known service name for a port, if the OS knows one"""
+        try:
+            return socket.getservbyport(port, "tcp")
+        except OSError:
+            return None
+    
+    @classmethod
+    def _identify(cls, banner):
+        """Best-effort (product, version) from a banner"""
+        for pattern in cls.PRODUCT_PATTERNS:
+            match = pattern.search(banner)
+            if match:
+                return match.group("product"), match.group("version")
+        return None, None
+    
+    async def _grab_banner(self, reader, writer, host, port):
+        """Read whatever the service sends first, nudging HTTP servers with a HEAD request"""
+        try:
+            data = b""
+            if port not in self.HTTP_PORTS:
+                data = await asyncio.wait_for(reader.read(1024), Config.PORTSCAN_BANNER_TIMEOUT)
+            
+            if not data:
+                writer.write(f"HEAD / HTTP/1.0\r\nHost: {host}\r\n\r\n".encode())
+                await writer.drain()
+                data = await asyncio.wait_for(reader.read(1024), Config.PORTSCAN_BANNER_TIMEOUT)
+            
+            return data.decode("utf-8", errors="replace").strip() or None
+        
+        except (asyncio.TimeoutError, OSError):
+            return None
+    
+    @staticmethod
+    async def resolve(host):
+        """Resolve a host once to (family, address) for raw connects"""
+        if Utils.validate_ip(host):
+            return socket.AF_INET, host
+        
+        loop = asyncio.get_running_loop()
+        infos = await loop.getaddrinfo(host, None, type=socket.SOCK_STREAM)
+        family, _, _, _, sockaddr = infos[0]
+        return family, sockaddr[0]
+    
+    async def _connect(self, family, address, port):
+        """
+        Non-blocking TCP connect; returns the connected socket or None
+        Driven by a writer callback and a timer rather than a task per attempt,
+        which keeps closed and filtered ports cheap. Raises OSError for
+        LOCAL_ERRORS, which say nothing about the port
+        """
+        loop = asyncio.get_running_loop()
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        sock.setblocking(False)
+        
+        try:
+            error = sock.connect_ex((address, port))
+            
+            if error in (errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EAGAIN):
+                try:
+                    error = await self._wait_connected(loop, sock)
+                except NotImplementedError:
+                    # Proactor loops (Windows) have no add_writer
+                    try:
+                        await asyncio.wait_for(loop.sock_connect(sock, (address, port)), self.timeout)
+                        error = 0
+                    except (asyncio.TimeoutError, OSError):
+                        error = errno.ETIMEDOUT
+        
+        except BaseException:
+            sock.close()
+            raise
+        
+        if error:
+            sock.close()
+            if error in LOCAL_ERRORS:
+                raise OSError(error, os.strerror(error))
+            return None
+        
+        return sock
+    
+    async def _wait_connected(self, loop, sock):
+        """Wait until a pending connect completes or times out; returns its errno"""
+        future = loop.create_future()
+        
+        def on_writable():
+            if not future.done():
+                future.set_result(sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR))
+        
+        def on_timeout():
+            if not future.done():
+                future.set_result(errno.ETIMEDOUT)
+        
+        loop.add_writer(sock.fileno(), on_writable)
+        timer = loop.call_later(self.timeout, on_timeout)
+        
+        try:
+            return await future
+        finally:
+            timer.cancel()
+            loop.remove_writer(sock.fileno())
+    
+    async def probe(self, host, port, address=None):
+        """
+        Try one TCP connect; returns a Shodan-style service dict if the port is open
+        address: pre-resolved (family, ip) from resolve(), to skip the lookup
+        Raises OSError if local resources stay exhausted after LOCAL_RETRIES
+        """
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.concurrency)
+        
+        async with self._slots:
+            return await self._probe(host, port, address)
+    
+    async def _probe(self, host, port, address):
+        """probe() once it holds a global slot"""
+        self.stats["attempts"] += 1
+        
+        try:
+            family, ip = address or await self.resolve(host)
+        except OSError:
+            return None
+        
+        for attempt in range(self.LOCAL_RETRIES + 1):
+            try:
+                sock = await self._connect(family, ip, port)
+                break
+            except OSError as e:
+                if e.errno not in LOCAL_ERRORS:
+                    return None
+                if attempt == self.LOCAL_RETRIES:
+                    raise
+                # Wait for other attempts to release their sockets
+                await asyncio.sleep(self.LOCAL_BACKOFF * 2 ** attempt)
+        
+        if sock is None:
+            return None
+        
+        banner = None
+        if self.banners:
+            try:
+                reader, writer = await asyncio.open_connection(sock=sock)
+            except OSError:
+                sock.close()
+            else:
+                try:
+                    banner = await self._grab_banner(reader, writer, host, port)
+                finally:
+                    writer.close()
+        else:
+            sock.close()
+        
+        product, version = self._identify(banner) if banner else (None, None)
+        self.stats["open"] += 1
+        
+        return {
+            "port": port,
+            "protocol": self._service_name(port),
+            "product": product,
+            "version": version,
+            "banner": banner[:100] if banner else None
+        }
+    
+    @staticmethod
+    def _empty_result(host):
+        """Result skeleton matching IPRecon's Shodan data"""
+        return {
+            "ip": host,
+            "open_ports": [],
+            "services": [],
+            "vulnerabilities": [],
+            "hostnames": [],
+            "error": None
+        }
+    
+    async def scan_host(self, host, ports=None):
+        """Scan a single host and return its open ports and services"""
+        results = [result async for result in self.scan_many([host], ports)]
+        return results[0] if results else self._empty_result(host)
+    
+    async def scan_many(self, hosts, ports=None):
+        """
+        Async generator scanning every host over the port list
+        Yields one result per host as soon as all of its ports are done;
+        hosts are pulled lazily, so large CIDR expansions stay cheap
+        """
+        ports = self.parse_ports(ports) if ports else self.ports
+        if not ports:
+            raise ValueError("No ports to scan")
+        
+        started = time.monotonic()
+        
+        host_iter = iter(hosts)
+        window_size = max(1, self.concurrency // self.per_host)
+        window = []
+        state = {}
+        finished = asyncio.Queue()
+        
+        def work():
+            # Round-robin across a window of hosts so no single host takes every slot
+            while True:
+                while len(window) < window_size:
+                    host = next(host_iter, None)
+                    if host is None:
+                        break
+                    if host in state:
+                        continue
+                    
+                    self.stats["hosts"] += 1
+                    state[host] = {
+                        "result": self._empty_result(host),
+                        "remaining": len(ports),
+                        "unscanned": 0,
+                        "reason": None,
+                        "limit": asyncio.Semaphore(self.per_host),
+                        "address": asyncio.ensure_future(self.resolve(host))
+                    }
+                    window.append([host, iter(ports)])
+                
+                if not window:
+                    return
+                
+                for entry in list(window):
+                    port = next(entry[1], None)
+                    if port is None:
+                        window.remove(entry)
+                    else:
+                        yield entry[0], port
+        
+        pairs = work()
+        
+        async def worker():
+            for host, port in pairs:
+                host_state = state[host]
+                
+                try:
+                    address = await host_state["address"]
+                except OSError as e:
+                    # Unresolvable host: every remaining port completes as closed
+                    host_state["result"]["error"] = f"Could not resolve host: {str(e)}"
+                    service = None
+                else:
+                    async with host_state["limit"]:
+                        try:
+                            service = await self.probe(host, port, address)
+                        except OSError as e:
+                            # Out of local resources: unknown, not closed
+                            host_state["unscanned"] += 1
+                            host_state["reason"] = e.strerror or str(e)
+                            self.stats["unscanned"] += 1
+                            service = None
+                
+                if service is not None:
+                    host_state["result"]["open_ports"].append(port)
+                    host_state["result"]["services"].append(service)
+                
+                host_state["remaining"] -= 1
+                if host_state["remaining"] == 0:
+                    result = state.pop(host)["result"]
+                    if host_state["unscanned"]:
+                        result["error"] = (
+                            f"{host_state['unscanned']} of {len(ports)} port(s) not scanned: "
+                            f"{host_state['reason']}"
+                        )
+                    result["open_ports"].sort()
+                    result["services"].sort(key=lambda service: service["port"])
+                    finished.put_nowait(result)
+        
+        # A known handful of hosts needs no more workers than their per-host caps allow
+        workers = self.concurrency
+        if isinstance(hosts, (list, tuple, set)):
+            workers = min(workers, len(hosts) * min(self.per_host, len(ports)))
+        
+        async def supervise():
+            try:
+                await asyncio.gather(*(worker() for _ in range(max(1, workers))))
+            finally:
+                finished.put_nowait(None)
+        
+        supervisor = asyncio.ensure_future(supervise())
+        
+        try:
+            while True:
+                result = await finished.get()
+                if result is None:
+                    break
+                yield result
+            
+            await supervisor
+        
+        finally:
+            supervisor.cancel()
+            
+            self.stats["elapsed"] = round(time.monotonic() - started, 3)
+            if self.stats["elapsed"] > 0:
+                self.stats["attempts_per_second"] = round(
+                    self.stats["attempts"] / self.stats["elapsed"], 1
+                )
+            
+            # Cumulative for a shared scanner, which runs once per scanned IP
+            logger.debug(
+                f"Port scan: {self.stats['hosts']} host(s), {self.stats['open']} open port(s), "
+                f"{self.stats['attempts']} attempts, {self.stats['unscanned']} unscanned, "
+                f"in {self.stats['elapsed']}s"
+            )
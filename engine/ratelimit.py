@@ -0,0 +1,317 @@
+"""
+ShadowRecon Rate Limiter
+Token bucket per upstream API host, honoring Retry-After
+"""
+
+import asyncio
+import sqlite3
+import threading
+import time
+import logging
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+from config import Config
+from utils import Utils
+
+logger = logging.getLogger("ShadowRecon")
+
+class TokenBucket:
+    """
+    Classic token bucket
+    Holds up to `capacity` tokens and refills at rate/per tokens per second.
+    Callers only wait when the bucket is empty or a Retry-After is in force
+    """
+    
+    def __init__(self, rate, per, capacity=None):
+        self.rate = rate
+        self.per = per
+        self.capacity = capacity or rate
+        self.fill_rate = rate / per
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+    
+    def _refill(self, now):
+        """Add tokens earned since the last update"""
+        elapsed = now - self.updated
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.fill_rate)
+        self.updated = now
+    
+    def try_acquire(self):
+        """
+        Take a token if one is available
+        Returns 0 on success, otherwise the seconds to wait before retrying
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            
+            if now < self.blocked_until:
+                return self.blocked_until - now
+            
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0
+            
+            return (1 - self.tokens) / self.fill_rate
+    
+    async def acquire(self):
+        """Wait asynchronously until a token is available, then take it"""
+        while True:
+            wait = self.try_acquire()
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+    
+    def penalize(self, seconds):
+        """Block the bucket for `seconds` and drain it (server asked us to back off)"""
+        with self._lock:
+            now = time.monotonic()
+            self.blocked_until = max(self.blocked_until, now + seconds)
+            self.tokens = 0.0
+            self.updated = now
+
+class SharedTokenBucket(TokenBucket):
+    """
+    Token bucket stored in a SQLite table
+    Every process opening the same database file draws from one budget, so
+    a fleet of workers stays within an API's limit instead of multiplying
+    it, and a Retry-After seen by one worker pauses them all. Tokens are
+    leased from the table in blocks of up to Config.RATE_LIMIT_LEASE_TOKENS
+    (a quarter of the capacity at most) and spent locally, so most requests
+    never touch the database; a block not spent within the time it takes
+    to refill is dropped. Database transactions run in the executor, one
+    lease at a time per event loop, never on the loop thread
+    """
+    
+    def __init__(self, path, host, rate, per, capacity=None):
+        super().__init__(rate, per, capacity)
+        self.host = host
+        self.lease_size = max(1, min(Config.RATE_LIMIT_LEASE_TOKENS, int(self.capacity // 4)))
+        self.leased = 0
+        self.lease_expires = 0.0
+        self.stats = {"taken": 0, "leases": 0}
+        # Guards the local pool only; self._lock is held across database transactions
+        self._pool_lock = threading.Lock()
+        self._leasing = None
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_buckets ("
+            "host TEXT PRIMARY KEY, "
+            "tokens REAL NOT NULL, "
+            "updated REAL NOT NULL, "
+            "blocked_until REAL NOT NULL)"
+        )
+    
+    def _update(self, change):
+        """Run change(tokens, blocked_until, now) -> (tokens, blocked_until, result) in one transaction"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                row = self._conn.execute(
+                    "SELECT tokens, updated, blocked_until FROM rate_buckets WHERE host = ?",
+                    (self.host,)
+                ).fetchone()
+                
+                tokens, updated, blocked_until = row if row else (float(self.capacity), now, 0.0)
+                tokens = min(self.capacity, tokens + max(0.0, now - updated) * self.fill_rate)
+                tokens, blocked_until, result = change(tokens, blocked_until, now)
+                
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO rate_buckets (host, tokens, updated, blocked_until) "
+                    "VALUES (?, ?, ?, ?)",
+                    (self.host, tokens, now, blocked_until)
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        
+        return result
+    
+    def _take_leased(self):
+        """
+        Spend a locally leased token without touching the database
+        Returns 0 on success, the seconds to wait while blocked, or None
+        when the local pool is empty
+        """
+        with self._pool_lock:
+            now = time.time()
+            
+            if now < self.blocked_until:
+                return self.blocked_until - now
+            
+            if self.leased >= 1 and now < self.lease_expires:
+                self.leased -= 1
+                self.stats["taken"] += 1
+                return 0
+            
+            return None
+    
+    def _lease(self):
+        """
+        Move a block of tokens from the shared budget into the local pool
+        Returns 0 if tokens were leased, otherwise the seconds to wait
+        """
+        def lease(tokens, blocked_until, now):
+            if now < blocked_until:
+                return tokens, blocked_until, (blocked_until - now, 0, blocked_until)
+            
+            count = min(self.lease_size, int(tokens))
+            if count >= 1:
+                return tokens - count, blocked_until, (0, count, blocked_until)
+            
+            return tokens, blocked_until, ((1 - tokens) / self.fill_rate, 0, blocked_until)
+        
+        wait, count, blocked_until = self._update(lease)
+        
+        with self._pool_lock:
+            self.blocked_until = blocked_until
+            if count:
+                # Leftovers from an expired lease are not carried over
+                self.leased = count
+                self.lease_expires = time.time() + count / self.fill_rate
+                self.stats["leases"] += 1
+        
+        return wait
+    
+    def try_acquire(self):
+        """Take a token from the shared budget; 0 on success, else seconds to wait (blocking)"""
+        while True:
+            wait = self._take_leased()
+            if wait is not None:
+                return wait
+            
+            wait = self._lease()
+            if wait > 0:
+                return wait
+    
+    async def acquire(self):
+        """Wait until a token is available, leasing more off the event loop when the pool runs dry"""
+        while True:
+            wait = self._take_leased()
+            if wait == 0:
+                return
+            
+            if wait is None:
+                # One lease in flight per loop; concurrent callers share its outcome
+                loop = asyncio.get_running_loop()
+                leasing = self._leasing
+                
+                if leasing is None or leasing.done() or leasing.get_loop() is not loop:
+                    leasing = asyncio.ensure_future(Utils.run_blocking(self._lease))
+                    self._leasing = leasing
+                
+                wait = await asyncio.shield(leasing)
+                if wait <= 0:
+                    # Tokens are in the local pool now; take one
+                    continue
+            
+            await asyncio.sleep(wait)
+    
+    def penalize(self, seconds):
+        """Block and drain the bucket for every process sharing it (blocking)"""
+        blocked_until = self._update(
+            lambda tokens, blocked_until, now: (0.0, max(blocked_until, now + seconds), max(blocked_until, now + seconds))
+        )
+        
+        with self._pool_lock:
+            self.blocked_until = blocked_until
+            self.leased = 0
+
+class RateLimiter:
+    """Registry of token buckets, one per upstream host configured in Config.RATE_LIMITS"""
+    
+    _buckets = {}
+    _lock = threading.Lock()
+    
+    # SQLite file holding budgets shared between processes (None: per process)
+    shared_path = None
+    
+    @classmethod
+    def configure(cls, shared_path=None):
+        """Share rate limits with every process using shared_path (None: in-memory buckets)"""
+        with cls._lock:
+            cls.shared_path = shared_path
+            cls._buckets = {}
+    
+    @staticmethod
+    def key_for(url):
+        """
+        Rate limit key for a URL: the longest "host/path" entry in
+        Config.RATE_LIMITS whose path prefixes the URL's, else the host
+        (ip-api allows 45 single lookups but only 15 /batch POSTs a minute)
+        """
+        parsed = urlparse(url)
+        host = parsed.hostname
+        key = host
+        
+        for candidate in Config.RATE_LIMITS:
+            if not host or not candidate.startswith(host + "/") or len(candidate) <= len(key):
+                continue
+            
+            prefix = candidate[len(host):].rstrip("/")
+            if parsed.path == prefix or parsed.path.startswith(prefix + "/"):
+                key = candidate
+        
+        return key
+    
+    @classmethod
+    def bucket_for(cls, host):
+        """Return the bucket for a host, or None if the host is not rate limited"""
+        if not host or host not in Config.RATE_LIMITS:
+            return None
+        
+        with cls._lock:
+            bucket = cls._buckets.get(host)
+            if bucket is None:
+                rate, per = Config.RATE_LIMITS[host]
+                if cls.shared_path:
+                    bucket = SharedTokenBucket(cls.shared_path, host, rate, per)
+                else:
+                    bucket = TokenBucket(rate, per)
+                cls._buckets[host] = bucket
+            return bucket
+    
+    @classmethod
+    async def acquire(cls, host):
+        """Wait for permission to send one request to host"""
+        bucket = cls.bucket_for(host)
+        if bucket is not None:
+            await bucket.acquire()
+    
+    @classmethod
+    async def penalize(cls, host, retry_after=None):
+        """Back off a host after a 429, using the Retry-After header when present"""
+        seconds = cls.parse_retry_after(retry_after)
+        
+        bucket = cls.bucket_for(host)
+        if bucket is None:
+            return
+        
+        if seconds is None:
+            seconds = bucket.per / bucket.rate
+        
+        # Shared buckets write to their database; keep that off the event loop
+        await Utils.run_blocking(bucket.penalize, seconds)
+        logger.warning(f"Rate limited by {host}, backing off {seconds:.1f}s")
+    
+    @staticmethod
+    def parse_retry_after(value):
+        """Parse a Retry-After header (delta-seconds or HTTP-date) into seconds"""
+        if not value:
+            return None
+        
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        
+        try:
+            retry_at = parsedate_to_datetime(value)
+            return max(0.0, retry_at.timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
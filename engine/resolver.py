@@ -0,0 +1,354 @@
+"""
+ShadowRecon DNS Engine
+Asyncio DNS resolution with concurrent record queries and a TTL-aware answer cache
+"""
+
+import asyncio
+import random
+import secrets
+import time
+import logging
+import weakref
+from collections import OrderedDict
+from config import Config
+
+try:
+    import dns.asyncquery
+    import dns.exception
+    import dns.flags
+    import dns.message
+    import dns.rcode
+    import dns.rdatatype
+    import dns.resolver
+    DNS_AVAILABLE = True
+except ImportError:
+    DNS_AVAILABLE = False
+
+logger = logging.getLogger("ShadowRecon")
+
+class DNSLookupError(Exception):
+    """A lookup got no usable answer (timeout, SERVFAIL, socket error), as opposed to NXDOMAIN"""
+
+class _UDPChannel(asyncio.DatagramProtocol):
+    """
+    One UDP socket to one nameserver, multiplexing many queries by message ID
+    Avoids opening a fresh socket for every query, which is what limits
+    stock resolvers once thousands of lookups are in flight. A channel is
+    retired after Config.DNS_SOCKET_QUERIES queries, so source ports keep
+    changing (see DNSEngine._channel)
+    """
+    
+    def __init__(self):
+        self.transport = None
+        self.pending = {}
+        self.uses = 0
+        self.retired = False
+    
+    def connection_made(self, transport):
+        self.transport = transport
+    
+    def datagram_received(self, data, addr):
+        if len(data) < 2:
+            return
+        
+        future = self.pending.pop(int.from_bytes(data[:2], 'big'), None)
+        if future is not None and not future.done():
+            future.set_result(data)
+    
+    def error_received(self, exc):
+        logger.debug(f"DNS socket error: {str(exc)}")
+    
+    def connection_lost(self, exc):
+        for future in self.pending.values():
+            if not future.done():
+                future.set_exception(exc or ConnectionError("DNS socket closed"))
+        self.pending.clear()
+    
+    async def exchange(self, query, timeout):
+        """Send a query and wait for the matching response bytes"""
+        loop = asyncio.get_running_loop()
+        
+        # Unpredictable IDs: together with the source port they are what a spoofed reply must guess
+        query_id = secrets.randbits(16)
+        while query_id in self.pending:
+            query_id = secrets.randbits(16)
+        
+        query.id = query_id
+        future = loop.create_future()
+        self.pending[query_id] = future
+        
+        try:
+            self.transport.sendto(query.to_wire())
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            self.pending.pop(query_id, None)
+            if self.retired and not self.pending:
+                self.transport.close()
+
+class DNSEngine:
+    """
+    Shared asynchronous resolver
+    Queries go out over pooled UDP sockets (TCP only for truncated answers).
+    Every answer (including NXDOMAIN/no-data) is cached in-process for the
+    record's TTL, so DomainRecon, EmailRecon and subdomain enumeration never
+    ask upstream the same question twice while the answer is still valid.
+    Failed lookups raise DNSLookupError and are not cached
+    """
+    
+    RECORD_TYPES = ("A", "AAAA", "MX", "NS", "TXT", "CNAME", "SOA", "CAA")
+    
+    _default = None
+    
+    def __init__(self, nameservers=None, port=None, timeout=None):
+        """
+        Initialize DNS engine
+        nameservers: list of upstream resolver IPs (defaults to Config.DNS_RESOLVERS,
+                     then the system configuration)
+        port: upstream port, useful for pointing at a local stub server
+        timeout: per-query lifetime in seconds
+        """
+        if not DNS_AVAILABLE:
+            raise RuntimeError("dnspython package not installed")
+        
+        nameservers = nameservers or Config.DNS_RESOLVERS
+        
+        if not nameservers:
+            # Fall back to the system resolver configuration
+            try:
+                nameservers = dns.resolver.Resolver(configure=True).nameservers
+            except dns.resolver.NoResolverConfiguration:
+                nameservers = ["1.1.1.1", "8.8.8.8"]
+        
+        self.nameservers = [str(ns) for ns in nameservers]
+        self.port = port or Config.DNS_PORT
+        self.timeout = timeout or Config.DNS_TIMEOUT
+        
+        self._channels = weakref.WeakKeyDictionary()
+        self._cache = OrderedDict()
+        self.stats = {"queries": 0, "cache_hits": 0, "failures": 0}
+    
+    @classmethod
+    def default(cls):
+        """Return the process-wide engine, creating it on first use"""
+        if cls._default is None:
+            cls._default = cls()
+        return cls._default
+    
+    @classmethod
+    def close_default(cls):
+        """Close the default engine's sockets for the running event loop"""
+        if cls._default is not None:
+            cls._default.close()
+    
+    async def _channel(self, nameserver):
+        """
+        Return a UDP channel to a nameserver for the running loop
+        Each nameserver has Config.DNS_SOCKETS_PER_SERVER sockets, each on its
+        own OS-chosen ephemeral port; a query picks one at random and a socket
+        is replaced after Config.DNS_SOCKET_QUERIES queries. A spoofed reply
+        has to guess the port as well as the 16-bit query ID, as with a stub
+        resolver's socket per query, without paying for a socket per query
+        """
+        loop = asyncio.get_running_loop()
+        channels = self._channels.setdefault(loop, {})
+        slots = channels.setdefault(nameserver, [None] * max(1, Config.DNS_SOCKETS_PER_SERVER))
+        slot = secrets.randbelow(len(slots))
+        opening = slots[slot]
+        
+        if opening is None or (opening.done() and not self._usable(opening)):
+            # Share the opening future so concurrent first queries reuse one socket
+            opening = asyncio.ensure_future(self._open_channel(nameserver))
+            slots[slot] = opening
+        
+        channel = await asyncio.shield(opening)
+        channel.uses += 1
+        
+        if channel.uses >= Config.DNS_SOCKET_QUERIES and slots[slot] is opening:
+            # The next query on this slot opens a socket on a new port; this one
+            # closes once its last pending query is answered
+            slots[slot] = None
+            channel.retired = True
+        
+        return channel
+    
+    async def _open_channel(self, nameserver):
+        """Open a connected UDP socket to a nameserver"""
+        loop = asyncio.get_running_loop()
+        _, channel = await loop.create_datagram_endpoint(
+            _UDPChannel, remote_addr=(nameserver, self.port)
+        )
+        return channel
+    
+    @staticmethod
+    def _usable(opening):
+        """True if a finished channel future holds an open socket"""
+        if opening.cancelled() or opening.exception() is not None:
+            return False
+        return not opening.result().transport.is_closing()
+    
+    async def _exchange(self, name, rdtype):
+        """
+        Send one query, rotating through nameservers on timeout or SERVFAIL
+        Returns the response message; raises DNSLookupError if every attempt failed
+        """
+        query = dns.message.make_query(name, rdtype)
+        attempts = max(2, len(self.nameservers))
+        attempt_timeout = self.timeout / attempts
+        offset = random.randrange(len(self.nameservers))
+        failure = "timed out"
+        
+        for attempt in range(attempts):
+            nameserver = self.nameservers[(offset + attempt) % len(self.nameservers)]
+            
+            try:
+                channel = await self._channel(nameserver)
+                wire = await channel.exchange(query, attempt_timeout)
+                response = dns.message.from_wire(wire)
+                
+                if not query.is_response(response):
+                    continue
+                
+                if response.flags & dns.flags.TC:
+                    response = await dns.asyncquery.tcp(
+                        query, nameserver, timeout=attempt_timeout, port=self.port
+                    )
+            
+            except asyncio.TimeoutError:
+                failure = "timed out"
+                continue
+            
+            except (OSError, dns.exception.DNSException) as e:
+                failure = str(e) or type(e).__name__
+                continue
+            
+            if response.rcode() in (dns.rcode.NOERROR, dns.rcode.NXDOMAIN):
+                return response
+            
+            failure = dns.rcode.to_text(response.rcode())
+        
+        raise DNSLookupError(f"{rdtype} lookup for {name} failed: {failure}")
+    
+    @staticmethod
+    def _negative_ttl(response):
+        """Negative-caching TTL from the SOA in the authority section, if any"""
+        for rrset in response.authority:
+            if rrset.rdtype == dns.rdatatype.SOA:
+                return min(rrset.ttl, rrset[0].minimum, Config.DNS_MAX_TTL)
+        return Config.DNS_NEGATIVE_TTL
+    
+    def _cache_get(self, key):
+        """Return cached records for key if the TTL has not expired"""
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        
+        expires, records = entry
+        if time.monotonic() >= expires:
+            del self._cache[key]
+            return None
+        
+        self.stats["cache_hits"] += 1
+        return records
+    
+    def _cache_put(self, key, records, ttl):
+        """Store records, evicting the oldest entries past Config.DNS_CACHE_SIZE"""
+        if ttl <= 0:
+            return
+        
+        self._cache[key] = (time.monotonic() + ttl, records)
+        self._cache.move_to_end(key)
+        
+        while len(self._cache) > Config.DNS_CACHE_SIZE:
+            self._cache.popitem(last=False)
+    
+    async def query(self, name, rdtype="A"):
+        """
+        Resolve one record type for name
+        Returns a list of record strings, empty if the name or type does not
+        exist. Raises DNSLookupError when no nameserver gave an answer
+        (timeouts, SERVFAIL, REFUSED), so a failure never looks like NXDOMAIN
+        """
+        key = (name.lower().rstrip('.'), rdtype)
+        
+        records = self._cache_get(key)
+        if records is not None:
+            return list(records)
+        
+        self.stats["queries"] += 1
+        
+        try:
+            response = await self._exchange(name, rdtype)
+            
+            # Follows CNAME chains: keep every answer rrset of the asked-for type
+            wanted = dns.rdatatype.from_text(rdtype)
+            rrsets = [rrset for rrset in response.answer if rrset.rdtype == wanted]
+            
+            if rrsets:
+                records = [str(rdata) for rrset in rrsets for rdata in rrset]
+                ttl = min(min(rrset.ttl for rrset in rrsets), Config.DNS_MAX_TTL)
+            else:
+                records = []
+                ttl = self._negative_ttl(response)
+        
+        except DNSLookupError as e:
+            self.stats["failures"] += 1
+            logger.debug(str(e))
+            raise
+        
+        except Exception as e:
+            self.stats["failures"] += 1
+            logger.debug(f"DNS {rdtype} lookup error for {name}: {str(e)}")
+            raise DNSLookupError(f"{rdtype} lookup for {name} failed: {str(e)}") from e
+        
+        self._cache_put(key, records, ttl)
+        return list(records)
+    
+    async def resolve_all(self, name, rdtypes=None):
+        """
+        Query several record types for name concurrently; returns {rdtype: records}
+        Raises DNSLookupError if any of them failed
+        """
+        rdtypes = rdtypes or self.RECORD_TYPES
+        answers = await asyncio.gather(*(self.query(name, rdtype) for rdtype in rdtypes))
+        return dict(zip(rdtypes, answers))
+    
+    async def email_auth_records(self, domain, selectors=None):
+        """
+        Fetch DMARC and DKIM TXT records for a domain
+        DKIM is looked up under each selector in Config.DKIM_SELECTORS.
+        Raises DNSLookupError if any of them failed
+        """
+        selectors = selectors or Config.DKIM_SELECTORS
+        
+        dmarc, *dkim = await asyncio.gather(
+            self.query(f"_dmarc.{domain}", "TXT"),
+            *(self.query(f"{selector}._domainkey.{domain}", "TXT") for selector in selectors)
+        )
+        
+        return {
+            "dmarc": dmarc,
+            "dkim": {
+                selector: records
+                for selector, records in zip(selectors, dkim) if records
+            }
+        }
+    
+    def clear_cache(self):
+        """Drop all cached answers"""
+        self._cache.clear()
+    
+    def close(self):
+        """Close this engine's sockets for the running event loop"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        
+        for slots in self._channels.pop(loop, {}).values():
+            for opening in slots:
+                if opening is None:
+                    continue
+                if not opening.done():
+                    opening.cancel()
+                elif self._usable(opening):
+                    opening.result().transport.close()
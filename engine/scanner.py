@@ -0,0 +1,238 @@
+"""
+ShadowRecon Bulk Scanner
+Stream large target lists through the recon modules with bounded concurrency
+"""
+
+import asyncio
+import sys
+import time
+import logging
+from config import Config
+from utils import Utils
+from .cache import ResultCache
+from .diff import diff_findings
+from .history import ScanHistory
+from .targets import TargetExpander
+
+logger = logging.getLogger("ShadowRecon")
+
+class BulkScanner:
+    """Run mixed domain/IP/email targets through a bounded-concurrency scheduler"""
+    
+    def __init__(self, framework, concurrency=None, incremental=False, journal=None):
+        """
+        Initialize bulk scanner
+        framework: ShadowRecon instance whose recon_* methods do the work
+        concurrency: maximum number of targets in flight at once
+        incremental: compare each target with its last stored scan. Sources
+                     still fresh in the result cache (or shared through the
+                     pipeline) are reused instead of fetched, and each result
+                     carries the changes found and where each source came from
+        journal: CheckpointJournal; targets it has as done are skipped, and
+                 every finished target and lookup is recorded in it
+        """
+        self.framework = framework
+        self.concurrency = max(1, concurrency or Config.BULK_CONCURRENCY)
+        self.incremental = incremental
+        self.journal = journal
+        self.expander = TargetExpander()
+        self.stats = self.empty_stats()
+    
+    @staticmethod
+    def empty_stats():
+        """Fresh counters for a bulk run"""
+        return {
+            "submitted": 0,
+            "completed": 0,
+            "errors": 0,
+            "skipped": 0,
+            "duplicates": 0,
+            "resumed": 0,
+            "changed": 0,
+            "unchanged": 0,
+            "new": 0,
+            "sources_cached": 0,
+            "sources_fetched": 0,
+            "elapsed": 0.0,
+            "targets_per_second": 0.0
+        }
+    
+    @staticmethod
+    def read_targets(source):
+        """
+        Lazily yield targets from a file path, or stdin when source is '-'
+        Blank lines and '#' comments are ignored
+        """
+        handle = sys.stdin if source == "-" else open(source, 'r', encoding='utf-8')
+        
+        try:
+            for line in handle:
+                target = line.strip()
+                if target and not target.startswith('#'):
+                    yield target
+        finally:
+            if handle is not sys.stdin:
+                handle.close()
+    
+    async def scan(self, targets):
+        """
+        Scan an iterable of targets, yielding each result as soon as it finishes
+        targets may also be an async iterable (e.g. hosts streamed out of
+        subdomain enumeration); new targets are then scanned as they arrive.
+        CIDR blocks and ranges are expanded lazily and duplicate IPs dropped.
+        Targets are pulled from the iterable only as slots free up, so
+        arbitrarily large inputs are never held in memory at once
+        """
+        if hasattr(targets, "__aiter__"):
+            iterator = None
+            source = self.expander.expand_async(targets)
+            if self.journal is not None:
+                source = self.journal.unfinished_async(source)
+            source = source.__aiter__()
+        else:
+            iterator = self.expander.expand(targets)
+            if self.journal is not None:
+                iterator = self.journal.unfinished(iterator)
+            iterator = iter(iterator)
+            source = None
+        
+        pending = set()
+        feeder = None
+        exhausted = False
+        started = time.monotonic()
+        
+        try:
+            while True:
+                # Top up the in-flight window
+                while iterator is not None and not exhausted and len(pending) < self.concurrency:
+                    try:
+                        target = next(iterator)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    
+                    pending.add(self._submit(target))
+                
+                # Async sources are awaited alongside running scans
+                if source is not None and feeder is None and not exhausted and len(pending) < self.concurrency:
+                    feeder = asyncio.ensure_future(source.__anext__())
+                
+                waiting = pending | {feeder} if feeder is not None else pending
+                if not waiting:
+                    break
+                
+                done, _ = await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+                
+                if feeder is not None and feeder in done:
+                    done.discard(feeder)
+                    try:
+                        pending.add(self._submit(feeder.result()))
+                    except StopAsyncIteration:
+                        exhausted = True
+                    feeder = None
+                
+                for task in done:
+                    pending.discard(task)
+                    result = task.result()
+                    self._record(result)
+                    if self.journal is not None:
+                        self.journal.mark(result["target"], result["error"])
+                    yield result
+        
+        finally:
+            for task in pending:
+                task.cancel()
+            if feeder is not None:
+                feeder.cancel()
+            
+            self.stats["duplicates"] = self.expander.duplicates
+            if self.journal is not None:
+                self.stats["resumed"] = self.journal.stats["skipped"]
+            self.stats["elapsed"] = round(time.monotonic() - started, 3)
+            if self.stats["elapsed"] > 0:
+                self.stats["targets_per_second"] = round(
+                    self.stats["completed"] / self.stats["elapsed"], 2
+                )
+            
+            logger.info(
+                f"Bulk scan finished: {self.stats['completed']} target(s) in "
+                f"{self.stats['elapsed']}s ({self.stats['targets_per_second']} targets/s)"
+            )
+    
+    def _submit(self, target):
+        """Start scanning one target and return its task"""
+        self.stats["submitted"] += 1
+        return asyncio.ensure_future(self._scan_target(target))
+    
+    async def _scan_target(self, target):
+        """Classify a single target and dispatch it to the matching recon method"""
+        target_type = Utils.classify_target(target)
+        
+        result = {
+            "target": target,
+            "type": target_type,
+            "findings": None,
+            "error": None
+        }
+        
+        if self.journal is not None:
+            # Runs in this target's own task, so only its lookups are attributed to it
+            self.journal.bind(target)
+        
+        handlers = {
+            "domain": self.framework.recon_domain,
+            "ip": self.framework.recon_ip,
+            "email": self.framework.recon_email,
+        }
+        
+        if target_type not in handlers:
+            result["error"] = "Unrecognized target format"
+            return result
+        
+        try:
+            if self.incremental:
+                # Read the previous scan before recon_* stores the new one
+                history = ScanHistory.default()
+                previous = await Utils.run_blocking(history.latest, target, target_type)
+                trace = ResultCache.trace()
+            
+            findings = await handlers[target_type](target)
+            
+            result["findings"] = findings
+            if isinstance(findings, dict) and findings.get("error"):
+                result["error"] = findings["error"]
+            
+            elif self.incremental:
+                result["previous_scan"] = previous["scanned_at"] if previous else None
+                result["changes"] = diff_findings(previous["findings"], findings) if previous else None
+                result["sources"] = dict(trace)
+        
+        except Exception as e:
+            result["error"] = str(e)
+            logger.debug(f"Bulk scan error for {target}: {str(e)}")
+        
+        return result
+    
+    def _record(self, result):
+        """Update running counters for a finished target"""
+        self.tally(self.stats, result)
+    
+    @staticmethod
+    def tally(stats, result):
+        """Count a finished target's outcome into stats"""
+        if result["type"] is None:
+            stats["skipped"] += 1
+        elif result["error"]:
+            stats["errors"] += 1
+        elif "changes" in result:
+            if result["changes"] is None:
+                stats["new"] += 1
+            elif result["changes"]:
+                stats["changed"] += 1
+            else:
+                stats["unchanged"] += 1
+            
+            for outcome in result["sources"].values():
+                stats[f"sources_{outcome}"] += 1
+        
+        stats["completed"] += 1
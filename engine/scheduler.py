@@ -0,0 +1,211 @@
+"""
+ShadowRecon Request Scheduler
+Bounded fan-out of many small network jobs with per-host fairness
+"""
+
+import asyncio
+import logging
+import time
+from collections import defaultdict, deque
+from config import Config
+
+logger = logging.getLogger("ShadowRecon")
+
+class RequestScheduler:
+    """
+    Run jobs with a global concurrency cap, a per-host cap, a per-job timeout
+    and an overall deadline
+    
+    Jobs whose host is already at its cap are parked instead of holding a
+    global slot, and are handed to the next worker that finishes a job on
+    the same host. At most max_parked jobs wait like this; once that many
+    are parked, idle workers stop pulling from the job source until a parked
+    job gets a slot, so only running plus parked jobs are ever held in
+    memory. When the deadline passes, jobs still running (stragglers) are
+    cancelled and reported, so one slow site cannot hold up the rest
+    """
+    
+    def __init__(self, concurrency=None, per_host=None, timeout=None, deadline=None, max_parked=None):
+        """
+        concurrency: global cap on jobs in flight
+        per_host: cap on jobs in flight against one host
+        timeout: per-job timeout in seconds
+        deadline: seconds after which unfinished jobs are cancelled (None = no deadline)
+        max_parked: cap on jobs pulled but waiting for their host (default: concurrency)
+        """
+        self.concurrency = max(1, concurrency or Config.USERNAME_CONCURRENCY)
+        self.max_parked = max(1, max_parked or self.concurrency)
+        self.per_host = max(1, per_host or Config.USERNAME_PER_HOST)
+        self.timeout = timeout or Config.USERNAME_REQUEST_TIMEOUT
+        self.deadline = deadline
+        self.stats = {
+            "submitted": 0,
+            "completed": 0,
+            "timeouts": 0,
+            "errors": 0,
+            "cancelled": 0,
+            "parked": 0,
+            "parking_waits": 0,
+            "elapsed": 0.0,
+            "jobs_per_second": 0.0
+        }
+    
+    async def run(self, jobs):
+        """
+        Async generator over (key, result, error) tuples, in completion order
+        jobs: iterable of (key, host, factory), where factory() returns the
+        coroutine to run; pulled lazily
+        error is None on success, "timeout" when the job hit the per-job
+        timeout, "cancelled" when the deadline cut it off, or the exception text
+        """
+        source = iter(jobs)
+        parked = defaultdict(deque)
+        active = defaultdict(int)
+        running = {}
+        finished = asyncio.Queue()
+        started = time.monotonic()
+        state = {"parked": 0, "exhausted": False}
+        # Workers waiting for parking space; each freed space wakes one
+        waiting = deque()
+        
+        def take():
+            """
+            Next job whose host has room, parking the rest
+            None when the source is exhausted or parking is full
+            """
+            while state["parked"] < self.max_parked:
+                job = next(source, None)
+                if job is None:
+                    # Nothing left to pull: waiting workers can all finish
+                    state["exhausted"] = True
+                    wake(len(waiting))
+                    return None
+                
+                self.stats["submitted"] += 1
+                host = job[1]
+                
+                if active[host] < self.per_host:
+                    active[host] += 1
+                    return job
+                
+                parked[host].append(job)
+                state["parked"] += 1
+                self.stats["parked"] += 1
+            
+            return None
+        
+        async def next_job():
+            """take(), waiting while parking is full instead of pulling more jobs"""
+            while True:
+                job = take()
+                if job is not None or state["exhausted"]:
+                    return job
+                
+                # Every parked host has a worker on it, so a slot will come free
+                self.stats["parking_waits"] += 1
+                waiter = asyncio.get_running_loop().create_future()
+                waiting.append(waiter)
+                await waiter
+        
+        def wake(count):
+            """Resume up to count workers waiting for parking space"""
+            while waiting and count > 0:
+                waiter = waiting.popleft()
+                if not waiter.done():
+                    waiter.set_result(None)
+                    count -= 1
+        
+        def unpark():
+            """A parked job got a slot: let one waiting worker pull again"""
+            state["parked"] -= 1
+            wake(1)
+        
+        async def execute(key, factory):
+            try:
+                result = await asyncio.wait_for(factory(), self.timeout)
+                self.stats["completed"] += 1
+                return key, result, None
+            
+            except asyncio.TimeoutError:
+                self.stats["timeouts"] += 1
+                return key, None, "timeout"
+            
+            except Exception as e:
+                self.stats["errors"] += 1
+                return key, None, str(e) or type(e).__name__
+        
+        async def worker(number):
+            job = await next_job()
+            
+            while job is not None:
+                key, host, factory = job
+                running[number] = key
+                
+                try:
+                    finished.put_nowait(await execute(key, factory))
+                finally:
+                    running.pop(number, None)
+                
+                # Hand the host slot straight to a parked job for the same host
+                if parked[host]:
+                    job = parked[host].popleft()
+                    unpark()
+                    continue
+                
+                active[host] -= 1
+                job = await next_job()
+        
+        async def supervise():
+            workers = [asyncio.ensure_future(worker(n)) for n in range(self.concurrency)]
+            
+            try:
+                done, stragglers = await asyncio.wait(workers, timeout=self.deadline)
+                
+                if stragglers:
+                    # Snapshot before cancelling: workers clear their entry on the way out
+                    cut_off = list(running.values())
+                    cut_off += [job[0] for queue in parked.values() for job in queue]
+                    
+                    # Jobs never pulled from the source are cut off too, so every job is reported
+                    for job in source:
+                        self.stats["submitted"] += 1
+                        cut_off.append(job[0])
+                    
+                    logger.debug(f"Deadline reached, cancelling {len(cut_off)} straggling job(s)")
+                    
+                    for task in stragglers:
+                        task.cancel()
+                    await asyncio.gather(*stragglers, return_exceptions=True)
+                    
+                    for key in cut_off:
+                        self.stats["cancelled"] += 1
+                        finished.put_nowait((key, None, "cancelled"))
+                
+                for task in done:
+                    task.result()
+            
+            finally:
+                for task in workers:
+                    task.cancel()
+                finished.put_nowait(None)
+        
+        supervisor = asyncio.ensure_future(supervise())
+        
+        try:
+            while True:
+                item = await finished.get()
+                if item is None:
+                    break
+                yield item
+            
+            await supervisor
+        
+        finally:
+            supervisor.cancel()
+            
+            self.stats["elapsed"] = round(time.monotonic() - started, 3)
+            if self.stats["elapsed"] > 0:
+                self.stats["jobs_per_second"] = round(
+                    (self.stats["completed"] + self.stats["timeouts"] + self.stats["errors"])
+                    / self.stats["elapsed"], 1
+                )
@@ -0,0 +1,258 @@
+"""
+ShadowRecon Sharded Scanner
+Spread a bulk scan over worker processes, each with its own event loop
+"""
+
+import asyncio
+import json
+import multiprocessing
+import queue
+import threading
+import time
+import logging
+from config import Config
+from .http import HTTPClient
+from .resolver import DNSEngine
+from .scanner import BulkScanner
+from .singleflight import SingleFlight
+from .targets import TargetExpander
+
+logger = logging.getLogger("ShadowRecon")
+
+class ShardedScanner:
+    """
+    Bulk scanning across N processes to get past the GIL
+    The parent expands and de-duplicates targets and hands them out in
+    chunks over a shared queue, so fast workers take more. Every worker runs
+    a BulkScanner on its own event loop and sends finished results back in
+    batches, one compact JSON blob per batch. Only the parent writes reports
+    and history, so output goes to a single sink. WHOIS/certificate parsing
+    and JSON encoding happen in the workers, so throughput scales with cores
+    """
+    
+    def __init__(self, framework, factory, processes=None, concurrency=None,
+                 incremental=False, chunk_size=None, batch_size=None, journal=None):
+        """
+        framework: parent ShadowRecon; its _store() stores every result
+        factory: picklable zero-argument callable that builds a worker's
+                 framework (one that scans but does not store)
+        concurrency: targets in flight per worker
+        journal: CheckpointJournal; done targets are skipped and finished ones
+                 recorded (only target status: lookups happen in the workers)
+        """
+        self.framework = framework
+        self.factory = factory
+        self.processes = max(1, processes or Config.BULK_PROCESSES)
+        self.concurrency = max(1, concurrency or Config.BULK_CONCURRENCY)
+        self.incremental = incremental
+        self.chunk_size = max(1, chunk_size or Config.SHARD_CHUNK_SIZE)
+        self.batch_size = max(1, batch_size or Config.SHARD_BATCH_SIZE)
+        self.journal = journal
+        self.expander = TargetExpander()
+        self.stats = BulkScanner.empty_stats()
+        self.stats.update({"processes": self.processes, "worker_failures": 0, "shared_lookups": 0})
+    
+    def scan(self, targets):
+        """
+        Scan an iterable of targets, yielding each result as workers report it
+        Results are stored through the parent framework before being yielded
+        """
+        # spawn: the parent may already hold threads, sockets and event loops
+        context = multiprocessing.get_context("spawn")
+        tasks = context.Queue(maxsize=self.processes * 4)
+        results = context.Queue()
+        stop = threading.Event()
+        started = time.monotonic()
+        
+        workers = [
+            context.Process(
+                target=_worker,
+                args=(index, self.factory, self.concurrency, self.incremental,
+                      self.batch_size, tasks, results),
+                daemon=True
+            )
+            for index in range(self.processes)
+        ]
+        for worker in workers:
+            worker.start()
+        
+        feeder = threading.Thread(target=self._feed, args=(targets, tasks, stop), daemon=True)
+        feeder.start()
+        
+        finished = set()
+        
+        try:
+            while len(finished) < len(workers):
+                try:
+                    kind, index, payload = results.get(timeout=1)
+                except queue.Empty:
+                    self._check_workers(workers, finished)
+                    continue
+                
+                if kind == "done":
+                    finished.add(index)
+                    self.stats["shared_lookups"] += payload["shared_lookups"]
+                    continue
+                
+                for result in json.loads(payload):
+                    if result["findings"] is not None and not result["error"]:
+                        self.framework._store(result["target"], result["findings"], result["type"])
+                    
+                    BulkScanner.tally(self.stats, result)
+                    if self.journal is not None:
+                        self.journal.mark(result["target"], result["error"])
+                    yield result
+        
+        finally:
+            stop.set()
+            for worker in workers:
+                worker.join(timeout=1)
+                if worker.is_alive():
+                    worker.terminate()
+            tasks.cancel_join_thread()
+            
+            self.stats["duplicates"] = self.expander.duplicates
+            if self.journal is not None:
+                self.stats["resumed"] = self.journal.stats["skipped"]
+            self.stats["elapsed"] = round(time.monotonic() - started, 3)
+            if self.stats["elapsed"] > 0:
+                self.stats["targets_per_second"] = round(
+                    self.stats["completed"] / self.stats["elapsed"], 2
+                )
+            
+            logger.info(
+                f"Sharded scan finished: {self.stats['completed']} target(s) on "
+                f"{self.processes} process(es) in {self.stats['elapsed']}s "
+                f"({self.stats['targets_per_second']} targets/s)"
+            )
+    
+    def _feed(self, targets, tasks, stop):
+        """Expand targets into chunks on the task queue, then one stop marker per worker"""
+        chunk = []
+        
+        def put(item):
+            # Bounded queue: block while workers are busy, but give up on stop
+            while not stop.is_set():
+                try:
+                    tasks.put(item, timeout=0.5)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        
+        expanded = self.expander.expand(targets)
+        if self.journal is not None:
+            expanded = self.journal.unfinished(expanded)
+        
+        try:
+            for target in expanded:
+                self.stats["submitted"] += 1
+                chunk.append(target)
+                
+                if len(chunk) >= self.chunk_size:
+                    if not put(chunk):
+                        return
+                    chunk = []
+            
+            if chunk and not put(chunk):
+                return
+        
+        except Exception as e:
+            logger.error(f"Reading targets failed: {str(e)}")
+        
+        for _ in range(self.processes):
+            put(None)
+    
+    def _check_workers(self, workers, finished):
+        """Count workers that died without reporting; their in-flight targets are lost"""
+        for index, worker in enumerate(workers):
+            if index not in finished and worker.exitcode is not None:
+                finished.add(index)
+                self.stats["worker_failures"] += 1
+                logger.error(f"Scan worker {index} exited with code {worker.exitcode}")
+
+def _worker(index, factory, concurrency, incremental, batch_size, tasks, results):
+    """Worker process entry point"""
+    asyncio.run(_work(index, factory, concurrency, incremental, batch_size, tasks, results))
+
+async def _work(index, factory, concurrency, incremental, batch_size, tasks, results):
+    """Scan chunks from the task queue, sending results back in JSON batches"""
+    framework = factory()
+    scanner = BulkScanner(framework, concurrency=concurrency, incremental=incremental)
+    loop = asyncio.get_running_loop()
+    
+    async def targets():
+        while True:
+            chunk = await loop.run_in_executor(None, tasks.get)
+            if chunk is None:
+                return
+            for target in chunk:
+                yield target
+    
+    try:
+        async for batch in _batched(scanner.scan(targets()), batch_size, Config.SHARD_FLUSH_SECONDS):
+            results.put(("results", index, json.dumps(batch, default=str, separators=(",", ":"))))
+    
+    finally:
+        framework.close()
+        await HTTPClient.close()
+        DNSEngine.close_default()
+    
+    shared = SingleFlight.for_running_loop().stats["shared"]
+    pipeline = getattr(framework, "pipeline", None)
+    if pipeline is not None:
+        shared += pipeline.stats["shared"] + pipeline.stats["memo_hits"]
+    
+    results.put(("done", index, {"stats": scanner.stats, "shared_lookups": shared}))
+
+async def _batched(items, batch_size, flush_seconds):
+    """
+    Regroup an async iterable into lists of up to batch_size items
+    A partial batch is yielded once its first item is flush_seconds old,
+    even while the source is still waiting for its next item
+    """
+    pending = asyncio.Queue()
+    done = object()
+    
+    async def produce():
+        try:
+            async for item in items:
+                pending.put_nowait(item)
+        finally:
+            pending.put_nowait(done)
+    
+    producer = asyncio.ensure_future(produce())
+    batch = []
+    started = None
+    
+    try:
+        while True:
+            timeout = None
+            if batch:
+                timeout = max(0, flush_seconds - (time.monotonic() - started))
+            
+            try:
+                item = await asyncio.wait_for(pending.get(), timeout)
+            except asyncio.TimeoutError:
+                yield batch
+                batch = []
+                continue
+            
+            if item is done:
+                break
+            
+            if not batch:
+                started = time.monotonic()
+            batch.append(item)
+            
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        
+        # Re-raise anything the source raised
+        await producer
+        if batch:
+            yield batch
+    
+    finally:
+        producer.cancel()
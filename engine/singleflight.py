@@ -0,0 +1,66 @@
+"""
+ShadowRecon Request Coalescing
+Concurrent calls for the same key share one upstream request
+"""
+
+import asyncio
+import copy
+import weakref
+import logging
+
+logger = logging.getLogger("ShadowRecon")
+
+class SingleFlight:
+    """
+    Collapse concurrent identical calls into one
+    The first caller for a key starts the call; everyone asking for the same
+    key while it is in flight awaits that call and gets a copy of its result
+    (or its exception). Nothing is kept once the call finishes, so this only
+    removes duplicate concurrent work; see ResultCache for reuse over time
+    """
+    
+    _instances = weakref.WeakKeyDictionary()
+    
+    def __init__(self):
+        self._calls = {}
+        self.stats = {"calls": 0, "shared": 0}
+    
+    @classmethod
+    def for_running_loop(cls):
+        """Return the group bound to the running event loop"""
+        loop = asyncio.get_running_loop()
+        group = cls._instances.get(loop)
+        
+        if group is None:
+            group = cls()
+            cls._instances[loop] = group
+        
+        return group
+    
+    def in_flight(self, key):
+        """True while a call for key is running"""
+        return key in self._calls
+    
+    async def do(self, key, factory):
+        """
+        Await factory() once per key at a time
+        factory: zero-argument callable returning a coroutine; only called
+        when no call for key is already in flight
+        """
+        task = self._calls.get(key)
+        
+        if task is None:
+            # Its own task, so cancelling one waiter never cancels the others
+            task = asyncio.ensure_future(factory())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+            self.stats["calls"] += 1
+            return await asyncio.shield(task)
+        
+        self.stats["shared"] += 1
+        logger.debug(f"Coalesced in-flight request: {key}")
+        return copy.deepcopy(await asyncio.shield(task))
+    
+    def _forget(self, key, task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
@@ -0,0 +1,165 @@
+"""
+ShadowRecon Subdomain Enumeration
+Wordlist brute-forcing on top of the DNS engine with wildcard filtering
+"""
+
+import asyncio
+import secrets
+import time
+import logging
+from config import Config
+from utils import Utils
+from .resolver import DNSEngine, DNSLookupError
+
+logger = logging.getLogger("ShadowRecon")
+
+class SubdomainEnumerator:
+    """
+    Brute-force subdomains of a domain from a wordlist
+    Candidates are resolved with thousands of queries in flight; answers that
+    only point at the domain's wildcard addresses are discarded
+    """
+    
+    def __init__(self, domain, engine=None, concurrency=None):
+        if not Utils.validate_domain(domain):
+            raise ValueError(f"Invalid domain format: {domain}")
+        
+        self.domain = domain.lower()
+        self.engine = engine or DNSEngine.default()
+        self.concurrency = max(1, concurrency or Config.SUBDOMAIN_CONCURRENCY)
+        self.wildcard_ips = set()
+        self.stats = {
+            "candidates": 0,
+            "resolved": 0,
+            "found": 0,
+            "wildcard_filtered": 0,
+            "failures": 0,
+            "elapsed": 0.0,
+            "names_per_second": 0.0
+        }
+    
+    @staticmethod
+    def read_wordlist(path):
+        """Lazily yield labels from a wordlist file (one per line, '#' comments ignored)"""
+        with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+            for line in f:
+                word = line.strip().lower()
+                if word and not word.startswith('#'):
+                    yield word
+    
+    async def detect_wildcard(self):
+        """
+        Resolve a few random labels; any addresses they return belong to a
+        wildcard record and are excluded from results
+        """
+        probes = [
+            f"{secrets.token_hex(8)}.{self.domain}"
+            for _ in range(Config.SUBDOMAIN_WILDCARD_PROBES)
+        ]
+        answers = await asyncio.gather(
+            *(self.engine.query(name, "A") for name in probes), return_exceptions=True
+        )
+        
+        self.wildcard_ips = {
+            ip for records in answers if not isinstance(records, BaseException) for ip in records
+        }
+        
+        if self.wildcard_ips:
+            logger.warning(
+                f"Wildcard DNS detected for {self.domain}: {sorted(self.wildcard_ips)}"
+            )
+        
+        return self.wildcard_ips
+    
+    async def enumerate(self, words):
+        """
+        Async generator yielding {'subdomain', 'a_records'} for every live name
+        words: iterable of labels; pulled lazily so huge wordlists stay cheap
+        A fixed pool of workers shares the word iterator, so per-name overhead
+        stays constant no matter how many queries are in flight
+        """
+        started = time.monotonic()
+        await self.detect_wildcard()
+        
+        iterator = iter(words)
+        found_queue = asyncio.Queue()
+        
+        async def worker():
+            for word in iterator:
+                name = f"{word}.{self.domain}"
+                if not Utils.validate_domain(name):
+                    continue
+                
+                self.stats["candidates"] += 1
+                found = await self._probe(name)
+                
+                if found is not None:
+                    found_queue.put_nowait(found)
+        
+        async def supervise():
+            try:
+                await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+            finally:
+                found_queue.put_nowait(None)
+        
+        supervisor = asyncio.ensure_future(supervise())
+        
+        try:
+            while True:
+                found = await found_queue.get()
+                if found is None:
+                    break
+                yield found
+            
+            # Surface any worker failure
+            await supervisor
+        
+        finally:
+            supervisor.cancel()
+            
+            self.stats["elapsed"] = round(time.monotonic() - started, 3)
+            if self.stats["elapsed"] > 0:
+                self.stats["names_per_second"] = round(
+                    self.stats["resolved"] / self.stats["elapsed"], 1
+                )
+            
+            logger.info(
+                f"Subdomain enumeration for {self.domain}: {self.stats['found']} found, "
+                f"{self.stats['resolved']} names resolved ({self.stats['names_per_second']} names/s)"
+            )
+    
+    async def _probe(self, name):
+        """Resolve one candidate, returning a result dict if it is a real host"""
+        try:
+            records = await self.engine.query(name, "A")
+        except DNSLookupError:
+            self.stats["failures"] += 1
+            return None
+        
+        self.stats["resolved"] += 1
+        
+        if not records:
+            return None
+        
+        if self.wildcard_ips and set(records) <= self.wildcard_ips:
+            self.stats["wildcard_filtered"] += 1
+            return None
+        
+        self.stats["found"] += 1
+        return {
+            "subdomain": name,
+            "a_records": records
+        }
+    
+    async def discovered_targets(self, words, include_ips=True):
+        """
+        Async generator of scan targets for BulkScanner
+        Yields each discovered hostname, followed by its addresses when
+        include_ips is set (duplicate IPs are dropped by the scanner)
+        """
+        async for found in self.enumerate(words):
+            yield found["subdomain"]
+            
+            if include_ips:
+                for ip in found["a_records"]:
+                    yield ip
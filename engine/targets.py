@@ -0,0 +1,138 @@
+"""
+ShadowRecon Target Expansion
+Lazy CIDR/range expansion with compact IP de-duplication
+"""
+
+import bisect
+import ipaddress
+import logging
+import socket
+from utils import Utils
+
+logger = logging.getLogger("ShadowRecon")
+
+class IntervalSet:
+    """
+    Set of integers: sorted, merged [start, end] intervals for ranges plus a
+    plain set for single values
+    A range is merged in with one bisect and one slice assignment, so
+    tracking every address of a /8 costs two integers rather than 16M set
+    entries, and single values never shift the interval lists at all
+    """
+    
+    def __init__(self):
+        self._starts = []
+        self._ends = []
+        self._singles = set()
+    
+    def __contains__(self, value):
+        return value in self._singles or self._in_interval(value)
+    
+    def __len__(self):
+        covered = sum(end - start + 1 for start, end in zip(self._starts, self._ends))
+        return covered + sum(1 for value in self._singles if not self._in_interval(value))
+    
+    @property
+    def interval_count(self):
+        """Number of stored intervals and single values (the actual memory footprint)"""
+        return len(self._starts) + len(self._singles)
+    
+    def _in_interval(self, value):
+        index = bisect.bisect_right(self._starts, value) - 1
+        return index >= 0 and value <= self._ends[index]
+    
+    def add(self, value):
+        """Add a value; returns False if it was already present"""
+        if value in self:
+            return False
+        
+        self._singles.add(value)
+        return True
+    
+    def add_range(self, first, last):
+        """
+        Add every value in [first, last]
+        Returns an iterator over the values that were not already present,
+        in order; the intervals are updated straight away
+        """
+        # Stored intervals overlapping or touching [first, last]
+        low = bisect.bisect_left(self._ends, first - 1)
+        high = bisect.bisect_right(self._starts, last + 1)
+        
+        gaps = []
+        cursor = first
+        for index in range(low, high):
+            if self._starts[index] > cursor:
+                gaps.append((cursor, min(self._starts[index] - 1, last)))
+            cursor = max(cursor, self._ends[index] + 1)
+        if cursor <= last:
+            gaps.append((cursor, last))
+        
+        if low < high:
+            first = min(first, self._starts[low])
+            last = max(last, self._ends[high - 1])
+        self._starts[low:high] = [first]
+        self._ends[low:high] = [last]
+        
+        return self._new_values(gaps)
+    
+    def _new_values(self, gaps):
+        """Values in gaps that were not single values; those now live in an interval"""
+        for start, end in gaps:
+            for value in range(start, end + 1):
+                if value in self._singles:
+                    self._singles.discard(value)
+                else:
+                    yield value
+
+class TargetExpander:
+    """
+    Turn raw bulk input into individual scan targets
+    CIDR blocks and ranges are expanded lazily, and each IP address is
+    emitted at most once across the whole run
+    """
+    
+    def __init__(self):
+        self.seen_ips = IntervalSet()
+        self.duplicates = 0
+    
+    def expand(self, targets):
+        """Generator yielding one scan target at a time"""
+        for target in targets:
+            kind = Utils.classify_target(target)
+            
+            if kind == "ip_range":
+                logger.debug(f"Expanding IP range: {target}")
+                first, last = Utils.parse_ip_range(target)
+                
+                emitted = 0
+                for value in self.seen_ips.add_range(first, last):
+                    emitted += 1
+                    yield socket.inet_ntoa(value.to_bytes(4, 'big'))
+                self.duplicates += last - first + 1 - emitted
+            
+            elif kind == "ip":
+                if self._first_sighting(target):
+                    yield target
+            
+            else:
+                yield target
+    
+    async def expand_async(self, targets):
+        """Async generator counterpart of expand() for async target sources"""
+        async for target in targets:
+            for expanded in self.expand([target]):
+                yield expanded
+    
+    def _first_sighting(self, ip):
+        """Record an IP, returning False if it has been emitted before"""
+        try:
+            value = int(ipaddress.IPv4Address(ip))
+        except ValueError:
+            return True
+        
+        if self.seen_ips.add(value):
+            return True
+        
+        self.duplicates += 1
+        return False
@@ -0,0 +1,601 @@
+"""
+ShadowRecon TLS Certificate Harvester
+Concurrent TLS handshakes with binary (DER) certificate parsing and a
+fingerprint-keyed certificate cache
+"""
+
+import asyncio
+import hashlib
+import ipaddress
+import logging
+import ssl
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from config import Config
+from utils import Utils
+
+try:
+    from cryptography import x509
+    from cryptography.hazmat.primitives.asymmetric import dsa, ec, ed448, ed25519, rsa
+    CRYPTOGRAPHY_AVAILABLE = True
+except ImportError:
+    CRYPTOGRAPHY_AVAILABLE = False
+
+logger = logging.getLogger("ShadowRecon")
+
+# Python < 3.13 only exposes the peer chain on the private _sslobj, as
+# certificates that need _ssl.ENCODING_DER to serialize
+_ENCODING_DER = getattr(getattr(ssl, "_ssl", None), "ENCODING_DER", None)
+
+class X509Parser:
+    """
+    Parse DER-encoded X.509 certificates into plain dicts
+    Uses the cryptography package when installed, otherwise a small built-in
+    DER reader that covers the fields recon needs (names, validity, SANs,
+    key and signature algorithms). A certificate neither can read yields a
+    record with only its fingerprints and an error, never an exception
+    """
+    
+    NAME_OIDS = {
+        "2.5.4.3": "commonName",
+        "2.5.4.5": "serialNumber",
+        "2.5.4.6": "countryName",
+        "2.5.4.7": "localityName",
+        "2.5.4.8": "stateOrProvinceName",
+        "2.5.4.10": "organizationName",
+        "2.5.4.11": "organizationalUnitName",
+        "1.2.840.113549.1.9.1": "emailAddress",
+    }
+    
+    SIGNATURE_OIDS = {
+        "1.2.840.113549.1.1.5": "sha1WithRSAEncryption",
+        "1.2.840.113549.1.1.10": "rsassaPss",
+        "1.2.840.113549.1.1.11": "sha256WithRSAEncryption",
+        "1.2.840.113549.1.1.12": "sha384WithRSAEncryption",
+        "1.2.840.113549.1.1.13": "sha512WithRSAEncryption",
+        "1.2.840.10045.4.3.2": "ecdsa-with-SHA256",
+        "1.2.840.10045.4.3.3": "ecdsa-with-SHA384",
+        "1.2.840.10045.4.3.4": "ecdsa-with-SHA512",
+        "1.3.101.112": "ed25519",
+        "1.3.101.113": "ed448",
+    }
+    
+    CURVE_OIDS = {
+        "1.2.840.10045.3.1.7": ("secp256r1", 256),
+        "1.3.132.0.34": ("secp384r1", 384),
+        "1.3.132.0.35": ("secp521r1", 521),
+    }
+    
+    SAN_OID = "2.5.29.17"
+    
+    @classmethod
+    def parse(cls, der):
+        """Parse a DER certificate; fingerprints are always computed from the raw bytes"""
+        try:
+            if CRYPTOGRAPHY_AVAILABLE:
+                cert = cls._parse_cryptography(der)
+            else:
+                cert = cls._parse_der(der)
+            cert["error"] = None
+        
+        except Exception as e:
+            # Malformed or unusual DER: index, length and decode errors alike
+            logger.debug(f"Could not parse certificate: {type(e).__name__}: {str(e)}")
+            cert = cls._empty_record()
+            cert["error"] = f"Unparseable certificate: {str(e) or type(e).__name__}"
+        
+        cert["self_signed"] = not cert["error"] and cert["subject_dn"] == cert["issuer_dn"]
+        cert["subject"] = cert["subject_dn"].get("commonName")
+        cert["issuer"] = cert["issuer_dn"].get("commonName")
+        cert["fingerprint_sha1"] = hashlib.sha1(der).hexdigest()
+        cert["fingerprint_sha256"] = hashlib.sha256(der).hexdigest()
+        return cert
+    
+    @staticmethod
+    def _empty_record():
+        """Certificate fields for a certificate that could not be parsed"""
+        return {
+            "subject_dn": {},
+            "issuer_dn": {},
+            "serial_number": None,
+            "valid_from": None,
+            "valid_until": None,
+            "sans": [],
+            "key_type": None,
+            "key_size": None,
+            "curve": None,
+            "signature_algorithm": None
+        }
+    
+    @staticmethod
+    def is_current(cert, now=None):
+        """True if now falls inside the certificate's validity window"""
+        now = now or datetime.now(timezone.utc)
+        try:
+            valid_from = datetime.fromisoformat(cert["valid_from"])
+            valid_until = datetime.fromisoformat(cert["valid_until"])
+        except (KeyError, TypeError, ValueError):
+            return False
+        return valid_from <= now <= valid_until
+    
+    @staticmethod
+    def matches_hostname(cert, hostname):
+        """Check hostname against the SANs (or CN if there are none), honoring wildcards"""
+        hostname = hostname.lower().rstrip('.')
+        names = cert.get("sans") or [cert.get("subject") or ""]
+        
+        for name in names:
+            name = name.lower().rstrip('.')
+            if name == hostname:
+                return True
+            if name.startswith("*.") and "." in hostname:
+                if hostname.split(".", 1)[1] == name[2:]:
+                    return True
+        
+        return False
+    
+    # cryptography backend
+    
+    @classmethod
+    def _parse_cryptography(cls, der):
+        """Parse with the cryptography package"""
+        cert = x509.load_der_x509_certificate(der)
+        
+        valid_from = getattr(cert, "not_valid_before_utc", None)
+        if valid_from is None:
+            valid_from = cert.not_valid_before.replace(tzinfo=timezone.utc)
+        valid_until = getattr(cert, "not_valid_after_utc", None)
+        if valid_until is None:
+            valid_until = cert.not_valid_after.replace(tzinfo=timezone.utc)
+        
+        sans = []
+        try:
+            extension = cert.extensions.get_extension_for_class(x509.SubjectAlternativeName)
+            sans.extend(extension.value.get_values_for_type(x509.DNSName))
+            sans.extend(str(ip) for ip in extension.value.get_values_for_type(x509.IPAddress))
+        except x509.ExtensionNotFound:
+            pass
+        
+        key = cert.public_key()
+        if isinstance(key, rsa.RSAPublicKey):
+            key_type, key_size, curve = "RSA", key.key_size, None
+        elif isinstance(key, ec.EllipticCurvePublicKey):
+            key_type, key_size, curve = "EC", key.curve.key_size, key.curve.name
+        elif isinstance(key, ed25519.Ed25519PublicKey):
+            key_type, key_size, curve = "Ed25519", 256, None
+        elif isinstance(key, ed448.Ed448PublicKey):
+            key_type, key_size, curve = "Ed448", 456, None
+        elif isinstance(key, dsa.DSAPublicKey):
+            key_type, key_size, curve = "DSA", key.key_size, None
+        else:
+            key_type, key_size, curve = type(key).__name__, None, None
+        
+        signature_oid = cert.signature_algorithm_oid.dotted_string
+        
+        return {
+            "subject_dn": cls._name_dict(
+                (attr.oid.dotted_string, attr.value) for attr in cert.subject
+            ),
+            "issuer_dn": cls._name_dict(
+                (attr.oid.dotted_string, attr.value) for attr in cert.issuer
+            ),
+            "serial_number": format(cert.serial_number, "x"),
+            "valid_from": valid_from.isoformat(),
+            "valid_until": valid_until.isoformat(),
+            "sans": sans,
+            "key_type": key_type,
+            "key_size": key_size,
+            "curve": curve,
+            "signature_algorithm": cls.SIGNATURE_OIDS.get(signature_oid, signature_oid)
+        }
+    
+    # Built-in DER backend
+    
+    @staticmethod
+    def _read_tlv(data, offset):
+        """Read one DER tag/length/value; returns (tag, value, next_offset)"""
+        tag = data[offset]
+        length = data[offset + 1]
+        offset += 2
+        
+        if length & 0x80:
+            count = length & 0x7f
+            length = int.from_bytes(data[offset:offset + count], 'big')
+            offset += count
+        
+        if offset + length > len(data):
+            raise ValueError("Truncated DER element")
+        
+        return tag, data[offset:offset + length], offset + length
+    
+    @classmethod
+    def _children(cls, data):
+        """Split a constructed DER value into its (tag, value) children"""
+        children = []
+        offset = 0
+        while offset < len(data):
+            tag, value, offset = cls._read_tlv(data, offset)
+            children.append((tag, value))
+        return children
+    
+    @staticmethod
+    def _oid(value):
+        """Decode an OBJECT IDENTIFIER to dotted form"""
+        first = value[0]
+        parts = [min(first // 40, 2), first - 40 * min(first // 40, 2)]
+        number = 0
+        for byte in value[1:]:
+            number = (number << 7) | (byte & 0x7f)
+            if not byte & 0x80:
+                parts.append(number)
+                number = 0
+        return ".".join(str(part) for part in parts)
+    
+    @staticmethod
+    def _time(tag, value):
+        """Decode UTCTime (0x17) or GeneralizedTime (0x18) to an ISO string"""
+        text = value.decode('ascii').rstrip('Z')
+        if tag == 0x17:
+            year = int(text[:2])
+            text = f"{1900 + year if year >= 50 else 2000 + year}{text[2:]}"
+        return datetime.strptime(text[:14], "%Y%m%d%H%M%S").replace(tzinfo=timezone.utc).isoformat()
+    
+    @classmethod
+    def _name_dict(cls, attributes):
+        """Map (oid, value) pairs to long attribute names"""
+        return {cls.NAME_OIDS.get(oid, oid): value for oid, value in attributes}
+    
+    @classmethod
+    def _parse_name(cls, data):
+        """Decode an X.501 Name (SEQUENCE OF SET OF AttributeTypeAndValue)"""
+        attributes = []
+        for _, rdn in cls._children(data):
+            for _, pair in cls._children(rdn):
+                (_, oid), (_, value) = cls._children(pair)[:2]
+                attributes.append((cls._oid(oid), value.decode('utf-8', errors='replace')))
+        return cls._name_dict(attributes)
+    
+    @classmethod
+    def _parse_key(cls, spki):
+        """Return (key_type, key_size, curve) from a SubjectPublicKeyInfo"""
+        (_, algorithm), (_, bits) = cls._children(spki)[:2]
+        params = cls._children(algorithm)
+        oid = cls._oid(params[0][1])
+        
+        if oid == "1.2.840.113549.1.1.1":
+            modulus = cls._children(cls._children(bits[1:])[0][1])[0][1]
+            return "RSA", int.from_bytes(modulus, 'big').bit_length(), None
+        
+        if oid == "1.2.840.10045.2.1":
+            curve, size = cls.CURVE_OIDS.get(cls._oid(params[1][1]), (None, None))
+            return "EC", size, curve
+        
+        if oid == "1.3.101.112":
+            return "Ed25519", 256, None
+        
+        if oid == "1.3.101.113":
+            return "Ed448", 456, None
+        
+        return oid, None, None
+    
+    @classmethod
+    def _parse_sans(cls, extensions):
+        """Extract dNSName and iPAddress entries from the extensions block"""
+        sans = []
+        for _, extension in cls._children(cls._children(extensions)[0][1]):
+            fields = cls._children(extension)
+            if cls._oid(fields[0][1]) != cls.SAN_OID:
+                continue
+            
+            for tag, value in cls._children(cls._children(fields[-1][1])[0][1]):
+                if tag == 0x82:
+                    sans.append(value.decode('ascii', errors='replace'))
+                elif tag == 0x87 and len(value) in (4, 16):
+                    sans.append(str(ipaddress.ip_address(value)))
+        
+        return sans
+    
+    @classmethod
+    def _parse_der(cls, der):
+        """Parse with the built-in DER reader"""
+        _, certificate, _ = cls._read_tlv(der, 0)
+        (_, tbs), (_, signature_algorithm), _ = cls._children(certificate)
+        
+        fields = cls._children(tbs)
+        if fields[0][0] == 0xa0:
+            fields = fields[1:]
+        
+        serial = fields[0][1]
+        (not_before_tag, not_before), (not_after_tag, not_after) = cls._children(fields[3][1])
+        key_type, key_size, curve = cls._parse_key(fields[5][1])
+        
+        sans = []
+        for tag, value in fields[6:]:
+            if tag == 0xa3:
+                sans = cls._parse_sans(value)
+        
+        signature_oid = cls._oid(cls._children(signature_algorithm)[0][1])
+        
+        return {
+            "subject_dn": cls._parse_name(fields[4][1]),
+            "issuer_dn": cls._parse_name(fields[2][1]),
+            "serial_number": format(int.from_bytes(serial, 'big'), "x"),
+            "valid_from": cls._time(not_before_tag, not_before),
+            "valid_until": cls._time(not_after_tag, not_after),
+            "sans": sans,
+            "key_type": key_type,
+            "key_size": key_size,
+            "curve": curve,
+            "signature_algorithm": cls.SIGNATURE_OIDS.get(signature_oid, signature_oid)
+        }
+
+class TLSHarvester:
+    """
+    Fetch and parse TLS certificates from many endpoints concurrently
+    Parsed certificates are cached by SHA-256 fingerprint, so hosts behind the
+    same CDN or load balancer only cost a handshake, not another parse
+    """
+    
+    _default = None
+    
+    def __init__(self, concurrency=None, timeout=None):
+        self.concurrency = max(1, concurrency or Config.TLS_CONCURRENCY)
+        self.timeout = timeout or Config.TLS_CONNECT_TIMEOUT
+        self._certs = OrderedDict()
+        self.stats = {
+            "probed": 0,
+            "handshakes": 0,
+            "errors": 0,
+            "cert_cache_hits": 0,
+            "elapsed": 0.0,
+            "endpoints_per_second": 0.0
+        }
+        
+        # Harvesting, not validation: accept any certificate so it can be inspected
+        self.context = ssl.create_default_context()
+        self.context.check_hostname = False
+        self.context.verify_mode = ssl.CERT_NONE
+    
+    @classmethod
+    def default(cls):
+        """Return the process-wide harvester, creating it on first use"""
+        if cls._default is None:
+            cls._default = cls()
+        return cls._default
+    
+    @staticmethod
+    def parse_endpoint(text, default_port=443):
+        """Split 'host', 'host:port' or '[v6]:port' into (host, port)"""
+        text = text.strip()
+        
+        if text.startswith("["):
+            host, _, rest = text[1:].partition("]")
+            port = rest.lstrip(":") or default_port
+        elif text.count(":") == 1:
+            host, port = text.split(":")
+        else:
+            host, port = text, default_port
+        
+        return host.lower(), int(port) if port is not None else None
+    
+    def certificate(self, der):
+        """Return the parsed certificate for DER bytes, parsing each fingerprint once"""
+        fingerprint = hashlib.sha256(der).hexdigest()
+        
+        cert = self._certs.get(fingerprint)
+        if cert is not None:
+            self.stats["cert_cache_hits"] += 1
+            self._certs.move_to_end(fingerprint)
+            return dict(cert)
+        
+        cert = X509Parser.parse(der)
+        self._certs[fingerprint] = cert
+        
+        while len(self._certs) > Config.TLS_CERT_CACHE_SIZE:
+            self._certs.popitem(last=False)
+        
+        return dict(cert)
+    
+    @staticmethod
+    def _peer_chain(ssl_object):
+        """
+        DER certificates the peer sent, leaf first
+        Empty if the runtime cannot expose them, and the caller falls back to the leaf
+        """
+        getter = getattr(ssl_object, "get_unverified_chain", None)
+        if getter is None and _ENCODING_DER is not None:
+            getter = getattr(getattr(ssl_object, "_sslobj", None), "get_unverified_chain", None)
+        
+        if getter is None:
+            return []
+        
+        try:
+            return [
+                item if isinstance(item, bytes) else item.public_bytes(_ENCODING_DER)
+                for item in getter() or []
+            ]
+        except (AttributeError, TypeError, ValueError, ssl.SSLError) as e:
+            logger.debug(f"Could not read the peer certificate chain: {str(e)}")
+            return []
+    
+    async def probe(self, host, port=443):
+        """
+        Handshake with host:port and return the certificate details
+        Never raises; failures are reported in the 'error' field
+        """
+        self.stats["probed"] += 1
+        result = {
+            "host": host,
+            "port": port,
+            "has_ssl": False,
+            "tls_version": None,
+            "cipher": None,
+            "certificate": None,
+            "chain": [],
+            "error": None
+        }
+        
+        writer = None
+        try:
+            _, writer = await asyncio.wait_for(
+                asyncio.open_connection(
+                    host, port, ssl=self.context,
+                    server_hostname=host if not Utils.validate_ip(host) else None
+                ),
+                self.timeout
+            )
+            self.stats["handshakes"] += 1
+            
+            ssl_object = writer.get_extra_info("ssl_object")
+            der = ssl_object.getpeercert(binary_form=True)
+            if not der:
+                raise ssl.SSLError("Peer sent no certificate")
+            
+            chain = self._peer_chain(ssl_object) or [der]
+            
+            result["has_ssl"] = True
+            result["tls_version"] = ssl_object.version()
+            result["cipher"] = (ssl_object.cipher() or [None])[0]
+            result["certificate"] = self.certificate(der)
+            result["chain"] = [
+                {
+                    "subject": cert["subject"],
+                    "issuer": cert["issuer"],
+                    "valid_until": cert["valid_until"],
+                    "fingerprint_sha256": cert["fingerprint_sha256"]
+                }
+                for cert in (self.certificate(item) for item in chain[1:])
+            ]
+        
+        except asyncio.TimeoutError:
+            result["error"] = "Connection timeout"
+        
+        except ssl.SSLError as e:
+            result["error"] = f"SSL Error: {str(e)}"
+        
+        except (OSError, ValueError) as e:
+            result["error"] = str(e) or type(e).__name__
+        
+        except Exception as e:
+            # Keep probe_many's gather alive whatever one endpoint does
+            result["error"] = f"{type(e).__name__}: {str(e)}"
+        
+        finally:
+            if writer is not None:
+                writer.close()
+        
+        if result["error"]:
+            self.stats["errors"] += 1
+            logger.debug(f"TLS probe failed for {host}:{port}: {result['error']}")
+        
+        return result
+    
+    async def probe_many(self, endpoints, scope=None):
+        """
+        Async generator probing (host, port) pairs, yielding results as they finish
+        endpoints: iterable of (host, port); pulled lazily
+        scope: optional set of lowercase domains (may keep growing while endpoints
+        are read); SAN names inside them that have not been seen yet are
+        probed too, on the port they were found on
+        """
+        started = time.monotonic()
+        scope = scope if scope is not None else set()
+        seen = set()
+        extra = []
+        source = iter(endpoints)
+        results = asyncio.Queue()
+        progress = asyncio.Event()
+        active = [0]
+        
+        def next_endpoint():
+            while True:
+                if extra:
+                    endpoint = extra.pop()
+                else:
+                    endpoint = next(source, None)
+                    if endpoint is None:
+                        return None
+                if endpoint not in seen:
+                    seen.add(endpoint)
+                    return endpoint
+        
+        async def worker():
+            while True:
+                endpoint = next_endpoint()
+                if endpoint is None:
+                    # In-flight probes may still surface SANs to follow
+                    if not scope or not active[0]:
+                        progress.set()
+                        return
+                    progress.clear()
+                    await progress.wait()
+                    continue
+                
+                active[0] += 1
+                try:
+                    result = await self.probe(*endpoint)
+                    if scope:
+                        extra.extend(
+                            (name, result["port"])
+                            for name in self.candidate_domains([result], scope)
+                        )
+                finally:
+                    active[0] -= 1
+                    progress.set()
+                
+                results.put_nowait(result)
+        
+        async def supervise():
+            try:
+                await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+            finally:
+                results.put_nowait(None)
+        
+        supervisor = asyncio.ensure_future(supervise())
+        
+        try:
+            while True:
+                result = await results.get()
+                if result is None:
+                    break
+                yield result
+            
+            await supervisor
+        
+        finally:
+            supervisor.cancel()
+            
+            self.stats["elapsed"] = round(time.monotonic() - started, 3)
+            if self.stats["elapsed"] > 0:
+                self.stats["endpoints_per_second"] = round(
+                    self.stats["probed"] / self.stats["elapsed"], 1
+                )
+    
+    @staticmethod
+    def candidate_domains(results, scope=None):
+        """
+        SAN names from probe results as new candidate domains
+        Wildcards are reduced to their base name; with scope set, only names
+        equal to or under one of the scope domains are returned
+        """
+        candidates = []
+        seen = set()
+        
+        for result in results:
+            cert = result.get("certificate") or {}
+            for name in cert.get("sans") or []:
+                name = name.lower().rstrip('.')
+                if name.startswith("*."):
+                    name = name[2:]
+                
+                if name in seen or not Utils.validate_domain(name):
+                    continue
+                
+                if scope and not any(name == d or name.endswith(f".{d}") for d in scope):
+                    continue
+                
+                seen.add(name)
+                candidates.append(name)
+        
+        return candidates
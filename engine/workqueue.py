@@ -0,0 +1,300 @@
+"""
+ShadowRecon Work Queue
+SQLite job queue with leases and retries for a coordinator and scan workers
+"""
+
+import asyncio
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import logging
+from config import Config
+from utils import Utils
+from .scanner import BulkScanner
+
+logger = logging.getLogger("ShadowRecon")
+
+class WorkQueue:
+    """
+    Job queue shared by a coordinator and any number of worker processes
+    Jobs are (run, target) rows. A worker leases a batch for lease_seconds
+    and must complete it (or extend the lease) before it runs out; jobs
+    whose lease expires go back to the queue, so a crashed worker's targets
+    are picked up by another. After max_attempts leases a job is marked
+    failed. Finished jobs carry their result as JSON until the coordinator
+    collects them. Any process that can open the database file can take
+    part, which covers one host or a filesystem with working SQLite locks
+    """
+    
+    def __init__(self, path=None, lease_seconds=None, max_attempts=None):
+        self.path = path or Config.QUEUE_PATH
+        self.lease_seconds = lease_seconds or Config.QUEUE_LEASE_SECONDS
+        self.max_attempts = max(1, max_attempts or Config.QUEUE_MAX_ATTEMPTS)
+        self._lock = threading.Lock()
+        
+        # Autocommit mode, so lease() can take the write lock up front with BEGIN IMMEDIATE
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id INTEGER PRIMARY KEY, "
+            "run TEXT NOT NULL, "
+            "target TEXT NOT NULL, "
+            "status TEXT NOT NULL DEFAULT 'queued', "
+            "attempts INTEGER NOT NULL DEFAULT 0, "
+            "lease_until REAL, "
+            "worker TEXT, "
+            "error TEXT, "
+            "result TEXT, "
+            "collected INTEGER NOT NULL DEFAULT 0, "
+            "UNIQUE (run, target))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (run, status, lease_until)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_collect ON jobs (run, collected, status)")
+    
+    def _transaction(self, work):
+        """Run work(conn) inside one write transaction"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = work(self._conn)
+                self._conn.execute("COMMIT")
+                return result
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+    
+    def submit(self, targets, run="default", batch_size=1000):
+        """Queue targets for a run; targets already in the run are ignored. Returns the number added"""
+        added = 0
+        batch = []
+        
+        def insert(conn):
+            before = conn.total_changes
+            conn.executemany("INSERT OR IGNORE INTO jobs (run, target) VALUES (?, ?)", batch)
+            return conn.total_changes - before
+        
+        for target in targets:
+            batch.append((run, target))
+            if len(batch) >= batch_size:
+                added += self._transaction(insert)
+                batch = []
+        
+        if batch:
+            added += self._transaction(insert)
+        
+        return added
+    
+    def lease(self, run, worker, count):
+        """
+        Lease up to count jobs for worker: queued ones, or leased ones whose
+        lease has expired. Returns [(job id, target)]
+        """
+        def take(conn):
+            now = time.time()
+            self._expire(conn, run, now)
+            
+            rows = conn.execute(
+                "SELECT id, target FROM jobs WHERE run = ? AND "
+                "(status = 'queued' OR (status = 'leased' AND lease_until < ?)) "
+                "ORDER BY id LIMIT ?",
+                (run, now, count)
+            ).fetchall()
+            
+            conn.executemany(
+                "UPDATE jobs SET status = 'leased', attempts = attempts + 1, lease_until = ?, worker = ? "
+                "WHERE id = ?",
+                [(now + self.lease_seconds, worker, job_id) for job_id, _ in rows]
+            )
+            return rows
+        
+        return self._transaction(take)
+    
+    def _expire(self, conn, run, now):
+        """Fail jobs whose last allowed lease has run out"""
+        conn.execute(
+            "UPDATE jobs SET status = 'failed', error = 'lease expired after ' || attempts || ' attempt(s)' "
+            "WHERE run = ? AND status = 'leased' AND lease_until < ? AND attempts >= ?",
+            (run, now, self.max_attempts)
+        )
+    
+    def extend(self, worker, job_ids):
+        """Push out the lease on jobs this worker still holds"""
+        until = time.time() + self.lease_seconds
+        
+        self._transaction(lambda conn: conn.executemany(
+            "UPDATE jobs SET lease_until = ? WHERE id = ? AND worker = ? AND status = 'leased'",
+            [(until, job_id, worker) for job_id in job_ids]
+        ))
+    
+    def complete(self, worker, results):
+        """
+        Record finished jobs: results is [(job id, result dict)]
+        Only jobs still leased to this worker are updated, so a worker that
+        lost its lease cannot overwrite the result of the one that took over
+        """
+        self._transaction(lambda conn: conn.executemany(
+            "UPDATE jobs SET status = 'done', result = ?, error = ?, lease_until = NULL "
+            "WHERE id = ? AND worker = ? AND status = 'leased'",
+            [
+                (json.dumps(result, default=str), result.get("error"), job_id, worker)
+                for job_id, result in results
+            ]
+        ))
+    
+    def release(self, worker, job_ids, error=None):
+        """Give leased jobs back for another attempt (or fail them if out of attempts)"""
+        self._transaction(lambda conn: conn.executemany(
+            "UPDATE jobs SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'queued' END, "
+            "error = ?, lease_until = NULL WHERE id = ? AND worker = ? AND status = 'leased'",
+            [(self.max_attempts, error, job_id, worker) for job_id in job_ids]
+        ))
+    
+    def collect(self, run, limit=500):
+        """
+        Take finished (done or failed) results not collected yet, marking them collected
+        Failed jobs yield a result with no findings and the failure as error
+        """
+        def take(conn):
+            self._expire(conn, run, time.time())
+            
+            rows = conn.execute(
+                "SELECT id, target, status, error, result FROM jobs "
+                "WHERE run = ? AND collected = 0 AND status IN ('done', 'failed') LIMIT ?",
+                (run, limit)
+            ).fetchall()
+            
+            # The coordinator stores results itself; drop the copy here
+            conn.executemany(
+                "UPDATE jobs SET collected = 1, result = NULL WHERE id = ?",
+                [(row[0],) for row in rows]
+            )
+            return rows
+        
+        results = []
+        for _, target, status, error, result in self._transaction(take):
+            if status == "done":
+                results.append(json.loads(result))
+            else:
+                results.append({
+                    "target": target,
+                    "type": Utils.classify_target(target),
+                    "findings": None,
+                    "error": error
+                })
+        
+        return results
+    
+    def progress(self, run):
+        """Job counts by status for a run, plus how many finished jobs await collection"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT status, COUNT(*), SUM(collected = 0) FROM jobs WHERE run = ? GROUP BY status",
+                (run,)
+            ).fetchall()
+        
+        counts = {"queued": 0, "leased": 0, "done": 0, "failed": 0, "uncollected": 0}
+        for status, count, uncollected in rows:
+            counts[status] = count
+            if status in ("done", "failed"):
+                counts["uncollected"] += uncollected or 0
+        
+        return counts
+    
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+class QueueWorker:
+    """
+    Pull batches from a WorkQueue and scan them with a BulkScanner
+    Leases are extended while a batch is in progress and results are
+    completed in groups, so a worker holds the write lock only briefly
+    """
+    
+    def __init__(self, framework, queue, run="default", worker_id=None, batch_size=None, concurrency=None):
+        self.framework = framework
+        self.queue = queue
+        self.run_name = run
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.batch_size = max(1, batch_size or Config.QUEUE_BATCH_SIZE)
+        self.concurrency = concurrency
+        self.stats = {"batches": 0, "jobs": 0, "errors": 0, "released": 0}
+    
+    async def run(self, idle_seconds=None):
+        """
+        Work until the run is drained: nothing queued or leased by other
+        workers for idle_seconds (so workers may start before the coordinator)
+        """
+        idle_seconds = Config.QUEUE_IDLE_SECONDS if idle_seconds is None else idle_seconds
+        idle_since = time.monotonic()
+        
+        while True:
+            jobs = await Utils.run_blocking(self.queue.lease, self.run_name, self.worker_id, self.batch_size)
+            
+            if not jobs:
+                progress = await Utils.run_blocking(self.queue.progress, self.run_name)
+                if progress["leased"]:
+                    # Other workers' leases may yet expire back to the queue
+                    idle_since = time.monotonic()
+                elif time.monotonic() - idle_since >= idle_seconds:
+                    break
+                
+                await asyncio.sleep(Config.QUEUE_POLL_SECONDS)
+                continue
+            
+            self.stats["batches"] += 1
+            await self._scan_batch(jobs)
+            idle_since = time.monotonic()
+        
+        logger.info(
+            f"Worker {self.worker_id} finished: {self.stats['jobs']} job(s) in "
+            f"{self.stats['batches']} batch(es)"
+        )
+    
+    async def _scan_batch(self, jobs):
+        """Scan one leased batch, completing results as they finish"""
+        ids = {}
+        for job_id, target in jobs:
+            ids.setdefault(target, []).append(job_id)
+        
+        open_ids = {job_id for job_id, _ in jobs}
+        finished = []
+        heartbeat = asyncio.ensure_future(self._heartbeat(open_ids))
+        scanner = BulkScanner(self.framework, concurrency=self.concurrency)
+        
+        try:
+            async for result in scanner.scan(job[1] for job in jobs):
+                for job_id in ids.get(result["target"], []):
+                    finished.append((job_id, result))
+                    open_ids.discard(job_id)
+                
+                self.stats["jobs"] += 1
+                if result["error"]:
+                    self.stats["errors"] += 1
+                
+                if len(finished) >= Config.QUEUE_COMPLETE_BATCH:
+                    await Utils.run_blocking(self.queue.complete, self.worker_id, finished)
+                    finished = []
+            
+            if finished:
+                await Utils.run_blocking(self.queue.complete, self.worker_id, finished)
+            
+            # Duplicates the scanner dropped, or anything it never answered
+            if open_ids:
+                self.stats["released"] += len(open_ids)
+                await Utils.run_blocking(self.queue.release, self.worker_id, list(open_ids), "not scanned")
+        
+        finally:
+            heartbeat.cancel()
+    
+    async def _heartbeat(self, open_ids):
+        """Extend the lease on unfinished jobs well before it runs out"""
+        while True:
+            await asyncio.sleep(self.queue.lease_seconds / 3)
+            if open_ids:
+                await Utils.run_blocking(self.queue.extend, self.worker_id, list(open_ids))
@@ -3,21 +3,72 @@ ShadowRecon Main Entry Point
 Interactive CLI for OSINT framework
 """
 
+import argparse
 import asyncio
+import functools
+import json
 import sys
+import time
 import logging
 from config import Config, logger
-from modules import UsernameRecon, DomainRecon, IPRecon, EmailRecon, ReputationRecon
-from report import ReportGenerator
+from modules import (
+    UsernameRecon, DomainRecon, IPRecon, EmailRecon, ReputationRecon, build_recon_pipeline
+)
+from report import ReportGenerator, ColumnarSink
+from report.columnar import ARROW_AVAILABLE
+from engine import (
+    BulkScanner, CheckpointJournal, DNSEngine, HTTPClient, PortScanner, QueueWorker, RateLimiter,
+    ResultCache, ScanHistory, ShardedScanner, SingleFlight, SubdomainEnumerator, TLSHarvester, WorkQueue
+)
+from engine.targets import TargetExpander
 from utils import Utils
 
 class ShadowRecon:
     """Main OSINT framework controller"""
     
-    def __init__(self):
-        self.reporter = ReportGenerator()
+    def __init__(self, report_sink=None, export=None, store=True):
+        """store: False only scans (worker processes leave storing to the parent)"""
+        exporters = [ColumnarSink(format=export)] if export and store else None
+        self.reporter = ReportGenerator(sink=report_sink, exporters=exporters) if store else None
+        self.history = ScanHistory.default() if Config.HISTORY_ENABLED and store else None
+        self.pipeline = build_recon_pipeline()
         self.logger = logger
     
+    async def _save(self, target, findings, scan_type):
+        """Write the report and append the scan to the history store (off the event loop)"""
+        if self.reporter is None:
+            return
+        
+        self.reporter.save_report(target, findings, scan_type)
+        
+        if self.history is not None:
+            await Utils.run_blocking(self._record, target, findings, scan_type)
+    
+    def _store(self, target, findings, scan_type):
+        """_save() for callers outside the event loop (blocking)"""
+        if self.reporter is None:
+            return
+        
+        self.reporter.save_report(target, findings, scan_type)
+        
+        if self.history is not None:
+            self._record(target, findings, scan_type)
+    
+    def _record(self, target, findings, scan_type):
+        """Append a scan to the history store (blocking: SQLite may wait on its lock)"""
+        try:
+            self.history.add(target, scan_type, findings)
+        except Exception as e:
+            self.logger.error(f"Failed to record scan history: {str(e)}")
+    
+    def close(self):
+        """Flush report sinks and pending history writes"""
+        if self.reporter is not None:
+            self.reporter.close()
+        
+        if self.history is not None:
+            self.history.flush()
+    
     async def recon_username(self, username):
         """Execute username reconnaissance"""
         try:
@@ -34,8 +85,8 @@ class ShadowRecon:
                 "risk_level": "MINIMAL"
             }
             
-            # Save report
-            self.reporter.save_report(username, findings, "username")
+            # Save report and record it in the scan history
+            await self._save(username, findings, "username")
             
             return findings
         
@@ -43,26 +94,34 @@ class ShadowRecon:
             self.logger.error(f"Username recon error: {str(e)}")
             return {"error": str(e)}
     
-    def recon_domain(self, domain):
-        """Execute domain reconnaissance"""
+    async def recon_domain(self, domain):
+        """Execute domain reconnaissance, following the hosting IP into IP recon"""
         try:
             recon = DomainRecon(domain)
-            findings = recon.recon()
             
-            # Add reputation check
-            try:
-                rep = ReputationRecon(domain, 'domain')
-                reputation = rep.recon()
-                findings["reputation"] = reputation
-            except:
-                pass
+            # Every lookup starts as soon as its inputs resolve: WHOIS, DNS, TLS
+            # and reputation right away, IP lookups once the A record is in
+            outputs = ["domain_findings", "vt_domain"]
+            if Config.FOLLOW_HOSTING_IP:
+                outputs += ["ip_findings", "vt_ip"]
+            
+            values = await self.pipeline.run(outputs, domain=recon.domain)
+            findings = values["domain_findings"]
+            
+            if values["vt_domain"] is not None:
+                findings["reputation"] = values["vt_domain"]
+            
+            if values.get("ip_findings") is not None:
+                findings["hosting"] = values["ip_findings"]
+                if values["vt_ip"] is not None:
+                    findings["hosting"]["reputation"] = values["vt_ip"]
             
             # Calculate risk score
             findings["risk_score"] = Utils.calculate_risk_score(findings)
             findings["risk_level"] = Utils.get_risk_level(findings["risk_score"])
             
-            # Save report
-            self.reporter.save_report(domain, findings, "domain")
+            # Save report and record it in the scan history
+            await self._save(domain, findings, "domain")
             
             return findings
         
@@ -70,22 +129,20 @@ class ShadowRecon:
             self.logger.error(f"Domain recon error: {str(e)}")
             return {"error": str(e)}
     
-    def recon_ip(self, ip):
+    async def recon_ip(self, ip):
         """Execute IP reconnaissance"""
         try:
             recon = IPRecon(ip)
-            findings = recon.recon()
             
-            # Add reputation check
-            try:
-                rep = ReputationRecon(ip, 'ip')
-                reputation = rep.recon()
-                findings["reputation"] = reputation
-            except:
-                pass
+            # Shares lookups with domains hosted on the same IP
+            values = await self.pipeline.run(["ip_findings", "vt_ip"], ip=recon.ip)
+            findings = values["ip_findings"]
+            
+            if values["vt_ip"] is not None:
+                findings["reputation"] = values["vt_ip"]
             
-            # Save report
-            self.reporter.save_report(ip, findings, "ip")
+            # Save report and record it in the scan history
+            await self._save(ip, findings, "ip")
             
             return findings
         
@@ -93,11 +150,11 @@ class ShadowRecon:
             self.logger.error(f"IP recon error: {str(e)}")
             return {"error": str(e)}
     
-    def recon_email(self, email):
+    async def recon_email(self, email):
         """Execute email reconnaissance"""
         try:
             recon = EmailRecon(email)
-            findings = recon.recon()
+            findings = await recon.recon_async()
             
             # Calculate risk
             if findings["hibp"]["breach_status"] == "BREACHED":
@@ -107,8 +164,8 @@ class ShadowRecon:
                 findings["risk_score"] = 10
                 findings["risk_level"] = "MINIMAL"
             
-            # Save report
-            self.reporter.save_report(email, findings, "email")
+            # Save report and record it in the scan history
+            await self._save(email, findings, "email")
             
             return findings
         
@@ -195,99 +252,627 @@ def get_input(prompt, validation_func=None):
         
         return user_input
 
-async def main():
-    """Main application loop"""
-    framework = ShadowRecon()
+def parse_args(argv=None):
+    """Parse command-line arguments"""
+    parser = argparse.ArgumentParser(
+        description="ShadowRecon - Advanced OSINT Framework"
+    )
+    parser.add_argument(
+        "--bulk", metavar="FILE",
+        help="Non-interactive bulk mode: scan targets from FILE ('-' for stdin)"
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=Config.BULK_CONCURRENCY,
+        help=f"Targets scanned in parallel in bulk mode (default: {Config.BULK_CONCURRENCY})"
+    )
+    parser.add_argument(
+        "--processes", type=int, default=Config.BULK_PROCESSES,
+        help=f"Worker processes for bulk mode, each scanning --concurrency targets (default: {Config.BULK_PROCESSES})"
+    )
+    parser.add_argument(
+        "--resume", action="store_true",
+        help="Continue an interrupted bulk run: skip targets already done, retry failed ones"
+    )
+    parser.add_argument(
+        "--checkpoint", metavar="FILE", default=Config.CHECKPOINT_PATH,
+        help=f"Checkpoint journal for bulk mode and --resume (default: {Config.CHECKPOINT_PATH})"
+    )
+    parser.add_argument(
+        "--coordinator", metavar="FILE",
+        help="Queue targets from FILE for --worker processes and store their results"
+    )
+    parser.add_argument(
+        "--worker", action="store_true",
+        help="Scan targets from the work queue until it is drained"
+    )
+    parser.add_argument(
+        "--queue", metavar="PATH", default=Config.QUEUE_PATH,
+        help=f"Work queue database for --coordinator/--worker (default: {Config.QUEUE_PATH})"
+    )
+    parser.add_argument(
+        "--run", default="default",
+        help="Work queue run name, to keep separate scans apart (default: default)"
+    )
+    parser.add_argument(
+        "--incremental", action="store_true",
+        help="With --bulk: reuse still-fresh cached sources and report only what changed since the last scan"
+    )
+    parser.add_argument(
+        "--subdomains", metavar="DOMAIN",
+        help="Enumerate subdomains of DOMAIN using --wordlist"
+    )
+    parser.add_argument(
+        "--wordlist", metavar="FILE",
+        help="Wordlist of subdomain labels, one per line"
+    )
+    parser.add_argument(
+        "--dns-concurrency", type=int, default=Config.SUBDOMAIN_CONCURRENCY,
+        help=f"DNS queries in flight during enumeration (default: {Config.SUBDOMAIN_CONCURRENCY})"
+    )
+    parser.add_argument(
+        "--scan-found", action="store_true",
+        help="Feed discovered subdomains and their IPs into the bulk scanner"
+    )
+    parser.add_argument(
+        "--tls-sweep", metavar="FILE",
+        help="Harvest TLS certificates from host[:port] lines in FILE ('-' for stdin)"
+    )
+    parser.add_argument(
+        "--follow-sans", action="store_true",
+        help="Also probe certificate SAN names that fall under the swept domains"
+    )
+    parser.add_argument(
+        "--portscan", metavar="FILE",
+        help="TCP connect scan of hosts, IPs, CIDRs or ranges in FILE ('-' for stdin)"
+    )
+    parser.add_argument(
+        "--ports", default=Config.PORTSCAN_PORTS,
+        help=f"Ports to scan: top100, top1000 or a list like 22,80,8000-8100 (default: {Config.PORTSCAN_PORTS})"
+    )
+    parser.add_argument(
+        "--usernames", metavar="FILE",
+        help="Check every username (or person's name with --permutations) in FILE ('-' for stdin)"
+    )
+    parser.add_argument(
+        "--permutations", action="store_true",
+        help="Also check username forms of each name, e.g. jdoe, john.doe, johndoe99"
+    )
+    parser.add_argument(
+        "--benchmark", metavar="SIZES",
+        help="With --usernames: time the batch at each comma-separated pool size, e.g. 25,50,100,200"
+    )
+    parser.add_argument(
+        "--report-sink", choices=["json", "ndjson"], default=Config.REPORT_SINK,
+        help=f"Report output: one JSON file per target, or rotating NDJSON streams (default: {Config.REPORT_SINK})"
+    )
+    parser.add_argument(
+        "--export", choices=["parquet", "arrow"],
+        help="Also write findings as typed columnar tables (needs pyarrow)"
+    )
+    parser.add_argument(
+        "--history", nargs="?", const="*", metavar="TARGET",
+        help="Query the scan history for TARGET (or all targets), newest first"
+    )
+    parser.add_argument(
+        "--latest", metavar="TARGET",
+        help="Print the most recent stored scan of TARGET, with findings"
+    )
+    parser.add_argument(
+        "--changes", metavar="TARGET",
+        help="Print what changed between consecutive stored scans of TARGET"
+    )
+    parser.add_argument(
+        "--type", choices=["domain", "ip", "email", "username"],
+        help="History filter: scan type"
+    )
+    parser.add_argument(
+        "--risk-level", metavar="LEVEL",
+        help="History filter: risk level (e.g. HIGH, CRITICAL)"
+    )
+    parser.add_argument(
+        "--since", metavar="TIME",
+        help="History filter: ISO date/time or age like 30d, 12h"
+    )
+    parser.add_argument(
+        "--until", metavar="TIME",
+        help="History filter: ISO date/time or age like 30d, 12h"
+    )
+    parser.add_argument(
+        "--limit", type=int, default=100,
+        help="Maximum history rows (default: 100)"
+    )
+    parser.add_argument(
+        "--full", action="store_true",
+        help="Include full findings in --history output"
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true",
+        help="Bypass the on-disk result cache entirely"
+    )
+    parser.add_argument(
+        "--refresh", action="store_true",
+        help="Ignore cached results but store fresh ones"
+    )
+    return parser.parse_args(argv)
+
+def _print_bulk_result(result, args):
+    """Stream one bulk result as a JSON line (only new/changed/failed when incremental)"""
+    if not args.incremental:
+        print(json.dumps(result, default=str), flush=True)
+    elif result.get("changes") != []:
+        # Only new, changed or failed targets; full findings are in the reports
+        result.pop("findings", None)
+        print(json.dumps(result, default=str), flush=True)
+
+def _print_bulk_summary(stats, shared, args):
+    """Bulk run totals on stderr"""
+    print(
+        f"Scanned {stats['completed']} target(s) in {stats['elapsed']}s "
+        f"({stats['targets_per_second']} targets/s, {stats['errors']} error(s), "
+        f"{stats['skipped']} skipped, {shared} duplicate lookup(s) shared)",
+        file=sys.stderr
+    )
     
-    print("\n🚀 Starting ShadowRecon OSINT Framework...")
-    print(f"📝 Logs saved to: {Config.LOG_FILE}")
-    print(f"📊 Reports saved to: scans/")
+    if args.incremental:
+        print(
+            f"Incremental: {stats['changed']} changed, {stats['unchanged']} unchanged, "
+            f"{stats['new']} new; {stats['sources_fetched']} source lookup(s) fetched, "
+            f"{stats['sources_cached']} reused from cache",
+            file=sys.stderr
+        )
+
+def _open_journal(args):
+    """Checkpoint journal for a bulk run, or None when checkpointing is off"""
+    if not Config.CHECKPOINT_ENABLED:
+        return None
     
-    while True:
-        show_menu()
-        choice = input("Select option (0-5): ").strip()
-        
-        if choice == "0":
-            print("\n✅ Exiting ShadowRecon. Thank you!")
-            break
-        
-        elif choice == "1":
-            # Username Recon
-            username = get_input("\n👤 Enter username: ")
-            print("\n⏳ Checking platforms (async)...")
-            
-            results = await framework.recon_username(username)
-            framework.display_results(results, f"Username Reconnaissance: {username}")
-            
-            summary = results.get("summary", {})
-            print(f"\n📊 Found on {summary.get('found_count', 0)} platform(s)")
+    try:
+        return CheckpointJournal(args.checkpoint, resume=args.resume)
+    except FileExistsError as e:
+        print(str(e), file=sys.stderr)
+        sys.exit(2)
+
+def _print_resume_summary(journal):
+    """What --resume saved, on stderr"""
+    if journal is not None and (journal.stats["skipped"] or journal.stats["reused"]):
+        print(
+            f"Resumed from {journal.path}: {journal.stats['skipped']} target(s) already done, "
+            f"{journal.stats['reused']} lookup(s) reused",
+            file=sys.stderr
+        )
+
+async def run_bulk(args):
+    """Scan a target list non-interactively, streaming one JSON line per result"""
+    journal = _open_journal(args)
+    framework = ShadowRecon(report_sink=args.report_sink, export=args.export)
+    scanner = BulkScanner(framework, concurrency=args.concurrency, incremental=args.incremental, journal=journal)
+    
+    targets = BulkScanner.read_targets(args.bulk)
+    completed = False
+    
+    try:
+        async for result in scanner.scan(targets):
+            _print_bulk_result(result, args)
+        flights = SingleFlight.for_running_loop().stats
+        completed = True
+    finally:
+        # Reports first, so the journal never gets ahead of what was saved
+        framework.close()
+        if journal is not None:
+            if completed:
+                journal.finish()
+            await Utils.run_blocking(journal.close)
+        await HTTPClient.close()
+        DNSEngine.close_default()
+    
+    shared = flights["shared"] + framework.pipeline.stats["shared"] + framework.pipeline.stats["memo_hits"]
+    _print_bulk_summary(scanner.stats, shared, args)
+    _print_resume_summary(journal)
+
+def _shard_framework(cache_enabled, refresh, rate_limit_path):
+    """Framework for a --processes worker: scans only, the parent stores results"""
+    ResultCache.configure(enabled=cache_enabled, refresh=refresh)
+    RateLimiter.configure(shared_path=rate_limit_path)
+    return ShadowRecon(store=False)
+
+def run_bulk_sharded(args):
+    """Bulk mode spread over --processes worker processes"""
+    journal = _open_journal(args)
+    framework = ShadowRecon(report_sink=args.report_sink, export=args.export)
+    scanner = ShardedScanner(
+        framework,
+        functools.partial(_shard_framework, ResultCache.enabled, ResultCache.refresh, Config.RATE_LIMIT_PATH),
+        processes=args.processes,
+        concurrency=args.concurrency,
+        incremental=args.incremental,
+        journal=journal
+    )
+    
+    completed = False
+    
+    try:
+        for result in scanner.scan(BulkScanner.read_targets(args.bulk)):
+            _print_bulk_result(result, args)
+        completed = True
+    finally:
+        framework.close()
+        if journal is not None:
+            if completed:
+                journal.finish()
+            journal.close()
+    
+    _print_bulk_summary(scanner.stats, scanner.stats["shared_lookups"], args)
+    _print_resume_summary(journal)
+    
+    if scanner.stats["worker_failures"]:
+        print(f"{scanner.stats['worker_failures']} worker process(es) died; see the log", file=sys.stderr)
+
+def run_coordinator(args):
+    """Queue a target list for --worker processes, storing and streaming their results"""
+    queue = WorkQueue(args.queue)
+    framework = ShadowRecon(report_sink=args.report_sink, export=args.export)
+    expander = TargetExpander()
+    stats = BulkScanner.empty_stats()
+    started = time.monotonic()
+    
+    try:
+        added = queue.submit(expander.expand(BulkScanner.read_targets(args.coordinator)), args.run)
+        print(f"Queued {added} new target(s) for run '{args.run}' in {args.queue}", file=sys.stderr)
         
-        elif choice == "2":
-            # Domain Recon
-            domain = get_input("\n🌐 Enter domain: ", Utils.validate_domain)
-            print("\n⏳ Gathering domain intelligence...")
+        while True:
+            results = queue.collect(args.run)
             
-            results = framework.recon_domain(domain)
-            framework.display_results(results, f"Domain Reconnaissance: {domain}")
-        
-        elif choice == "3":
-            # IP Recon
-            ip = get_input("\n🖥️  Enter IP address: ", Utils.validate_ip)
-            print("\n⏳ Analyzing IP address...")
+            for result in results:
+                if result["findings"] is not None and not result["error"]:
+                    framework._store(result["target"], result["findings"], result["type"])
+                BulkScanner.tally(stats, result)
+                _print_bulk_result(result, args)
             
-            results = framework.recon_ip(ip)
-            framework.display_results(results, f"IP Reconnaissance: {ip}")
+            if not results:
+                progress = queue.progress(args.run)
+                if not (progress["queued"] or progress["leased"] or progress["uncollected"]):
+                    break
+                time.sleep(Config.QUEUE_POLL_SECONDS)
+    finally:
+        framework.close()
+        queue.close()
+    
+    stats["duplicates"] = expander.duplicates
+    stats["elapsed"] = round(time.monotonic() - started, 3)
+    if stats["elapsed"] > 0:
+        stats["targets_per_second"] = round(stats["completed"] / stats["elapsed"], 2)
+    _print_bulk_summary(stats, 0, args)
+
+async def run_worker(args):
+    """Scan jobs from the work queue; results go back to the coordinator"""
+    # Budgets live in the queue database, so the whole fleet shares one limit per API
+    RateLimiter.configure(shared_path=args.queue)
+    queue = WorkQueue(args.queue)
+    framework = ShadowRecon(store=False)
+    worker = QueueWorker(framework, queue, args.run, concurrency=args.concurrency)
+    
+    try:
+        await worker.run()
+    finally:
+        framework.close()
+        queue.close()
+        await HTTPClient.close()
+        DNSEngine.close_default()
+    
+    stats = worker.stats
+    print(
+        f"Worker {worker.worker_id}: {stats['jobs']} job(s) in {stats['batches']} batch(es), "
+        f"{stats['errors']} error(s)",
+        file=sys.stderr
+    )
+
+async def run_subdomains(args):
+    """Enumerate subdomains, streaming finds (or their full scans) as JSON lines"""
+    enumerator = SubdomainEnumerator(args.subdomains, concurrency=args.dns_concurrency)
+    words = SubdomainEnumerator.read_wordlist(args.wordlist)
+    
+    try:
+        if args.scan_found:
+            framework = ShadowRecon(report_sink=args.report_sink, export=args.export)
+            scanner = BulkScanner(framework, concurrency=args.concurrency)
+            try:
+                async for result in scanner.scan(enumerator.discovered_targets(words)):
+                    print(json.dumps(result, default=str), flush=True)
+            finally:
+                framework.close()
+        else:
+            async for found in enumerator.enumerate(words):
+                print(json.dumps(found), flush=True)
+    finally:
+        await HTTPClient.close()
+        DNSEngine.close_default()
+    
+    stats = enumerator.stats
+    print(
+        f"Enumerated {stats['candidates']} candidate(s) for {args.subdomains}: "
+        f"{stats['found']} found, {stats['wildcard_filtered']} wildcard hit(s) filtered, "
+        f"{stats['names_per_second']} names/s",
+        file=sys.stderr
+    )
+
+async def run_tls_sweep(args):
+    """Probe TLS endpoints concurrently, streaming certificate details as JSON lines"""
+    harvester = TLSHarvester.default()
+    swept = set()
+    
+    def endpoints():
+        for line in BulkScanner.read_targets(args.tls_sweep):
+            host, port = TLSHarvester.parse_endpoint(line, default_port=None)
+            swept.add(host)
+            for port in [port] if port else Config.TLS_PORTS:
+                yield host, port
+    
+    # SANs are followed only within the hosts listed in the sweep input
+    scope = swept if args.follow_sans else None
+    
+    try:
+        async for result in harvester.probe_many(endpoints(), scope=scope):
+            print(json.dumps(result, default=str), flush=True)
+    finally:
+        await HTTPClient.close()
+        DNSEngine.close_default()
+    
+    stats = harvester.stats
+    print(
+        f"Probed {stats['probed']} endpoint(s) in {stats['elapsed']}s "
+        f"({stats['endpoints_per_second']}/s, {stats['handshakes']} handshake(s), "
+        f"{stats['errors']} error(s), {stats['cert_cache_hits']} certificate cache hit(s))",
+        file=sys.stderr
+    )
+
+async def run_portscan(args):
+    """Scan hosts for open TCP ports, streaming hosts with open ports as JSON lines"""
+    scanner = PortScanner(ports=args.ports)
+    hosts = TargetExpander().expand(BulkScanner.read_targets(args.portscan))
+    
+    async for result in scanner.scan_many(hosts):
+        if result["open_ports"] or result["error"]:
+            print(json.dumps(result), flush=True)
+    
+    stats = scanner.stats
+    print(
+        f"Scanned {stats['hosts']} host(s) x {len(scanner.ports)} port(s) in {stats['elapsed']}s: "
+        f"{stats['open']} open ({stats['attempts_per_second']} attempts/s)",
+        file=sys.stderr
+    )
+    if stats["unscanned"]:
+        print(
+            f"{stats['unscanned']} port(s) not scanned for lack of local sockets; "
+            f"lower PORTSCAN_CONCURRENCY or raise the open-file limit",
+            file=sys.stderr
+        )
+
+async def run_usernames(args):
+    """Check a list of usernames in one pooled run, streaming one JSON line per username"""
+    recon = UsernameRecon()
+    usernames = list(BulkScanner.read_targets(args.usernames))
+    
+    try:
+        async for username, results in recon.iter_usernames(usernames, permutations=args.permutations):
+            summary = recon.get_summary(results)
+            print(json.dumps({
+                "username": username,
+                "found_platforms": summary["found_platforms"],
+                "summary": summary,
+                "platforms_checked": results
+            }), flush=True)
+    finally:
+        await HTTPClient.close()
+        DNSEngine.close_default()
+    
+    stats = recon.stats
+    print(
+        f"Checked {stats['submitted']} username/platform pair(s) in {stats['elapsed']}s "
+        f"({stats['jobs_per_second']} checks/s, {stats['timeouts']} timeout(s), "
+        f"{stats['cancelled']} cancelled)",
+        file=sys.stderr
+    )
+
+async def run_username_benchmark(args, pool_sizes):
+    """Time the username batch at several pool sizes, one JSON line per size"""
+    recon = UsernameRecon()
+    usernames = list(BulkScanner.read_targets(args.usernames))
+    
+    try:
+        for row in await recon.benchmark(usernames, pool_sizes, permutations=args.permutations):
+            print(json.dumps(row), flush=True)
+            print(
+                f"pool {row['pool_size']:>5}: {row['requests']} requests in {row['elapsed']}s "
+                f"= {row['requests_per_second']} req/s",
+                file=sys.stderr
+            )
+    finally:
+        DNSEngine.close_default()
+
+def run_history(args):
+    """Answer history queries from the scan database, one JSON line per scan"""
+    history = ScanHistory.default()
+    started = time.perf_counter()
+    
+    try:
+        since = ScanHistory.parse_time(args.since)
+        until = ScanHistory.parse_time(args.until)
+    except ValueError as e:
+        print(str(e), file=sys.stderr)
+        sys.exit(2)
+    
+    try:
+        if args.latest:
+            scan = history.latest(args.latest, args.type, until=until)
+            rows = [scan] if scan else []
+        elif args.changes:
+            rows = history.changes(args.changes, args.type, since, until, args.limit)
+        elif args.history == "*":
+            rows = history.search(args.type, args.risk_level, since, until, args.limit)
+        else:
+            rows = history.history(args.history, args.type, since, until, args.limit, args.full)
         
-        elif choice == "4":
-            # Email Recon
-            email = get_input("\n📧 Enter email address: ", Utils.validate_email)
-            print("\n⏳ Checking email security databases...")
-            
-            results = framework.recon_email(email)
-            
-            # Enhanced email display
-            framework.display_results(results, f"Email Reconnaissance: {email}")
+        for row in rows:
+            print(json.dumps(row, default=str))
+    finally:
+        history.close()
+    
+    print(f"{len(rows)} scan(s) in {(time.perf_counter() - started) * 1000:.1f} ms", file=sys.stderr)
+
+async def main(args):
+    """Main application loop"""
+    framework = ShadowRecon(report_sink=args.report_sink, export=args.export)
+    
+    print("\n🚀 Starting ShadowRecon OSINT Framework...")
+    print(f"📝 Logs saved to: {Config.LOG_FILE}")
+    print(f"📊 Reports saved to: scans/")
+    
+    try:
+        while True:
+            show_menu()
+            choice = input("Select option (0-5): ").strip()
             
-            hibp = results.get("hibp", {})
-            if hibp.get("breach_status") == "BREACHED":
-                print(f"\n🚨 ALERT: Email found in {hibp.get('breach_count', 0)} breach(es):")
-                for breach in hibp.get("breaches", []):
-                    print(f"  - {breach.get('name')} ({breach.get('date')})")
-            else:
-                print("\n✅ No breaches detected in HaveIBeenPwned database")
-        
-        elif choice == "5":
-            # Reputation Check
-            print("\n🎯 Reputation & Threat Intelligence")
-            print("[1] Domain reputation")
-            print("[2] IP reputation")
+            if choice == "0":
+                print("\n✅ Exiting ShadowRecon. Thank you!")
+                await HTTPClient.close()
+                DNSEngine.close_default()
+                break
             
-            rep_choice = input("Select target type (1-2): ").strip()
+            elif choice == "1":
+                # Username Recon
+                username = get_input("\n👤 Enter username: ")
+                print("\n⏳ Checking platforms (async)...")
+                
+                results = await framework.recon_username(username)
+                framework.display_results(results, f"Username Reconnaissance: {username}")
+                
+                summary = results.get("summary", {})
+                print(f"\n📊 Found on {summary.get('found_count', 0)} platform(s)")
             
-            if rep_choice == "1":
+            elif choice == "2":
+                # Domain Recon
                 domain = get_input("\n🌐 Enter domain: ", Utils.validate_domain)
-                print("\n⏳ Checking threat intelligence...")
+                print("\n⏳ Gathering domain intelligence...")
                 
-                rep = ReputationRecon(domain, 'domain')
-                results = rep.recon()
-                framework.display_results(results, f"Reputation Check: {domain}")
-                print(f"\n{rep.get_threat_summary()['recommendation']}")
+                results = await framework.recon_domain(domain)
+                framework.display_results(results, f"Domain Reconnaissance: {domain}")
             
-            elif rep_choice == "2":
+            elif choice == "3":
+                # IP Recon
                 ip = get_input("\n🖥️  Enter IP address: ", Utils.validate_ip)
-                print("\n⏳ Checking threat intelligence...")
+                print("\n⏳ Analyzing IP address...")
                 
-                rep = ReputationRecon(ip, 'ip')
-                results = rep.recon()
-                framework.display_results(results, f"Reputation Check: {ip}")
-                print(f"\n{rep.get_threat_summary()['recommendation']}")
-        
-        else:
-            print("❌ Invalid option. Please try again.")
+                results = await framework.recon_ip(ip)
+                framework.display_results(results, f"IP Reconnaissance: {ip}")
+            
+            elif choice == "4":
+                # Email Recon
+                email = get_input("\n📧 Enter email address: ", Utils.validate_email)
+                print("\n⏳ Checking email security databases...")
+                
+                results = await framework.recon_email(email)
+                
+                # Enhanced email display
+                framework.display_results(results, f"Email Reconnaissance: {email}")
+                
+                hibp = results.get("hibp", {})
+                if hibp.get("breach_status") == "BREACHED":
+                    print(f"\n🚨 ALERT: Email found in {hibp.get('breach_count', 0)} breach(es):")
+                    for breach in hibp.get("breaches", []):
+                        print(f"  - {breach.get('name')} ({breach.get('date')})")
+                else:
+                    print("\n✅ No breaches detected in HaveIBeenPwned database")
+            
+            elif choice == "5":
+                # Reputation Check
+                print("\n🎯 Reputation & Threat Intelligence")
+                print("[1] Domain reputation")
+                print("[2] IP reputation")
+                
+                rep_choice = input("Select target type (1-2): ").strip()
+                
+                if rep_choice == "1":
+                    domain = get_input("\n🌐 Enter domain: ", Utils.validate_domain)
+                    print("\n⏳ Checking threat intelligence...")
+                    
+                    rep = ReputationRecon(domain, 'domain')
+                    results = await rep.recon_async()
+                    framework.display_results(results, f"Reputation Check: {domain}")
+                    print(f"\n{rep.get_threat_summary()['recommendation']}")
+                
+                elif rep_choice == "2":
+                    ip = get_input("\n🖥️  Enter IP address: ", Utils.validate_ip)
+                    print("\n⏳ Checking threat intelligence...")
+                    
+                    rep = ReputationRecon(ip, 'ip')
+                    results = await rep.recon_async()
+                    framework.display_results(results, f"Reputation Check: {ip}")
+                    print(f"\n{rep.get_threat_summary()['recommendation']}")
+            
+            else:
+                print("❌ Invalid option. Please try again.")
+    
+    finally:
+        # Flush buffered report streams, including on Ctrl+C
+        framework.close()
 
 if __name__ == "__main__":
+    args = parse_args()
+    ResultCache.configure(enabled=Config.CACHE_ENABLED and not args.no_cache, refresh=args.refresh)
+    
+    if args.export and not ARROW_AVAILABLE:
+        print("--export requires the pyarrow package (pip install pyarrow)", file=sys.stderr)
+        sys.exit(2)
+    
     try:
-        asyncio.run(main())
+        if args.history or args.latest or args.changes:
+            run_history(args)
+        elif args.subdomains:
+            if not args.wordlist:
+                print("--subdomains requires --wordlist", file=sys.stderr)
+                sys.exit(2)
+            asyncio.run(run_subdomains(args))
+        elif args.portscan:
+            try:
+                PortScanner.parse_ports(args.ports)
+            except ValueError as e:
+                print(f"--ports: {str(e)}", file=sys.stderr)
+                sys.exit(2)
+            asyncio.run(run_portscan(args))
+        elif args.tls_sweep:
+            asyncio.run(run_tls_sweep(args))
+        elif args.usernames:
+            if args.benchmark:
+                try:
+                    pool_sizes = [int(size) for size in args.benchmark.split(",") if size.strip()]
+                except ValueError:
+                    pool_sizes = []
+                if not pool_sizes or min(pool_sizes) < 1:
+                    print("--benchmark expects comma-separated positive pool sizes", file=sys.stderr)
+                    sys.exit(2)
+                asyncio.run(run_username_benchmark(args, pool_sizes))
+            else:
+                asyncio.run(run_usernames(args))
+        elif args.coordinator:
+            if args.incremental:
+                print("--incremental is not supported with --coordinator", file=sys.stderr)
+                sys.exit(2)
+            run_coordinator(args)
+        elif args.worker:
+            asyncio.run(run_worker(args))
+        elif args.bulk:
+            if args.resume and not Config.CHECKPOINT_ENABLED:
+                print("--resume needs CHECKPOINT_ENABLED", file=sys.stderr)
+                sys.exit(2)
+            if args.incremental and not (Config.HISTORY_ENABLED and ResultCache.enabled):
+                print("--incremental needs the scan history and result cache enabled", file=sys.stderr)
+                sys.exit(2)
+            if args.processes > 1:
+                run_bulk_sharded(args)
+            else:
+                asyncio.run(run_bulk(args))
+        else:
+            asyncio.run(main(args))
     except KeyboardInterrupt:
         print("\n\n⚠️  Framework terminated by user")
         sys.exit(0)
@@ -5,14 +5,17 @@ Core OSINT modules for data collection
 
 from .username import UsernameRecon
 from .domain import DomainRecon
-from .ip import IPRecon
+from .ip import IPRecon, GeoBatcher
 from .email import EmailRecon
 from .reputation import ReputationRecon
+from .pipeline import build_recon_pipeline
 
 __all__ = [
     'UsernameRecon',
     'DomainRecon',
     'IPRecon',
+    'GeoBatcher',
     'EmailRecon',
-    'ReputationRecon'
+    'ReputationRecon',
+    'build_recon_pipeline'
 ]
@@ -3,25 +3,19 @@ ShadowRecon Domain Reconnaissance Module
 WHOIS lookup, DNS resolution, SSL certificate details, hosting IP extraction
 """
 
+import asyncio
 import socket
 import logging
-import ssl
-import subprocess
-import json
-from datetime import datetime
 
-try:
-    import dns.resolver
-    DNS_AVAILABLE = True
-except ImportError:
-    DNS_AVAILABLE = False
-    
 try:
     import whois
     WHOIS_AVAILABLE = True
 except ImportError:
     WHOIS_AVAILABLE = False
 
+from engine import DNSEngine, HTTPClient, TLSHarvester, X509Parser, cached
+# The DNS engine's own dnspython check
+from engine.resolver import DNS_AVAILABLE
 from utils import Utils
 
 logger = logging.getLogger("ShadowRecon")
@@ -37,20 +31,40 @@ class DomainRecon:
         self.results = {}
     
     def recon(self):
-        """Execute full domain reconnaissance"""
+        """Execute full domain reconnaissance (blocking wrapper)"""
+        return HTTPClient.run_sync(self.recon_async())
+    
+    async def recon_async(self):
+        """
+        Execute full domain reconnaissance
+        All lookups run concurrently, so total time tracks the slowest one
+        """
         logger.info(f"Starting domain reconnaissance for: {self.domain}")
         
-        self.results = {
-            "domain": self.domain,
-            "timestamp": Utils.format_timestamp(),
-            "whois": self._get_whois(),
-            "dns": self._get_dns_records(),
-            "ssl": self._get_ssl_certificate(),
-            "hosting_ip": self._get_hosting_ip()
-        }
+        whois_data, dns_data, ssl_data, hosting_ip = await asyncio.gather(
+            Utils.run_blocking(self._get_whois),
+            self._get_dns_records(),
+            self._get_ssl_certificate(),
+            self._get_hosting_ip()
+        )
+        
+        self.results = self.build_findings(self.domain, whois_data, dns_data, ssl_data, hosting_ip)
         
         return self.results
     
+    @staticmethod
+    def build_findings(domain, whois_data, dns_data, ssl_data, hosting_ip):
+        """Assemble a domain report from its lookups (also used by the recon pipeline)"""
+        return {
+            "domain": domain,
+            "timestamp": Utils.format_timestamp(),
+            "whois": whois_data,
+            "dns": dns_data,
+            "ssl": ssl_data,
+            "hosting_ip": hosting_ip
+        }
+    
+    @cached("whois", "domain")
     def _get_whois(self):
         """Fetch WHOIS information"""
         if not WHOIS_AVAILABLE:
@@ -78,115 +92,104 @@ class DomainRecon:
             logger.warning(f"WHOIS lookup failed: {str(e)}")
             return {"error": str(e)}
     
-    def _get_dns_records(self):
-        """Resolve DNS records (A, MX, NS)"""
+    @cached("dns", "domain")
+    async def _get_dns_records(self):
+        """
+        Resolve DNS records concurrently
+        A, AAAA, MX, NS, TXT, CNAME, SOA and CAA plus DMARC and DKIM
+        """
         dns_data = {
             "a_records": [],
+            "aaaa_records": [],
             "mx_records": [],
             "ns_records": [],
-            "txt_records": []
+            "txt_records": [],
+            "cname_records": [],
+            "soa_records": [],
+            "caa_records": [],
+            "dmarc_records": [],
+            "dkim_records": {}
         }
         
         if not DNS_AVAILABLE:
             logger.warning("DNS resolver not available")
+            dns_data["error"] = "dnspython package not installed"
             return dns_data
         
         try:
-            # A Records (IPv4 addresses)
-            try:
-                a_answers = dns.resolver.resolve(self.domain, 'A')
-                dns_data["a_records"] = [str(rdata) for rdata in a_answers]
-            except:
-                pass
+            engine = DNSEngine.default()
             
-            # MX Records (Mail servers)
-            try:
-                mx_answers = dns.resolver.resolve(self.domain, 'MX')
-                dns_data["mx_records"] = [str(rdata) for rdata in mx_answers]
-            except:
-                pass
+            answers, email_auth = await asyncio.gather(
+                engine.resolve_all(self.domain),
+                engine.email_auth_records(self.domain)
+            )
             
-            # NS Records (Nameservers)
-            try:
-                ns_answers = dns.resolver.resolve(self.domain, 'NS')
-                dns_data["ns_records"] = [str(rdata) for rdata in ns_answers]
-            except:
-                pass
+            for rdtype, records in answers.items():
+                dns_data[f"{rdtype.lower()}_records"] = records
             
-            # TXT Records (SPF, DKIM, DMARC)
-            try:
-                txt_answers = dns.resolver.resolve(self.domain, 'TXT')
-                dns_data["txt_records"] = [str(rdata) for rdata in txt_answers]
-            except:
-                pass
+            dns_data["dmarc_records"] = email_auth["dmarc"]
+            dns_data["dkim_records"] = email_auth["dkim"]
             
             logger.debug(f"DNS resolution successful for {self.domain}")
         
         except Exception as e:
+            # An error key keeps a failed resolution out of the cache
             logger.warning(f"DNS resolution error: {str(e)}")
+            dns_data["error"] = str(e)
         
         return dns_data
     
-    def _get_ssl_certificate(self):
-        """Extract SSL certificate details"""
+    @cached("ssl", "domain")
+    async def _get_ssl_certificate(self):
+        """Fetch and parse the certificate served on port 443"""
+        logger.debug(f"Fetching SSL certificate for {self.domain}")
+        probe = await TLSHarvester.default().probe(self.domain, 443)
+        cert = probe["certificate"]
+        
         ssl_data = {
-            "has_ssl": False,
+            "has_ssl": probe["has_ssl"],
             "issuer": None,
             "subject": None,
             "valid_from": None,
             "valid_until": None,
             "valid": False,
-            "error": None
+            "error": probe["error"]
         }
         
-        try:
-            logger.debug(f"Fetching SSL certificate for {self.domain}")
-            
-            context = ssl.create_default_context()
-            context.check_hostname = False
-            context.verify_mode = ssl.CERT_NONE
-            
-            with socket.create_connection((self.domain, 443), timeout=10) as sock:
-                with context.wrap_socket(sock, server_hostname=self.domain) as ssock:
-                    cert = ssock.getpeercert()
-                    
-                    if cert:
-                        ssl_data["has_ssl"] = True
-                        
-                        # Extract subject
-                        subject = dict(x[0] for x in cert.get('subject', []))
-                        ssl_data["subject"] = subject.get('commonName', 'Unknown')
-                        
-                        # Extract issuer
-                        issuer = dict(x[0] for x in cert.get('issuer', []))
-                        ssl_data["issuer"] = issuer.get('commonName', 'Unknown')
-                        
-                        # Extract dates
-                        ssl_data["valid_from"] = cert.get('notBefore', 'Unknown')
-                        ssl_data["valid_until"] = cert.get('notAfter', 'Unknown')
-                        
-                        # Check validity
-                        ssl_data["valid"] = True
-        
-        except ssl.SSLError as e:
-            ssl_data["error"] = f"SSL Error: {str(e)}"
-            logger.debug(f"SSL error for {self.domain}: {str(e)}")
-        
-        except socket.timeout:
-            ssl_data["error"] = "Connection timeout"
-            logger.debug(f"SSL connection timeout for {self.domain}")
-        
-        except Exception as e:
-            ssl_data["error"] = str(e)
-            logger.debug(f"SSL certificate fetch error: {str(e)}")
+        if cert:
+            ssl_data.update({
+                "issuer": cert["issuer"],
+                "subject": cert["subject"],
+                "valid_from": cert["valid_from"],
+                "valid_until": cert["valid_until"],
+                "valid": X509Parser.is_current(cert),
+                "hostname_match": X509Parser.matches_hostname(cert, self.domain),
+                "self_signed": cert["self_signed"],
+                "sans": cert["sans"],
+                "key_type": cert["key_type"],
+                "key_size": cert["key_size"],
+                "signature_algorithm": cert["signature_algorithm"],
+                "fingerprint_sha256": cert["fingerprint_sha256"],
+                "tls_version": probe["tls_version"],
+                "chain": probe["chain"]
+            })
         
         return ssl_data
     
-    def _get_hosting_ip(self):
-        """Get hosting IP address"""
+    @cached("hosting_ip", "domain")
+    async def _get_hosting_ip(self):
+        """Get hosting IP address (shares the DNS engine's cached A answer)"""
         try:
             logger.debug(f"Resolving IP for {self.domain}")
-            ip = socket.gethostbyname(self.domain)
+            
+            if DNS_AVAILABLE:
+                a_records = await DNSEngine.default().query(self.domain, "A")
+                ip = a_records[0] if a_records else None
+            else:
+                ip = await Utils.run_blocking(socket.gethostbyname, self.domain)
+            
+            if ip is None:
+                raise socket.gaierror("no A records")
             
             return {
                 "ip": ip,
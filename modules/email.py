@@ -3,10 +3,10 @@ ShadowRecon Email Reconnaissance Module
 HaveIBeenPwned breach detection
 """
 
-import requests
+import asyncio
 import logging
-import time
 from config import Config
+from engine import DNSEngine, HTTPClient, cached
 from utils import Utils
 
 logger = logging.getLogger("ShadowRecon")
@@ -22,19 +22,32 @@ class EmailRecon:
         self.results = {}
     
     def recon(self):
-        """Execute full email reconnaissance"""
+        """Execute full email reconnaissance (blocking wrapper)"""
+        return HTTPClient.run_sync(self.recon_async())
+    
+    async def recon_async(self):
+        """
+        Execute full email reconnaissance
+        Breach lookup and MX validation run concurrently
+        """
         logger.info(f"Starting email reconnaissance for: {self.email}")
         
+        hibp, domain_valid = await asyncio.gather(
+            self._check_hibp(),
+            self._validate_email_domain()
+        )
+        
         self.results = {
             "email": self.email,
             "timestamp": Utils.format_timestamp(),
-            "hibp": self._check_hibp(),
-            "domain_valid": self._validate_email_domain()
+            "hibp": hibp,
+            "domain_valid": domain_valid
         }
         
         return self.results
     
-    def _check_hibp(self):
+    @cached("hibp", "email")
+    async def _check_hibp(self):
         """Check HaveIBeenPwned for email breaches"""
         hibp_data = {
             "breach_status": "SAFE",  # Default to safe
@@ -49,21 +62,18 @@ class EmailRecon:
             
             # HIBP API requires User-Agent header
             headers = {
-                'User-Agent': 'ShadowRecon-OSINT/1.0 (Educational Purpose)'
+                'User-Agent': Config.USER_AGENT
             }
             
             # Check for account breaches
-            response = requests.get(
+            async with HTTPClient.get(
                 f"https://haveibeenpwned.com/api/v3/breachedaccount/{self.email}",
-                headers=headers,
-                timeout=Config.REQUEST_TIMEOUT
-            )
-            
-            # Rate limiting
-            time.sleep(1.5)
+                headers=headers
+            ) as response:
+                status = response.status
+                breaches = await response.json(content_type=None) if status == 200 else []
             
-            if response.status_code == 200:
-                breaches = response.json()
+            if status == 200:
                 hibp_data["breaches"] = [
                     {
                         "name": b.get("Name"),
@@ -82,35 +92,33 @@ class EmailRecon:
                 else:
                     hibp_data["breach_status"] = "NO BREACHES"
             
-            elif response.status_code == 404:
+            elif status == 404:
                 hibp_data["breach_status"] = "NO BREACHES"
                 logger.debug(f"No breaches found for {self.email}")
             
-            elif response.status_code == 429:
+            elif status == 429:
                 hibp_data["error"] = "Rate limited by HIBP API"
                 logger.warning("HIBP rate limit reached")
             
-            elif response.status_code == 401:
+            elif status == 401:
                 hibp_data["error"] = "HIBP API key invalid or not configured"
             
             else:
-                hibp_data["error"] = f"HTTP {response.status_code}"
+                hibp_data["error"] = f"HTTP {status}"
             
             # Check for pwned passwords (requires User-Agent)
             if hibp_data["breach_status"] != "ERROR":
                 try:
-                    pwd_response = requests.get(
+                    async with HTTPClient.get(
                         f"https://haveibeenpwned.com/api/v3/pwnedpassword/{self.email}",
-                        headers=headers,
-                        timeout=Config.REQUEST_TIMEOUT
-                    )
-                    
-                    if pwd_response.status_code == 200:
-                        hibp_data["pwned_passwords"] = True
+                        headers=headers
+                    ) as pwd_response:
+                        if pwd_response.status == 200:
+                            hibp_data["pwned_passwords"] = True
                 except:
                     pass  # Optional check
         
-        except requests.Timeout:
+        except asyncio.TimeoutError:
             hibp_data["error"] = "HIBP request timeout"
             logger.warning(f"HIBP timeout for {self.email}")
         
@@ -120,7 +128,8 @@ class EmailRecon:
         
         return hibp_data
     
-    def _validate_email_domain(self):
+    @cached("email_domain", lambda self: self.email.split('@')[1])
+    async def _validate_email_domain(self):
         """Validate if email domain exists and has MX records"""
         domain_data = {
             "domain": self.email.split('@')[1],
@@ -130,18 +139,20 @@ class EmailRecon:
         }
         
         try:
-            import dns.resolver
-            
             domain = domain_data["domain"]
-            mx_records = dns.resolver.resolve(domain, 'MX')
+            mx_records = await DNSEngine.default().query(domain, "MX")
             
             if mx_records:
                 domain_data["valid"] = True
                 domain_data["has_mx_records"] = True
                 logger.debug(f"Email domain {domain} is valid")
+            else:
+                # A definite answer (NXDOMAIN or no MX), cached like any other
+                logger.debug(f"Email domain {domain} has no MX records")
         
-        except ImportError:
+        except RuntimeError:
             logger.debug("DNS module not available for domain validation")
+            domain_data["error"] = "dnspython package not installed"
         
         except Exception as e:
             domain_data["error"] = str(e)
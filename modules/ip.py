@@ -1,11 +1,13 @@
 """
 ShadowRecon IP Reconnaissance Module
-Geolocation, open ports/services (Shodan), ASN, organization, risk indicators
+Geolocation, open ports/services (Shodan or local scan), ASN, organization, risk indicators
 """
 
-import requests
+import asyncio
 import logging
+import weakref
 from config import Config
+from engine import HTTPClient, OfflineGeoDB, PortScanner, cached
 from utils import Utils
 
 logger = logging.getLogger("ShadowRecon")
@@ -21,62 +23,84 @@ class IPRecon:
         self.results = {}
     
     def recon(self):
-        """Execute full IP reconnaissance"""
+        """Execute full IP reconnaissance (blocking wrapper)"""
+        return HTTPClient.run_sync(self.recon_async())
+    
+    async def recon_async(self):
+        """
+        Execute full IP reconnaissance
+        Geolocation, Shodan, port scan, ASN and organization lookups run concurrently
+        """
         logger.info(f"Starting IP reconnaissance for: {self.ip}")
         
-        self.results = {
-            "ip": self.ip,
-            "timestamp": Utils.format_timestamp(),
-            "geolocation": self._get_geolocation(),
-            "shodan": self._get_shodan_data() if Config.ENABLE_SHODAN else None,
-            "asn": self._get_asn_info(),
-            "organization": self._get_organization(),
-        }
+        geolocation, shodan, portscan, asn, organization = await asyncio.gather(
+            self._get_geolocation(),
+            self._get_shodan_data() if Config.ENABLE_SHODAN else self._disabled(),
+            self._scan_ports() if Config.ENABLE_PORTSCAN else self._disabled(),
+            self._get_asn_info(),
+            self._get_organization()
+        )
+        
+        self.results = self.build_findings(self.ip, geolocation, shodan, portscan, asn, organization)
         
         return self.results
     
-    def _get_geolocation(self):
-        """Get geolocation from IP address"""
-        geo_data = {
-            "country": None,
-            "country_code": None,
-            "city": None,
-            "latitude": None,
-            "longitude": None,
-            "isp": None,
-            "timezone": None,
-            "error": None
+    @staticmethod
+    def build_findings(ip, geolocation, shodan, portscan, asn, organization):
+        """Assemble an IP report from its lookups (also used by the recon pipeline)"""
+        return {
+            "ip": ip,
+            "timestamp": Utils.format_timestamp(),
+            "geolocation": geolocation,
+            "shodan": shodan,
+            "portscan": portscan,
+            "asn": asn,
+            "organization": organization,
         }
+    
+    @staticmethod
+    async def _disabled():
+        """Placeholder result for lookups switched off in Config"""
+        return None
+    
+    async def _get_geolocation(self):
+        """Get geolocation from IP address, preferring the offline database"""
+        record = self._lookup_offline(Config.GEOIP_DB_PATH)
+        
+        if record and record.get("country_code"):
+            return {
+                "country": record["country"],
+                "country_code": record["country_code"],
+                "city": record["city"],
+                "latitude": record["latitude"],
+                "longitude": record["longitude"],
+                "isp": record["isp"],
+                "timezone": record["timezone"],
+                "error": None
+            }
+        
+        return await self._get_geolocation_online()
+    
+    @cached("geolocation", "ip")
+    async def _get_geolocation_online(self):
+        """Get geolocation from ip-api.com"""
+        if Config.GEO_BATCH_ENABLED:
+            return await GeoBatcher.for_running_loop().lookup(self.ip)
+        
+        geo_data = self._empty_geolocation()
         
         try:
             logger.debug(f"Fetching geolocation for {self.ip}")
             
             # Using ip-api.com (free tier available)
-            response = requests.get(
-                f"http://ip-api.com/json/{self.ip}",
-                timeout=Config.REQUEST_TIMEOUT
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                
-                if data.get('status') == 'success':
-                    geo_data = {
-                        "country": data.get('country'),
-                        "country_code": data.get('countryCode'),
-                        "city": data.get('city'),
-                        "latitude": data.get('lat'),
-                        "longitude": data.get('lon'),
-                        "isp": data.get('isp'),
-                        "timezone": data.get('timezone'),
-                        "error": None
-                    }
+            async with HTTPClient.get(f"{Config.IP_API_URL}/json/{self.ip}") as response:
+                if response.status == 200:
+                    data = await response.json(content_type=None)
+                    geo_data = self._parse_geolocation(data)
                 else:
-                    geo_data["error"] = "IP geolocation failed"
-            else:
-                geo_data["error"] = f"HTTP {response.status_code}"
+                    geo_data["error"] = f"HTTP {response.status}"
         
-        except requests.Timeout:
+        except asyncio.TimeoutError:
             geo_data["error"] = "Request timeout"
             logger.warning(f"Geolocation timeout for {self.ip}")
         
@@ -86,7 +110,39 @@ class IPRecon:
         
         return geo_data
     
-    def _get_shodan_data(self):
+    @staticmethod
+    def _empty_geolocation(error=None):
+        """Geolocation result with no data"""
+        return {
+            "country": None,
+            "country_code": None,
+            "city": None,
+            "latitude": None,
+            "longitude": None,
+            "isp": None,
+            "timezone": None,
+            "error": error
+        }
+    
+    @staticmethod
+    def _parse_geolocation(data):
+        """Convert an ip-api response record into a geolocation dict"""
+        if data.get('status') != 'success':
+            return IPRecon._empty_geolocation("IP geolocation failed")
+        
+        return {
+            "country": data.get('country'),
+            "country_code": data.get('countryCode'),
+            "city": data.get('city'),
+            "latitude": data.get('lat'),
+            "longitude": data.get('lon'),
+            "isp": data.get('isp'),
+            "timezone": data.get('timezone'),
+            "error": None
+        }
+    
+    @cached("shodan", "ip")
+    async def _get_shodan_data(self):
         """Fetch Shodan data for open ports and services"""
         shodan_data = {
             "open_ports": [],
@@ -104,40 +160,38 @@ class IPRecon:
         try:
             logger.debug(f"Fetching Shodan data for {self.ip}")
             
-            response = requests.get(
+            async with HTTPClient.get(
                 f"https://api.shodan.io/shodan/host/{self.ip}",
-                params={"key": Config.SHODAN_API_KEY},
-                timeout=Config.REQUEST_TIMEOUT
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                
-                # Extract ports
-                ports = data.get('ports', [])
-                shodan_data["open_ports"] = ports
+                params={"key": Config.SHODAN_API_KEY}
+            ) as response:
+                if response.status == 200:
+                    data = await response.json(content_type=None)
+                    
+                    # Extract ports
+                    ports = data.get('ports', [])
+                    shodan_data["open_ports"] = ports
+                    
+                    # Extract services
+                    for item in data.get('data', []):
+                        service = {
+                            "port": item.get('port'),
+                            "protocol": item.get('_shodan', {}).get('module'),
+                            "product": item.get('product'),
+                            "version": item.get('version'),
+                            "banner": item.get('data')[:100] if item.get('data') else None
+                        }
+                        shodan_data["services"].append(service)
+                    
+                    # Extract hostnames
+                    shodan_data["hostnames"] = data.get('hostnames', [])
                 
-                # Extract services
-                for item in data.get('data', []):
-                    service = {
-                        "port": item.get('port'),
-                        "protocol": item.get('_shodan', {}).get('module'),
-                        "product": item.get('product'),
-                        "version": item.get('version'),
-                        "banner": item.get('data')[:100] if item.get('data') else None
-                    }
-                    shodan_data["services"].append(service)
+                elif response.status == 401:
+                    shodan_data["error"] = "Invalid Shodan API key"
                 
-                # Extract hostnames
-                shodan_data["hostnames"] = data.get('hostnames', [])
-            
-            elif response.status_code == 401:
-                shodan_data["error"] = "Invalid Shodan API key"
-            
-            else:
-                shodan_data["error"] = f"HTTP {response.status_code}"
+                else:
+                    shodan_data["error"] = f"HTTP {response.status}"
         
-        except requests.Timeout:
+        except asyncio.TimeoutError:
             shodan_data["error"] = "Shodan request timeout"
             logger.warning(f"Shodan timeout for {self.ip}")
         
@@ -147,8 +201,34 @@ class IPRecon:
         
         return shodan_data
     
-    def _get_asn_info(self):
-        """Get ASN (Autonomous System Number) information"""
+    @cached("portscan", "ip")
+    async def _scan_ports(self):
+        """Scan Config.PORTSCAN_PORTS locally (same open_ports/services shape as Shodan)"""
+        logger.debug(f"Port scanning {self.ip}")
+        return await PortScanner.for_running_loop().scan_host(self.ip)
+    
+    def _lookup_offline(self, path):
+        """Look up this IP in a local database, or None if unavailable"""
+        db = OfflineGeoDB.get(path)
+        return db.lookup(self.ip) if db else None
+    
+    async def _get_asn_info(self):
+        """Get ASN information, preferring the offline database"""
+        record = self._lookup_offline(Config.ASN_DB_PATH) or self._lookup_offline(Config.GEOIP_DB_PATH)
+        
+        if record and record.get("asn"):
+            return {
+                "asn": record["asn"],
+                "asn_name": record["asn_name"],
+                "prefix": record["prefix"],
+                "error": None
+            }
+        
+        return await self._get_asn_online()
+    
+    @cached("asn", "ip")
+    async def _get_asn_online(self):
+        """Get ASN (Autonomous System Number) information from ASNdb"""
         asn_data = {
             "asn": None,
             "asn_name": None,
@@ -160,27 +240,28 @@ class IPRecon:
             logger.debug(f"Fetching ASN info for {self.ip}")
             
             # Using ASNdb API
-            response = requests.get(
-                f"https://api.asndb.net/v2/ip/{self.ip}",
-                timeout=Config.REQUEST_TIMEOUT
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                if 'data' in data:
-                    asn_data = {
-                        "asn": data['data'].get('asn'),
-                        "asn_name": data['data'].get('name'),
-                        "prefix": data['data'].get('prefix'),
-                        "error": None
-                    }
+            async with HTTPClient.get(f"https://api.asndb.net/v2/ip/{self.ip}") as response:
+                if response.status == 200:
+                    data = await response.json(content_type=None)
+                    if 'data' in data:
+                        asn_data = {
+                            "asn": data['data'].get('asn'),
+                            "asn_name": data['data'].get('name'),
+                            "prefix": data['data'].get('prefix'),
+                            "error": None
+                        }
+                
+                else:
+                    asn_data["error"] = f"HTTP {response.status}"
         
         except Exception as e:
+            asn_data["error"] = str(e)
             logger.debug(f"ASN lookup error: {str(e)}")
         
         return asn_data
     
-    def _get_organization(self):
+    @cached("organization", "ip")
+    async def _get_organization(self):
         """Get organization/ISP details"""
         org_data = {
             "organization": None,
@@ -193,22 +274,136 @@ class IPRecon:
             # Using TeamCymru whois
             logger.debug(f"Fetching organization for {self.ip}")
             
-            response = requests.get(
-                f"https://ip.teredo.pro/whois.php?ip={self.ip}",
-                timeout=Config.REQUEST_TIMEOUT
-            )
-            
-            if response.status_code == 200:
-                lines = response.text.split('\n')
-                for line in lines:
-                    if 'Organization' in line:
-                        org_data["organization"] = line.split(':', 1)[1].strip()
-                    elif 'ISP' in line:
-                        org_data["isp"] = line.split(':', 1)[1].strip()
-                    elif 'Type' in line:
-                        org_data["type"] = line.split(':', 1)[1].strip()
+            async with HTTPClient.get(
+                "https://ip.teredo.pro/whois.php",
+                params={"ip": self.ip}
+            ) as response:
+                if response.status == 200:
+                    text = await response.text()
+                    for line in text.split('\n'):
+                        if 'Organization' in line:
+                            org_data["organization"] = line.split(':', 1)[1].strip()
+                        elif 'ISP' in line:
+                            org_data["isp"] = line.split(':', 1)[1].strip()
+                        elif 'Type' in line:
+                            org_data["type"] = line.split(':', 1)[1].strip()
+                
+                else:
+                    org_data["error"] = f"HTTP {response.status}"
         
         except Exception as e:
+            org_data["error"] = str(e)
             logger.debug(f"Organization lookup error: {str(e)}")
         
         return org_data
+
+class GeoBatcher:
+    """
+    Coalesce concurrent geolocation lookups into ip-api /batch requests
+    Lookups arriving within Config.GEO_BATCH_WINDOW seconds of each other share
+    a single POST of up to 100 addresses instead of one GET each
+    """
+    
+    # ip-api rejects batches larger than this
+    MAX_BATCH = 100
+    
+    _instances = weakref.WeakKeyDictionary()
+    
+    def __init__(self):
+        self.pending = {}
+        self._timer = None
+        # Batches being resolved; the loop only keeps weak references to tasks
+        self._tasks = set()
+    
+    @classmethod
+    def for_running_loop(cls):
+        """Return the batcher bound to the running event loop"""
+        loop = asyncio.get_running_loop()
+        batcher = cls._instances.get(loop)
+        
+        if batcher is None:
+            batcher = cls()
+            cls._instances[loop] = batcher
+        
+        return batcher
+    
+    async def lookup(self, ip):
+        """Queue an IP for the next batch and wait for its geolocation"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.pending.setdefault(ip, []).append(future)
+        
+        if len(self.pending) >= min(Config.GEO_BATCH_SIZE, self.MAX_BATCH):
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(Config.GEO_BATCH_WINDOW, self._flush)
+        
+        return await future
+    
+    def _flush(self):
+        """Send everything queued so far as one batch"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        
+        batch, self.pending = self.pending, {}
+        
+        if batch:
+            task = asyncio.ensure_future(self._resolve(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+    
+    async def _resolve(self, batch):
+        """Look up a batch and hand each waiter its own copy of the result"""
+        results = await self.geolocate_many(list(batch))
+        
+        for ip, futures in batch.items():
+            for future in futures:
+                if not future.done():
+                    future.set_result(dict(results[ip]))
+    
+    @classmethod
+    async def geolocate_many(cls, ips):
+        """
+        Geolocate any number of IPs in chunks of up to 100
+        Returns {ip: geolocation dict}
+        """
+        size = min(Config.GEO_BATCH_SIZE, cls.MAX_BATCH)
+        chunks = [ips[i:i + size] for i in range(0, len(ips), size)]
+        
+        results = {}
+        for chunk_results in await asyncio.gather(*(cls._post_batch(chunk) for chunk in chunks)):
+            results.update(chunk_results)
+        
+        return results
+    
+    @staticmethod
+    async def _post_batch(chunk):
+        """POST one chunk to ip-api's batch endpoint"""
+        try:
+            logger.debug(f"Fetching batch geolocation for {len(chunk)} IP(s)")
+            
+            async with HTTPClient.post(f"{Config.IP_API_URL}/batch", json=chunk) as response:
+                if response.status == 200:
+                    records = await response.json(content_type=None)
+                    results = {
+                        record.get('query', ip): IPRecon._parse_geolocation(record)
+                        for ip, record in zip(chunk, records)
+                    }
+                    
+                    # Anything ip-api left out of its reply still gets an answer
+                    for ip in chunk:
+                        results.setdefault(ip, IPRecon._empty_geolocation("Missing from batch response"))
+                    
+                    return results
+                
+                error = f"HTTP {response.status}"
+        
+        except asyncio.TimeoutError:
+            error = "Request timeout"
+        
+        except Exception as e:
+            error = str(e)
+        
+        logger.warning(f"Batch geolocation error: {error}")
+        return {ip: IPRecon._empty_geolocation(error) for ip in chunk}
@@ -0,0 +1,94 @@
+"""
+ShadowRecon Recon Pipeline
+The domain -> hosting IP -> IP recon and reputation lookup graph
+"""
+
+import logging
+from config import Config
+from engine import Pipeline
+from utils import Utils
+from .domain import DomainRecon
+from .ip import IPRecon
+from .reputation import ReputationRecon
+
+logger = logging.getLogger("ShadowRecon")
+
+def build_recon_pipeline(memo_size=None):
+    """
+    Lookup graph shared by domain and IP scans
+      domain -> whois, dns, tls, dns_a, vt_domain
+      dns_a  -> ip -> geo, asn, organization, shodan, portscan, vt_ip
+    Outputs "domain_findings" and "ip_findings" assemble the reports with
+    DomainRecon.build_findings() and IPRecon.build_findings(). IP lookups
+    are keyed by address, so every domain hosted on one IP (and a scan of
+    the IP itself) shares them
+    """
+    pipeline = Pipeline(memo_size)
+    
+    @pipeline.node("whois", ["domain"], key=lambda domain: ("whois", domain))
+    async def whois(domain):
+        return await Utils.run_blocking(DomainRecon(domain)._get_whois)
+    
+    @pipeline.node("dns", ["domain"], key=lambda domain: ("dns", domain))
+    async def dns(domain):
+        return await DomainRecon(domain)._get_dns_records()
+    
+    @pipeline.node("tls", ["domain"], key=lambda domain: ("tls", domain))
+    async def tls(domain):
+        return await DomainRecon(domain)._get_ssl_certificate()
+    
+    @pipeline.node("dns_a", ["domain"], key=lambda domain: ("dns_a", domain))
+    async def dns_a(domain):
+        return await DomainRecon(domain)._get_hosting_ip()
+    
+    @pipeline.node("vt_domain", ["domain"], key=lambda domain: ("vt", "domain", domain))
+    async def vt_domain(domain):
+        return await _reputation(domain, "domain")
+    
+    @pipeline.node("ip", ["dns_a"])
+    async def ip(hosting_ip):
+        return hosting_ip.get("ip")
+    
+    @pipeline.node("geo", ["ip"], key=lambda ip: ("geo", ip))
+    async def geo(ip):
+        return await IPRecon(ip)._get_geolocation()
+    
+    @pipeline.node("asn", ["ip"], key=lambda ip: ("asn", ip))
+    async def asn(ip):
+        return await IPRecon(ip)._get_asn_info()
+    
+    @pipeline.node("organization", ["ip"], key=lambda ip: ("organization", ip))
+    async def organization(ip):
+        return await IPRecon(ip)._get_organization()
+    
+    @pipeline.node("shodan", ["ip"], key=lambda ip: ("shodan", ip))
+    async def shodan(ip):
+        return await IPRecon(ip)._get_shodan_data() if Config.ENABLE_SHODAN else None
+    
+    @pipeline.node("portscan", ["ip"], key=lambda ip: ("portscan", ip))
+    async def portscan(ip):
+        return await IPRecon(ip)._scan_ports() if Config.ENABLE_PORTSCAN else None
+    
+    @pipeline.node("vt_ip", ["ip"], key=lambda ip: ("vt", "ip", ip))
+    async def vt_ip(ip):
+        return await _reputation(ip, "ip")
+    
+    # shodan/portscan are None when switched off in Config
+    @pipeline.node("ip_findings", ["ip", "geo", "shodan", "portscan", "asn", "organization"],
+                   optional=["shodan", "portscan"])
+    async def ip_findings(ip, geolocation, shodan_data, portscan_data, asn_data, org_data):
+        return IPRecon.build_findings(ip, geolocation, shodan_data, portscan_data, asn_data, org_data)
+    
+    @pipeline.node("domain_findings", ["domain", "whois", "dns", "tls", "dns_a"])
+    async def domain_findings(domain, whois_data, dns_data, ssl_data, hosting_ip):
+        return DomainRecon.build_findings(domain, whois_data, dns_data, ssl_data, hosting_ip)
+    
+    return pipeline
+
+async def _reputation(target, target_type):
+    """Reputation check, or None if the target cannot be checked"""
+    try:
+        return await ReputationRecon(target, target_type).recon_async()
+    except Exception as e:
+        logger.debug(f"Reputation check skipped for {target}: {str(e)}")
+        return None
@@ -3,9 +3,10 @@ ShadowRecon Reputation & Threat Intelligence Module
 VirusTotal scores, malicious indicators, risk assessment
 """
 
-import requests
+import asyncio
 import logging
 from config import Config
+from engine import HTTPClient, cached
 from utils import Utils
 
 logger = logging.getLogger("ShadowRecon")
@@ -29,14 +30,20 @@ class ReputationRecon:
             raise ValueError(f"Invalid IP: {target}")
     
     def recon(self):
+        """Execute full reputation check (blocking wrapper)"""
+        return HTTPClient.run_sync(self.recon_async())
+    
+    async def recon_async(self):
         """Execute full reputation check"""
         logger.info(f"Starting reputation check for {self.target_type}: {self.target}")
         
+        virustotal = await self._check_virustotal()
+        
         self.results = {
             "target": self.target,
             "target_type": self.target_type,
             "timestamp": Utils.format_timestamp(),
-            "virustotal": self._check_virustotal(),
+            "virustotal": virustotal,
             "risk_score": None,
             "risk_level": None
         }
@@ -47,7 +54,8 @@ class ReputationRecon:
         
         return self.results
     
-    def _check_virustotal(self):
+    @cached("virustotal", lambda self: f"{self.target_type}:{self.target}")
+    async def _check_virustotal(self):
         """Check VirusTotal for malicious indicators"""
         vt_data = {
             "found": False,
@@ -88,15 +96,11 @@ class ReputationRecon:
                 vt_data["error"] = "Unknown target type"
                 return vt_data
             
-            response = requests.get(
-                endpoint,
-                headers=headers,
-                timeout=Config.REQUEST_TIMEOUT
-            )
+            async with HTTPClient.get(endpoint, headers=headers) as response:
+                status = response.status
+                data = await response.json(content_type=None) if status == 200 else {}
             
-            if response.status_code == 200:
-                data = response.json()
-                
+            if status == 200:
                 if 'data' in data:
                     attributes = data['data'].get('attributes', {})
                     
@@ -126,20 +130,20 @@ class ReputationRecon:
                             "VirusTotal vendors"
                         )
             
-            elif response.status_code == 404:
+            elif status == 404:
                 vt_data["found"] = False
                 logger.debug(f"{self.target} not found in VirusTotal")
             
-            elif response.status_code == 401:
+            elif status == 401:
                 vt_data["error"] = "Invalid VirusTotal API key"
             
-            elif response.status_code == 429:
+            elif status == 429:
                 vt_data["error"] = "Rate limited by VirusTotal API"
             
             else:
-                vt_data["error"] = f"HTTP {response.status_code}"
+                vt_data["error"] = f"HTTP {status}"
         
-        except requests.Timeout:
+        except asyncio.TimeoutError:
             vt_data["error"] = "VirusTotal request timeout"
             logger.warning(f"VirusTotal timeout for {self.target}")
         
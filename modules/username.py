@@ -5,19 +5,63 @@ Asynchronously check username existence across multiple platforms
 
 import asyncio
 import aiohttp
+import json
 import logging
+import re
+import time
+from urllib.parse import urlparse
 from config import Config
+from engine import HTTPClient, RequestScheduler
 from utils import Utils
 
 logger = logging.getLogger("ShadowRecon")
 
 class UsernameRecon:
-    """Check username existence across platforms"""
+    """
+    Check username existence across platforms
+    Each platform has a detection signature in Config.USERNAME_PLATFORMS_FILE:
+      url            profile URL reported to the user ('{}' = username)
+      probe_url      URL actually requested, e.g. a JSON API (defaults to url)
+      found_status   status codes that can mean the profile exists (default 2xx)
+      missing_status status codes meaning it does not (default 404, 410)
+      missing_url    substrings of the final URL (after redirects) meaning missing
+      found_markers  body strings that confirm the profile ('{}' = username)
+      missing_markers body strings that mean the profile does not exist
+      username_regex usernames the platform accepts; others are skipped
+      disabled       platforms with no reliable unauthenticated signal
+    Every enabled platform needs markers or missing_url: many sites answer
+    2xx for any path, so a bare 2xx is reported as UNKNOWN, never FOUND
+    Checks run through a RequestScheduler: a global cap on requests in flight,
+    a per-host cap, a per-request timeout, and Config.ASYNC_TIMEOUT as the
+    deadline for the whole sweep
+    """
     
-    def __init__(self):
-        self.platforms = Config.USERNAME_PLATFORMS
-        self.timeout = aiohttp.ClientTimeout(total=Config.ASYNC_TIMEOUT)
+    CHUNK_SIZE = 8192
+    
+    _platform_cache = {}
+    
+    def __init__(self, platforms=None):
+        self.platforms = platforms or self.load_platforms()
+        self.timeout = aiohttp.ClientTimeout(total=Config.USERNAME_REQUEST_TIMEOUT)
         self.results = {}
+        self.stats = {}
+    
+    @classmethod
+    def load_platforms(cls, path=None):
+        """Load enabled platform signatures from a JSON data file (cached per path)"""
+        path = path or Config.USERNAME_PLATFORMS_FILE
+        
+        if path not in cls._platform_cache:
+            with open(path, 'r', encoding='utf-8') as f:
+                signatures = json.load(f)
+            
+            cls._platform_cache[path] = {
+                name: signature for name, signature in signatures.items()
+                if not signature.get("disabled")
+            }
+            logger.debug(f"Loaded {len(cls._platform_cache[path])} platform signatures from {path}")
+        
+        return cls._platform_cache[path]
     
     async def check_username(self, username):
         """
@@ -32,90 +76,350 @@ class UsernameRecon:
         
         self.results = {}
         
-        async with aiohttp.ClientSession(timeout=self.timeout) as session:
-            tasks = [
-                self._check_platform(session, platform, username)
-                for platform in self.platforms.keys()
-            ]
-            
-            results = await asyncio.gather(*tasks, return_exceptions=True)
+        async for platform, result in self.iter_username(username):
+            self.results[platform] = result
         
         return self.results
     
-    async def _check_platform(self, session, platform, username):
-        """Check if username exists on a specific platform"""
+    async def iter_username(self, username, scheduler=None):
+        """
+        Async generator yielding (platform, result) as each check finishes
+        Platforms still pending at the sweep deadline are cancelled and
+        yielded with status TIMEOUT
+        """
+        scheduler = scheduler or RequestScheduler(deadline=Config.ASYNC_TIMEOUT)
+        
+        jobs = (
+            (platform, self._host(platform), self._job(platform, username))
+            for platform in self.platforms
+        )
+        
+        try:
+            async for platform, result, error in scheduler.run(jobs):
+                if error is not None:
+                    result = self._failed(platform, username, error)
+                yield platform, result
+        
+        finally:
+            self.stats = dict(scheduler.stats)
+            logger.debug(
+                f"Username sweep for {username}: {scheduler.stats['completed']} checked, "
+                f"{scheduler.stats['timeouts']} timed out, {scheduler.stats['cancelled']} cancelled "
+                f"in {scheduler.stats['elapsed']}s"
+            )
+    
+    async def iter_usernames(self, usernames, permutations=False, scheduler=None):
+        """
+        Check many usernames through one scheduler and connection pool
+        Async generator yielding (username, {platform: result}) as soon as
+        every platform has reported for that username
+        permutations: also check name variants from permutations(), so
+        'John Doe' expands to johndoe, john.doe, jdoe, johndoe99, ...
+        No overall deadline unless the given scheduler has one; every request
+        is still bounded by Config.USERNAME_REQUEST_TIMEOUT
+        """
+        candidates = self.expand_usernames(usernames, permutations)
+        scheduler = scheduler or RequestScheduler()
+        
+        grouped = {username: {} for username in candidates}
+        
+        # Username-major order spreads consecutive jobs over different hosts
+        jobs = (
+            ((username, platform), self._host(platform), self._job(platform, username))
+            for username in candidates
+            for platform in self.platforms
+        )
+        
         try:
-            url = self.platforms[platform].format(Utils.sanitize_username(username))
+            async for (username, platform), result, error in scheduler.run(jobs):
+                if error is not None:
+                    result = self._failed(platform, username, error)
+                
+                grouped[username][platform] = result
+                
+                if len(grouped[username]) == len(self.platforms):
+                    yield username, grouped.pop(username)
+        
+        finally:
+            self.stats = dict(scheduler.stats)
+            logger.info(
+                f"Username batch: {len(candidates)} username(s) x {len(self.platforms)} platform(s) "
+                f"in {scheduler.stats['elapsed']}s ({scheduler.stats['jobs_per_second']} checks/s)"
+            )
+    
+    async def check_usernames(self, usernames, permutations=False):
+        """
+        Check many usernames on all platforms in one pooled run
+        Returns {username: {"platforms_checked": {...}, "summary": {...}}}
+        """
+        batch = {}
+        
+        async for username, results in self.iter_usernames(usernames, permutations):
+            batch[username] = {
+                "platforms_checked": results,
+                "summary": self.get_summary(results)
+            }
+        
+        return batch
+    
+    @classmethod
+    def expand_usernames(cls, usernames, permutations=False):
+        """Deduplicated usernames to check, optionally with permutations; drops ones under 3 characters"""
+        candidates = []
+        
+        for username in usernames:
+            variants = cls.permutations(username) if permutations else [username.strip()]
             
-            async with session.head(url, allow_redirects=True, ssl=False) as response:
-                # Status code logic for different platforms
-                exists = self._interpret_status(response.status, platform)
+            for variant in variants:
+                if len(variant) < 3:
+                    logger.warning(f"Skipping username shorter than 3 characters: {variant!r}")
+                elif variant not in candidates:
+                    candidates.append(variant)
+        
+        return candidates
+    
+    @staticmethod
+    def permutations(name, suffixes=None):
+        """
+        Common username forms of a person's name, most likely first
+        'John Doe' -> johndoe, john.doe, john_doe, john-doe, jdoe, j.doe,
+        johnd, doejohn, doe.john, doej, then johndoe/jdoe/doejohn with each
+        suffix in Config.USERNAME_PERMUTATION_SUFFIXES (johndoe99, ...)
+        A single word yields itself plus its suffixed forms
+        """
+        suffixes = Config.USERNAME_PERMUTATION_SUFFIXES if suffixes is None else suffixes
+        words = re.split(r'[\s._-]+', name.lower())
+        parts = [part for part in (re.sub(r'[^a-z0-9]', '', word) for word in words) if part]
+        
+        if not parts:
+            return []
+        
+        if len(parts) == 1:
+            forms = [parts[0]]
+            compact = [parts[0]]
+        else:
+            first, last = parts[0], parts[-1]
+            forms = [
+                f"{first}{last}", f"{first}.{last}", f"{first}_{last}", f"{first}-{last}",
+                f"{first[0]}{last}", f"{first[0]}.{last}", f"{first}{last[0]}",
+                f"{last}{first}", f"{last}.{first}", f"{last}{first[0]}"
+            ]
+            compact = [f"{first}{last}", f"{first[0]}{last}", f"{last}{first}"]
+        
+        forms += [f"{form}{suffix}" for suffix in suffixes for form in compact]
+        
+        return list(dict.fromkeys(forms))
+    
+    async def benchmark(self, usernames, pool_sizes, permutations=False):
+        """
+        Run the same batch once per pool size and report throughput
+        For each size the HTTP pool limit and the scheduler's concurrency are
+        both set to it. Returns a list of {pool_size, requests, elapsed,
+        requests_per_second, timeouts, errors}; INVALID (skipped) checks are
+        not counted as requests
+        """
+        report = []
+        
+        try:
+            for size in pool_sizes:
+                await HTTPClient.close()
+                HTTPClient.configure(pool_size=size)
+                
+                scheduler = RequestScheduler(concurrency=size)
+                started = time.monotonic()
+                requests = timeouts = errors = 0
+                
+                async for _, results in self.iter_usernames(usernames, permutations, scheduler):
+                    for result in results.values():
+                        requests += result["status"] != "INVALID"
+                        timeouts += result["status"] == "TIMEOUT"
+                        errors += result["status"] == "ERROR"
+                
+                elapsed = time.monotonic() - started
+                
+                report.append({
+                    "pool_size": size,
+                    "requests": requests,
+                    "elapsed": round(elapsed, 3),
+                    "requests_per_second": round(requests / elapsed, 1) if elapsed > 0 else 0.0,
+                    "timeouts": timeouts,
+                    "errors": errors
+                })
+        
+        finally:
+            HTTPClient.configure()
+            await HTTPClient.close()
+        
+        return report
+    
+    def _host(self, platform):
+        """Host a platform's checks are sent to, for per-host limits"""
+        signature = self.platforms[platform]
+        return urlparse(signature.get("probe_url", signature["url"])).hostname
+    
+    def _job(self, platform, username):
+        """Coroutine factory for one platform check"""
+        return lambda: self._check_platform(platform, username)
+    
+    def _failed(self, platform, username, error):
+        """Result for a check the scheduler timed out, cancelled or saw fail"""
+        result = {
+            "url": self.platforms[platform]["url"].format(Utils.sanitize_username(username)),
+            "status": "TIMEOUT" if error in ("timeout", "cancelled") else "ERROR",
+            "http_code": None,
+            "accessible": False
+        }
+        
+        if error == "cancelled":
+            result["reason"] = "sweep deadline reached"
+        elif error != "timeout":
+            result["error"] = error
+        
+        return result
+    
+    async def _check_platform(self, platform, username):
+        """Check if username exists on a specific platform; returns the result dict"""
+        signature = self.platforms[platform]
+        quoted = Utils.sanitize_username(username)
+        url = signature["url"].format(quoted)
+        
+        if signature.get("username_regex") and not re.match(signature["username_regex"], username):
+            return {
+                "url": url,
+                "status": "INVALID",
+                "http_code": None,
+                "accessible": False,
+                "reason": "username not allowed on this platform"
+            }
+        
+        try:
+            async with HTTPClient.get(
+                signature.get("probe_url", signature["url"]).format(quoted),
+                allow_redirects=True, ssl=False, timeout=self.timeout
+            ) as response:
+                status, reason = await self._detect(signature, username, response)
                 
-                self.results[platform] = {
+                logger.debug(f"{platform}: {response.status} - {status} ({reason})")
+                
+                return {
                     "url": url,
-                    "status": "FOUND" if exists else "NOT FOUND",
+                    "status": status,
                     "http_code": response.status,
-                    "accessible": response.status not in [403, 404, 410]
+                    "accessible": response.status not in [403, 404, 410],
+                    "reason": reason
                 }
-                
-                logger.debug(f"{platform}: {response.status} - {self.results[platform]['status']}")
         
         except asyncio.TimeoutError:
-            self.results[platform] = {
-                "url": self.platforms[platform].format(username),
+            logger.warning(f"{platform}: Request timeout")
+            return {
+                "url": url,
                 "status": "TIMEOUT",
                 "http_code": None,
                 "accessible": False
             }
-            logger.warning(f"{platform}: Request timeout")
         
         except Exception as e:
-            self.results[platform] = {
-                "url": self.platforms[platform].format(username),
+            logger.debug(f"{platform}: {str(e)}")
+            return {
+                "url": url,
                 "status": "ERROR",
                 "http_code": None,
                 "accessible": False,
                 "error": str(e)
             }
-            logger.debug(f"{platform}: {str(e)}")
     
-    @staticmethod
-    def _interpret_status(status_code, platform):
+    @classmethod
+    async def _detect(cls, signature, username, response):
         """
-        Interpret HTTP status codes
-        Different platforms return different codes for existing/non-existing users
+        Apply a platform signature to a response
+        Returns (status, reason) where status is FOUND, NOT FOUND, UNKNOWN or
+        RATE LIMITED. Status codes and the final URL are checked first; the
+        body is only streamed when the signature has markers
         """
-        # 200-299: Generally means found
-        if 200 <= status_code < 300:
-            return True
+        code = response.status
+        
+        if code in signature.get("missing_status", [404, 410]):
+            return "NOT FOUND", f"HTTP {code}"
+        
+        if code == 429:
+            return "RATE LIMITED", f"HTTP {code}"
+        
+        found_status = signature.get("found_status")
+        if (found_status and code not in found_status) or (not found_status and not 200 <= code < 300):
+            # 403s and other oddities are not evidence either way
+            return "UNKNOWN", f"HTTP {code}"
+        
+        final_url = str(response.url)
+        for fragment in signature.get("missing_url", []):
+            if fragment.replace("{}", username) in final_url:
+                return "NOT FOUND", f"redirected to {final_url}"
         
-        # 301-302: Redirect (might indicate found for some platforms)
-        if status_code in [301, 302]:
-            return True
+        found_markers = [m.replace("{}", username).encode() for m in signature.get("found_markers", [])]
+        missing_markers = [m.replace("{}", username).encode() for m in signature.get("missing_markers", [])]
         
-        # 404: Usually not found
-        if status_code == 404:
-            return False
+        if not found_markers and not missing_markers:
+            if signature.get("missing_url"):
+                return "FOUND", f"HTTP {code}, not redirected"
+            # Soft-404 sites answer 2xx for profiles that do not exist
+            return "UNKNOWN", f"HTTP {code}, no detection rule"
         
-        # 403: Forbidden (sometimes means found but private)
-        if status_code == 403:
-            return True
+        marker = await cls._scan_body(response, missing_markers + found_markers)
         
-        # 429: Rate limited (be cautious)
-        if status_code == 429:
-            return False
+        if marker in missing_markers:
+            return "NOT FOUND", f"marker {marker.decode(errors='replace')!r}"
         
-        return False
+        if marker in found_markers:
+            return "FOUND", f"marker {marker.decode(errors='replace')!r}"
+        
+        if found_markers:
+            return "NOT FOUND", "expected marker absent"
+        
+        return "FOUND", f"HTTP {code}, no missing-profile marker"
     
-    def get_summary(self):
-        """Get summary of found usernames"""
-        found = [p for p, r in self.results.items() if r.get("status") == "FOUND"]
-        not_found = [p for p, r in self.results.items() if r.get("status") == "NOT FOUND"]
+    @classmethod
+    async def _scan_body(cls, response, markers):
+        """
+        Stream the response body until a marker appears or
+        Config.USERNAME_BODY_LIMIT bytes have been read
+        Returns the first marker seen, or None. A short tail of each chunk is
+        carried over so markers split across chunks still match
+        """
+        overlap = max(len(marker) for marker in markers) - 1
+        tail = b""
+        received = 0
+        
+        async for chunk in response.content.iter_chunked(cls.CHUNK_SIZE):
+            window = tail + chunk
+            
+            for marker in markers:
+                if marker in window:
+                    return marker
+            
+            received += len(chunk)
+            if received >= Config.USERNAME_BODY_LIMIT:
+                break
+            
+            tail = window[-overlap:] if overlap else b""
+        
+        return None
+    
+    def get_summary(self, results=None):
+        """Get summary of found usernames (from the last check_username unless results are given)"""
+        results = self.results if results is None else results
+        
+        found = [p for p, r in results.items() if r.get("status") == "FOUND"]
+        not_found = [p for p, r in results.items() if r.get("status") == "NOT FOUND"]
+        inconclusive = [
+            p for p, r in results.items()
+            if r.get("status") not in ("FOUND", "NOT FOUND", "INVALID")
+        ]
         
         return {
             "found_count": len(found),
             "not_found_count": len(not_found),
+            "inconclusive_count": len(inconclusive),
             "found_platforms": found,
             "not_found_platforms": not_found,
-            "total_checked": len(self.results)
+            "inconclusive_platforms": inconclusive,
+            "total_checked": len(results)
         }
@@ -7,23 +7,47 @@ import json
 import os
 import logging
 from datetime import datetime
+from .sinks import ReportSink, JSONFileSink, NDJSONSink, FanoutSink, create_sink
+from .columnar import ColumnarSink
 
 logger = logging.getLogger("ShadowRecon")
 
+__all__ = [
+    'ReportGenerator',
+    'ReportSink',
+    'JSONFileSink',
+    'NDJSONSink',
+    'FanoutSink',
+    'ColumnarSink',
+    'create_sink'
+]
+
 class ReportGenerator:
     """Generate and save OSINT reports"""
     
-    def __init__(self, output_dir="scans"):
+    def __init__(self, output_dir="scans", sink=None, exporters=None):
+        """
+        output_dir: directory for reports
+        sink: a ReportSink, or a sink name ('json', 'ndjson');
+              defaults to Config.REPORT_SINK
+        exporters: extra sinks every report is also written to, such as
+                   a ColumnarSink
+        """
         self.output_dir = output_dir
         
         # Create output directory if it doesn't exist
         if not os.path.exists(output_dir):
             os.makedirs(output_dir)
             logger.info(f"Created output directory: {output_dir}")
+        
+        self.sink = sink if isinstance(sink, ReportSink) else create_sink(sink, output_dir)
+        
+        if exporters:
+            self.sink = FanoutSink([self.sink] + list(exporters))
     
     def save_report(self, target, findings, report_type="full"):
         """
-        Save findings as JSON report
+        Save findings through the configured sink
         
         Args:
             target: Target identifier (username, domain, IP, email)
@@ -31,24 +55,26 @@ class ReportGenerator:
             report_type: 'full', 'summary', or 'threat'
         
         Returns:
-            Filepath of saved report
+            Filepath the report was written to
         """
-        # Create filename with timestamp
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"{target}_{report_type}_{timestamp}.json"
-        filepath = os.path.join(self.output_dir, filename)
+        record = {
+            "target": target,
+            "type": report_type,
+            "timestamp": datetime.now().isoformat(),
+            "findings": findings
+        }
         
         try:
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(findings, f, indent=2, default=str)
-            
-            logger.info(f"Report saved: {filepath}")
-            return filepath
+            return self.sink.write(record)
         
         except Exception as e:
             logger.error(f"Failed to save report: {str(e)}")
             return None
     
+    def close(self):
+        """Flush and close the sink; call once the run is finished"""
+        self.sink.close()
+    
     def create_summary_report(self, findings):
         """Create human-readable summary from findings"""
         summary = {
@@ -122,9 +148,11 @@ class ReportGenerator:
         if geo.get('isp'):
             indicators.append(f"ISP: {geo['isp']}")
         
-        shodan = findings.get('shodan', {})
-        if shodan and shodan.get('open_ports'):
-            risks.append(f"⚠️  {len(shodan['open_ports'])} open ports detected")
+        shodan = findings.get('shodan') or {}
+        portscan = findings.get('portscan') or {}
+        open_ports = set(shodan.get('open_ports') or []) | set(portscan.get('open_ports') or [])
+        if open_ports:
+            risks.append(f"⚠️  {len(open_ports)} open ports detected")
         
         if findings.get('virustotal', {}).get('malicious_count', 0) > 0:
             risks.append(
@@ -156,6 +184,8 @@ class ReportGenerator:
         domain_valid = findings.get('domain_valid', {})
         if domain_valid.get('valid'):
             indicators.append("✓ Email domain is valid")
+        elif domain_valid and not domain_valid.get('error'):
+            risks.append("⚠️  Email domain has no MX records and cannot receive mail")
         
         return {
             "indicators": indicators,
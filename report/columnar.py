@@ -0,0 +1,326 @@
+"""
+ShadowRecon Columnar Export
+Flatten findings into typed Parquet / Arrow IPC tables for analytics tools
+"""
+
+import os
+import re
+import threading
+import logging
+from datetime import datetime
+from config import Config
+from .sinks import ReportSink
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.parquet as pq
+    ARROW_AVAILABLE = True
+except ImportError:
+    ARROW_AVAILABLE = False
+
+logger = logging.getLogger("ShadowRecon")
+
+def _get(findings, *path):
+    """Walk nested dicts, returning None as soon as a level is missing"""
+    value = findings
+    for key in path:
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+def _int(value):
+    """Integer or None; accepts 'AS15169'-style strings"""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, str):
+        value = re.sub(r'^AS', '', value.strip(), flags=re.IGNORECASE)
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+def _float(value):
+    try:
+        return None if value is None else float(value)
+    except (TypeError, ValueError):
+        return None
+
+def _str(value):
+    return None if value is None else str(value)
+
+def _strings(value):
+    if not value:
+        return []
+    if isinstance(value, (str, bytes)):
+        return [str(value)]
+    return [str(item) for item in value]
+
+# Integer range each integer column type can hold
+_INT_LIMITS = {"int32": 2 ** 31, "int64": 2 ** 63}
+
+def _fits(kind, value):
+    """value, or None if the column's Arrow type cannot hold it"""
+    if value is None:
+        return None
+    if kind == "bool":
+        return value if isinstance(value, bool) else None
+    if kind in _INT_LIMITS:
+        return value if -_INT_LIMITS[kind] <= value < _INT_LIMITS[kind] else None
+    if kind == "list<int32>":
+        return [item for item in value if -_INT_LIMITS["int32"] <= item < _INT_LIMITS["int32"]]
+    return value
+
+def _open_ports(findings):
+    """Union of Shodan and active port scan results"""
+    ports = set(_get(findings, "shodan", "open_ports") or [])
+    ports |= set(_get(findings, "portscan", "open_ports") or [])
+    return sorted(port for port in (_int(p) for p in ports) if port is not None)
+
+def _reputation(findings):
+    """VirusTotal block, whether findings are a reputation check or embed one"""
+    return _get(findings, "virustotal") or _get(findings, "reputation", "virustotal")
+
+def _risk(findings, field):
+    """Report risk field, falling back to the embedded reputation check"""
+    value = findings.get(field)
+    return value if value is not None else _get(findings, "reputation", field)
+
+# Columns per report type: (name, arrow type, extractor(findings))
+# Types are names resolved against pyarrow lazily, so this module imports without it
+_REPUTATION_COLUMNS = [
+    ("malicious_count", "int32", lambda f: _int(_get(_reputation(f), "malicious_count"))),
+    ("suspicious_count", "int32", lambda f: _int(_get(_reputation(f), "suspicious_count"))),
+    ("harmless_count", "int32", lambda f: _int(_get(_reputation(f), "harmless_count"))),
+    ("risk_score", "int32", lambda f: _int(_risk(f, "risk_score"))),
+    ("risk_level", "string", lambda f: _str(_risk(f, "risk_level"))),
+]
+
+COLUMNS = {
+    "domain": [
+        ("registrar", "string", lambda f: _str(_get(f, "whois", "registrar"))),
+        ("creation_date", "string", lambda f: _str(_get(f, "whois", "creation_date"))),
+        ("expiration_date", "string", lambda f: _str(_get(f, "whois", "expiration_date"))),
+        ("a_records", "list<string>", lambda f: _strings(_get(f, "dns", "a_records"))),
+        ("aaaa_records", "list<string>", lambda f: _strings(_get(f, "dns", "aaaa_records"))),
+        ("mx_records", "list<string>", lambda f: _strings(_get(f, "dns", "mx_records"))),
+        ("ns_records", "list<string>", lambda f: _strings(_get(f, "dns", "ns_records"))),
+        ("has_dmarc", "bool", lambda f: bool(_get(f, "dns", "dmarc_records"))),
+        ("dkim_selectors", "list<string>", lambda f: _strings(list((_get(f, "dns", "dkim_records") or {}).keys()))),
+        ("hosting_ip", "string", lambda f: _str(_get(f, "hosting_ip", "ip"))),
+        ("has_ssl", "bool", lambda f: _get(f, "ssl", "has_ssl")),
+        ("ssl_valid", "bool", lambda f: _get(f, "ssl", "valid")),
+        ("ssl_issuer", "string", lambda f: _str(_get(f, "ssl", "issuer"))),
+        ("ssl_valid_until", "string", lambda f: _str(_get(f, "ssl", "valid_until"))),
+        ("ssl_key_type", "string", lambda f: _str(_get(f, "ssl", "key_type"))),
+        ("ssl_key_size", "int32", lambda f: _int(_get(f, "ssl", "key_size"))),
+        ("ssl_sans", "list<string>", lambda f: _strings(_get(f, "ssl", "sans"))),
+    ] + _REPUTATION_COLUMNS,
+    "ip": [
+        ("country", "string", lambda f: _str(_get(f, "geolocation", "country"))),
+        ("country_code", "string", lambda f: _str(_get(f, "geolocation", "country_code"))),
+        ("city", "string", lambda f: _str(_get(f, "geolocation", "city"))),
+        ("latitude", "float64", lambda f: _float(_get(f, "geolocation", "latitude"))),
+        ("longitude", "float64", lambda f: _float(_get(f, "geolocation", "longitude"))),
+        ("isp", "string", lambda f: _str(_get(f, "geolocation", "isp"))),
+        ("asn", "int64", lambda f: _int(_get(f, "asn", "asn"))),
+        ("asn_name", "string", lambda f: _str(_get(f, "asn", "asn_name"))),
+        ("prefix", "string", lambda f: _str(_get(f, "asn", "prefix"))),
+        ("organization", "string", lambda f: _str(_get(f, "organization", "organization"))),
+        ("open_ports", "list<int32>", _open_ports),
+        ("vulnerabilities", "list<string>", lambda f: _strings(_get(f, "shodan", "vulnerabilities"))),
+        ("hostnames", "list<string>", lambda f: _strings(_get(f, "shodan", "hostnames"))),
+    ] + _REPUTATION_COLUMNS,
+    "email": [
+        ("breach_status", "string", lambda f: _str(_get(f, "hibp", "breach_status"))),
+        ("breach_count", "int32", lambda f: _int(_get(f, "hibp", "breach_count"))),
+        ("breaches", "list<string>", lambda f: _strings(
+            [b.get("name") for b in _get(f, "hibp", "breaches") or [] if isinstance(b, dict)]
+        )),
+        ("pwned_passwords", "bool", lambda f: _get(f, "hibp", "pwned_passwords")),
+        ("domain", "string", lambda f: _str(_get(f, "domain_valid", "domain"))),
+        ("domain_valid", "bool", lambda f: _get(f, "domain_valid", "valid")),
+        ("has_mx_records", "bool", lambda f: _get(f, "domain_valid", "has_mx_records")),
+        ("risk_score", "int32", lambda f: _int(f.get("risk_score"))),
+        ("risk_level", "string", lambda f: _str(f.get("risk_level"))),
+    ],
+    "username": [
+        ("found_count", "int32", lambda f: _int(_get(f, "summary", "found_count"))),
+        ("not_found_count", "int32", lambda f: _int(_get(f, "summary", "not_found_count"))),
+        ("inconclusive_count", "int32", lambda f: _int(_get(f, "summary", "inconclusive_count"))),
+        ("total_checked", "int32", lambda f: _int(_get(f, "summary", "total_checked"))),
+        ("found_platforms", "list<string>", lambda f: _strings(_get(f, "summary", "found_platforms"))),
+    ],
+    "reputation": [
+        ("target_type", "string", lambda f: _str(f.get("target_type"))),
+        ("tags", "list<string>", lambda f: _strings(_get(f, "virustotal", "tags"))),
+    ] + _REPUTATION_COLUMNS,
+}
+
+class ColumnarSink(ReportSink):
+    """
+    Write findings as typed columnar tables, one file per report type
+    Every table starts with target and scanned_at, followed by the type's
+    COLUMNS. Rows are buffered per type and written out as a Parquet row
+    group (or Arrow IPC record batch) every row_group_size rows, so memory
+    stays bounded however many targets a run covers
+    """
+    
+    EXTENSIONS = {"parquet": ".parquet", "arrow": ".arrow"}
+    
+    def __init__(self, output_dir="scans", format=None, row_group_size=None, prefix="findings"):
+        """
+        format: 'parquet' or 'arrow' (Arrow IPC file); defaults to Config.EXPORT_FORMAT
+        row_group_size: rows buffered per type before a write
+        """
+        if not ARROW_AVAILABLE:
+            raise RuntimeError("pyarrow package not installed")
+        
+        self.format = (format or Config.EXPORT_FORMAT).lower()
+        if self.format not in self.EXTENSIONS:
+            raise ValueError(f"Unknown export format: {self.format}")
+        
+        self.output_dir = output_dir
+        self.prefix = prefix
+        self.row_group_size = max(1, row_group_size or Config.EXPORT_ROW_GROUP_SIZE)
+        
+        self._lock = threading.Lock()
+        self._tables = {}
+        self.files = []
+        self.stats = {"rows": 0, "row_groups": 0, "skipped": 0, "dropped": 0}
+        
+        os.makedirs(output_dir, exist_ok=True)
+    
+    @staticmethod
+    def schema(report_type):
+        """Arrow schema for a report type"""
+        types = {
+            "string": pa.string(),
+            "bool": pa.bool_(),
+            "int32": pa.int32(),
+            "int64": pa.int64(),
+            "float64": pa.float64(),
+            "list<string>": pa.list_(pa.string()),
+            "list<int32>": pa.list_(pa.int32()),
+        }
+        
+        fields = [pa.field("target", pa.string()), pa.field("scanned_at", pa.timestamp("us"))]
+        fields += [pa.field(name, types[kind]) for name, kind, _ in COLUMNS[report_type]]
+        return pa.schema(fields)
+    
+    @staticmethod
+    def flatten(record):
+        """
+        One report record -> flat row dict for its type's table
+        Values the column type cannot hold (a non-bool flag, an out-of-range
+        integer) become None, so one odd record cannot fail a row group
+        """
+        findings = record["findings"] or {}
+        timestamp = record.get("timestamp")
+        
+        row = {
+            "target": _str(record["target"]),
+            "scanned_at": datetime.fromisoformat(timestamp) if timestamp else datetime.now()
+        }
+        
+        for name, kind, extract in COLUMNS[record["type"]]:
+            row[name] = _fits(kind, extract(findings))
+        
+        return row
+    
+    def write(self, record):
+        """Buffer a record's row, writing a row group once enough have built up"""
+        report_type = record["type"]
+        
+        if report_type not in COLUMNS:
+            self.stats["skipped"] += 1
+            logger.debug(f"No columnar schema for report type {report_type}")
+            return None
+        
+        row = self.flatten(record)
+        
+        with self._lock:
+            table = self._tables.get(report_type)
+            if table is None:
+                table = self._tables[report_type] = self._open(report_type)
+            
+            for name, column in table["columns"].items():
+                column.append(row[name])
+            table["rows"] += 1
+            self.stats["rows"] += 1
+            
+            if table["rows"] >= self.row_group_size:
+                self._write_group(table)
+            
+            return table["path"]
+    
+    def flush(self):
+        """Write out every partially filled row group"""
+        with self._lock:
+            for table in self._tables.values():
+                self._write_group(table)
+    
+    def close(self):
+        """Write remaining rows and finish every file (footers included)"""
+        with self._lock:
+            for table in self._tables.values():
+                self._write_group(table)
+                table["writer"].close()
+                logger.info(f"Export written: {table['path']}")
+            
+            self._tables = {}
+    
+    def _open(self, report_type):
+        """Start a new file for a report type"""
+        schema = self.schema(report_type)
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        path = os.path.join(
+            self.output_dir,
+            f"{self.prefix}_{report_type}_{stamp}_{os.getpid()}{self.EXTENSIONS[self.format]}"
+        )
+        
+        if self.format == "parquet":
+            writer = pq.ParquetWriter(path, schema, compression=Config.EXPORT_COMPRESSION)
+        else:
+            writer = pa.ipc.new_file(path, schema)
+        
+        self.files.append(path)
+        
+        return {
+            "path": path,
+            "schema": schema,
+            "writer": writer,
+            "columns": {name: [] for name in schema.names},
+            "rows": 0
+        }
+    
+    def _write_group(self, table):
+        """
+        Convert the buffered columns to Arrow and write them as one row group
+        The buffer is emptied even if that fails, so a bad group is dropped
+        (and logged) instead of failing every later write
+        """
+        if not table["rows"]:
+            return
+        
+        try:
+            batch = pa.record_batch(
+                [pa.array(table["columns"][field.name], type=field.type) for field in table["schema"]],
+                schema=table["schema"]
+            )
+            
+            if self.format == "parquet":
+                table["writer"].write_table(pa.Table.from_batches([batch]), row_group_size=table["rows"])
+            else:
+                table["writer"].write_batch(batch)
+            
+            self.stats["row_groups"] += 1
+        
+        except (pa.ArrowException, TypeError, ValueError, OSError) as e:
+            self.stats["dropped"] += table["rows"]
+            logger.error(f"Export to {table['path']} dropped {table['rows']} row(s): {str(e)}")
+        
+        finally:
+            table["columns"] = {name: [] for name in table["schema"].names}
+            table["rows"] = 0
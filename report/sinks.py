@@ -0,0 +1,242 @@
+"""
+ShadowRecon Report Sinks
+Pluggable destinations for scan findings: one JSON file per report, or
+append-only NDJSON streams with buffering, rotation and compression
+"""
+
+import gzip
+import json
+import os
+import threading
+import time
+import logging
+from datetime import datetime
+from config import Config
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+logger = logging.getLogger("ShadowRecon")
+
+class ReportSink:
+    """
+    Base class for report destinations
+    write() takes one report record (target, type, timestamp, findings) and
+    returns where it went; close() must be called to flush buffered output
+    """
+    
+    def write(self, record):
+        """Store one record; returns the file it was written to"""
+        raise NotImplementedError
+    
+    def flush(self):
+        """Push buffered records to disk"""
+        pass
+    
+    def close(self):
+        """Flush and release files"""
+        self.flush()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+
+class JSONFileSink(ReportSink):
+    """One pretty-printed JSON file per report (the original scans/ layout)"""
+    
+    def __init__(self, output_dir="scans"):
+        self.output_dir = output_dir
+        os.makedirs(output_dir, exist_ok=True)
+    
+    def write(self, record):
+        """Write the findings to their own timestamped file"""
+        # Microseconds keep names unique when one target is scanned twice a second
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        filename = f"{record['target']}_{record['type']}_{timestamp}.json"
+        filepath = os.path.join(self.output_dir, filename)
+        
+        with open(filepath, 'w', encoding='utf-8') as f:
+            json.dump(record["findings"], f, indent=2, default=str)
+        
+        logger.info(f"Report saved: {filepath}")
+        return filepath
+
+class NDJSONSink(ReportSink):
+    """
+    Append-only newline-delimited JSON, one record per line
+    Records are serialized into an in-memory buffer and written in one call
+    once it holds buffer_bytes, so a bulk run costs a handful of write
+    syscalls per megabyte instead of an open/write/close per target.
+    Files rotate after rotate_bytes of (uncompressed) output or rotate_seconds,
+    whichever comes first. Safe to share between threads and coroutines
+    """
+    
+    EXTENSIONS = {None: ".ndjson", "gzip": ".ndjson.gz", "zstd": ".ndjson.zst"}
+    
+    def __init__(self, output_dir="scans", prefix="shadowrecon", compression=None,
+                 rotate_bytes=None, rotate_seconds=None, buffer_bytes=None):
+        """
+        compression: None, 'gzip' or 'zstd' (needs the zstandard package)
+        rotate_bytes / rotate_seconds: 0 disables that rotation trigger
+        """
+        if compression not in self.EXTENSIONS:
+            raise ValueError(f"Unknown report compression: {compression}")
+        
+        if compression == "zstd" and not ZSTD_AVAILABLE:
+            raise RuntimeError("zstandard package not installed")
+        
+        self.output_dir = output_dir
+        self.prefix = prefix
+        self.compression = compression
+        self.rotate_bytes = Config.REPORT_ROTATE_MB * 1024 * 1024 if rotate_bytes is None else rotate_bytes
+        self.rotate_seconds = Config.REPORT_ROTATE_SECONDS if rotate_seconds is None else rotate_seconds
+        self.buffer_bytes = Config.REPORT_BUFFER_KB * 1024 if buffer_bytes is None else buffer_bytes
+        
+        self._lock = threading.Lock()
+        self._buffer = []
+        self._buffered = 0
+        self._raw = None
+        self._stream = None
+        self._path = None
+        self._opened_at = 0.0
+        self._file_bytes = 0
+        self._sequence = 0
+        self.files = []
+        self.stats = {"records": 0, "bytes": 0, "writes": 0, "files": 0}
+        
+        os.makedirs(output_dir, exist_ok=True)
+    
+    @property
+    def path(self):
+        """File currently being written (None before the first record)"""
+        return self._path
+    
+    def write(self, record):
+        """Buffer one record as a JSON line, rotating first if the file is due"""
+        line = (json.dumps(record, default=str, separators=(",", ":")) + "\n").encode("utf-8")
+        
+        with self._lock:
+            if self._stream is None or self._should_rotate():
+                self._rotate()
+            
+            self._buffer.append(line)
+            self._buffered += len(line)
+            self._file_bytes += len(line)
+            self.stats["records"] += 1
+            
+            if self._buffered >= self.buffer_bytes:
+                self._drain()
+            
+            return self._path
+    
+    def flush(self):
+        """Write out the buffer and flush the (compressed) stream"""
+        with self._lock:
+            self._drain()
+            if self._stream is not None:
+                self._stream.flush()
+    
+    def close(self):
+        """Flush and close the current file; the next write opens a new one"""
+        with self._lock:
+            self._close_file()
+    
+    def _should_rotate(self):
+        """True once the current file is over its size or age limit"""
+        if self.rotate_bytes and self._file_bytes >= self.rotate_bytes:
+            return True
+        if self.rotate_seconds and time.monotonic() - self._opened_at >= self.rotate_seconds:
+            return True
+        return False
+    
+    def _rotate(self):
+        """Close the current file (if any) and open the next one"""
+        self._close_file()
+        
+        self._sequence += 1
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self._path = os.path.join(
+            self.output_dir,
+            f"{self.prefix}_{stamp}_{os.getpid()}_{self._sequence:04d}{self.EXTENSIONS[self.compression]}"
+        )
+        
+        self._raw = open(self._path, 'ab')
+        
+        if self.compression == "gzip":
+            self._stream = gzip.GzipFile(fileobj=self._raw, mode='ab', compresslevel=Config.REPORT_GZIP_LEVEL)
+        elif self.compression == "zstd":
+            self._stream = zstandard.ZstdCompressor(level=Config.REPORT_ZSTD_LEVEL).stream_writer(self._raw)
+        else:
+            self._stream = self._raw
+        
+        self._opened_at = time.monotonic()
+        self._file_bytes = 0
+        self.files.append(self._path)
+        self.stats["files"] += 1
+        logger.info(f"Report stream opened: {self._path}")
+    
+    def _drain(self):
+        """Write the buffered lines in a single call"""
+        if not self._buffer:
+            return
+        
+        self._stream.write(b"".join(self._buffer))
+        self.stats["bytes"] += self._buffered
+        self.stats["writes"] += 1
+        self._buffer = []
+        self._buffered = 0
+    
+    def _close_file(self):
+        """Drain the buffer and close the current file, finishing its compressed frame"""
+        if self._stream is None:
+            return
+        
+        self._drain()
+        self._stream.close()
+        if self._raw is not self._stream and not self._raw.closed:
+            self._raw.close()
+        
+        self._stream = None
+        self._raw = None
+
+class FanoutSink(ReportSink):
+    """Send every record to several sinks, e.g. NDJSON plus a columnar export"""
+    
+    def __init__(self, sinks):
+        self.sinks = list(sinks)
+    
+    def write(self, record):
+        """Write to every sink; returns the first sink's location"""
+        paths = [sink.write(record) for sink in self.sinks]
+        return paths[0] if paths else None
+    
+    def flush(self):
+        for sink in self.sinks:
+            sink.flush()
+    
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
+
+def create_sink(kind=None, output_dir="scans", compression=None):
+    """
+    Build a sink from a name: 'json' (one file per report) or 'ndjson'
+    Defaults come from Config.REPORT_SINK and Config.REPORT_COMPRESSION
+    """
+    kind = (kind or Config.REPORT_SINK).lower()
+    
+    if kind == "json":
+        return JSONFileSink(output_dir)
+    
+    if kind == "ndjson":
+        compression = compression or Config.REPORT_COMPRESSION
+        if compression in ("", "none"):
+            compression = None
+        return NDJSONSink(output_dir, compression=compression)
+    
+    raise ValueError(f"Unknown report sink: {kind}")
@@ -0,0 +1,8 @@
+"""
+Shared test setup: make the project modules importable however pytest is run
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,162 @@
+"""
+Tests for the SQLite result cache: per-source TTLs, LRU eviction and the @cached decorator
+"""
+
+import asyncio
+
+import pytest
+
+from config import Config
+from engine import cache as cache_module
+from engine.cache import ResultCache, cached
+
+class Clock:
+    """Stand-in for time.time() in the cache"""
+    
+    def __init__(self):
+        self.now = 1000000.0
+    
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_module.time, "time", clock)
+    return clock
+
+@pytest.fixture
+def store(tmp_path, clock):
+    store = ResultCache(str(tmp_path / "cache.db"), max_entries=3)
+    yield store
+    store.close()
+
+class TestTTL:
+
+    def test_entries_expire_after_their_source_ttl(self, store, clock, monkeypatch):
+        monkeypatch.setitem(Config.CACHE_TTLS, "whois", 100)
+        monkeypatch.setitem(Config.CACHE_TTLS, "shodan", 10)
+        store.set("whois", "example.com", {"registrar": "Example"})
+        store.set("shodan", "192.0.2.1", {"open_ports": [80]})
+        
+        clock.now += 50
+        
+        assert store.get("whois", "example.com") == {"registrar": "Example"}
+        assert store.get("shodan", "192.0.2.1") is None
+    
+    def test_unknown_sources_use_the_default_ttl(self, store, clock, monkeypatch):
+        monkeypatch.setattr(Config, "CACHE_DEFAULT_TTL", 60)
+        store.set("something_new", "x", {"a": 1})
+        
+        clock.now += 59
+        assert store.get("something_new", "x") == {"a": 1}
+        clock.now += 2
+        assert store.get("something_new", "x") is None
+    
+    def test_set_replaces_an_expired_entry(self, store, clock, monkeypatch):
+        monkeypatch.setitem(Config.CACHE_TTLS, "dns", 10)
+        store.set("dns", "example.com", {"a_records": ["192.0.2.1"]})
+        clock.now += 20
+        store.set("dns", "example.com", {"a_records": ["192.0.2.2"]})
+        
+        assert store.get("dns", "example.com") == {"a_records": ["192.0.2.2"]}
+    
+    def test_entries_survive_reopening(self, tmp_path, clock):
+        path = str(tmp_path / "cache.db")
+        first = ResultCache(path)
+        first.set("whois", "example.com", {"registrar": "Example"})
+        first.close()
+        
+        second = ResultCache(path)
+        assert second.get("whois", "example.com") == {"registrar": "Example"}
+        second.close()
+
+class TestEviction:
+
+    def test_least_recently_used_entries_are_evicted(self, store, clock, monkeypatch):
+        monkeypatch.setattr(Config, "CACHE_EVICT_INTERVAL", 1)
+        for target in ["a", "b", "c"]:
+            store.set("dns", target, {"target": target})
+            clock.now += 1
+        
+        # Reading "a" makes "b" the least recently used
+        store.get("dns", "a")
+        clock.now += 1
+        store.set("dns", "d", {"target": "d"})
+        
+        assert [store.get("dns", target) is not None for target in "abcd"] == [True, False, True, True]
+    
+    def test_reads_are_not_written_until_the_next_write(self, store, monkeypatch):
+        monkeypatch.setattr(Config, "CACHE_TOUCH_BATCH", 1000)
+        store.set("dns", "a", {"target": "a"})
+        
+        store.get("dns", "a")
+        
+        assert ("dns", "a") in store._touched
+
+class Lookup:
+    """A cached lookup returning whatever the test sets in result"""
+    
+    calls = 0
+    result = None
+    
+    def __init__(self, domain):
+        self.domain = domain
+    
+    @cached("test_lookup", "domain")
+    async def fetch(self):
+        Lookup.calls += 1
+        return dict(Lookup.result)
+
+class TestDecorator:
+
+    @pytest.fixture(autouse=True)
+    def default(self, store, monkeypatch):
+        monkeypatch.setattr(ResultCache, "_default", store)
+        monkeypatch.setattr(ResultCache, "enabled", True)
+        monkeypatch.setattr(ResultCache, "refresh", False)
+        Lookup.calls = 0
+        Lookup.result = {"value": 1, "error": None}
+    
+    def fetch(self):
+        return asyncio.run(Lookup("example.com").fetch())
+    
+    def test_second_call_is_served_from_the_cache(self):
+        self.fetch()
+        
+        assert self.fetch() == {"value": 1, "error": None}
+        assert Lookup.calls == 1
+    
+    def test_errors_are_not_cached(self):
+        Lookup.result = {"value": None, "error": "timeout"}
+        self.fetch()
+        self.fetch()
+        
+        assert Lookup.calls == 2
+    
+    def test_refresh_skips_reads_but_stores(self, monkeypatch):
+        self.fetch()
+        monkeypatch.setattr(ResultCache, "refresh", True)
+        Lookup.result = {"value": 2, "error": None}
+        
+        assert self.fetch() == {"value": 2, "error": None}
+        monkeypatch.setattr(ResultCache, "refresh", False)
+        assert self.fetch() == {"value": 2, "error": None}
+        assert Lookup.calls == 2
+    
+    def test_disabled_cache_is_bypassed(self, store, monkeypatch):
+        monkeypatch.setattr(ResultCache, "enabled", False)
+        self.fetch()
+        self.fetch()
+        
+        assert Lookup.calls == 2
+        assert store.get("test_lookup", "example.com") is None
+    
+    def test_outcomes_are_traced(self):
+        async def scan():
+            trace = ResultCache.trace()
+            await Lookup("example.com").fetch()
+            return trace
+        
+        assert asyncio.run(scan()) == {"test_lookup": "fetched"}
+        assert asyncio.run(scan()) == {"test_lookup": "cached"}
@@ -0,0 +1,218 @@
+"""
+Tests for the bulk run checkpoint journal and resuming from the lookups it records
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from config import Config
+from engine.cache import ResultCache, cached
+from engine.checkpoint import CheckpointJournal
+from engine.pipeline import Pipeline
+
+def lines(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+@pytest.fixture
+def journal_path(tmp_path):
+    return str(tmp_path / "run.ndjson")
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = ResultCache(str(tmp_path / "cache.db"))
+    monkeypatch.setattr(ResultCache, "_default", cache)
+    monkeypatch.setattr(ResultCache, "enabled", True)
+    monkeypatch.setattr(ResultCache, "refresh", False)
+    yield cache
+    cache.close()
+
+class Lookup:
+    """A cached lookup that counts how often it really runs"""
+    
+    calls = []
+    
+    def __init__(self, ip):
+        self.ip = ip
+    
+    @cached("test_source", "ip")
+    async def fetch(self):
+        Lookup.calls.append(self.ip)
+        await asyncio.sleep(0.01)
+        return {"ip": self.ip, "error": None}
+
+@pytest.fixture(autouse=True)
+def reset_calls():
+    Lookup.calls = []
+
+async def scan(journal, target, ip):
+    """What BulkScanner does per target: bind the journal, then run lookups"""
+    journal.bind(target)
+    return await Lookup(ip).fetch()
+
+class TestJournal:
+
+    def test_records_and_resumes_targets(self, journal_path):
+        journal = CheckpointJournal(journal_path, sync_every=1)
+        journal.mark("a.com")
+        journal.mark("b.com", "timeout")
+        journal.close()
+        
+        resumed = CheckpointJournal(journal_path, resume=True)
+        
+        assert resumed.done == {"a.com"}
+        assert resumed.failed == {"b.com": "timeout"}
+        assert list(resumed.unfinished(["a.com", "b.com", "c.com"])) == ["b.com", "c.com"]
+        assert resumed.stats["skipped"] == 1
+        resumed.close()
+    
+    def test_refuses_to_overwrite_an_unfinished_run(self, journal_path):
+        journal = CheckpointJournal(journal_path)
+        journal.mark("a.com")
+        journal.close()
+        
+        with pytest.raises(FileExistsError):
+            CheckpointJournal(journal_path)
+        
+        assert lines(journal_path) == [{"s": "done", "t": "a.com"}]
+    
+    def test_finished_run_is_replaced(self, journal_path):
+        journal = CheckpointJournal(journal_path)
+        journal.mark("a.com")
+        journal.finish()
+        journal.close()
+        assert CheckpointJournal.finished(journal_path)
+        
+        CheckpointJournal(journal_path).close()
+        
+        assert lines(journal_path) == []
+    
+    def test_torn_last_line_is_dropped(self, journal_path):
+        with open(journal_path, "w") as f:
+            f.write('{"s":"done","t":"a.com"}\n{"s":"done","t":"b.c')
+        
+        journal = CheckpointJournal(journal_path, resume=True)
+        journal.mark("c.com")
+        journal.close()
+        
+        assert lines(journal_path) == [{"s": "done", "t": "a.com"}, {"s": "done", "t": "c.com"}]
+    
+    def test_sync_runs_in_the_executor_on_an_event_loop(self, journal_path):
+        journal = CheckpointJournal(journal_path, sync_every=1)
+        
+        async def mark():
+            journal.mark("a.com")
+            assert journal._syncing is not None
+            await journal._syncing
+        
+        asyncio.run(mark())
+        
+        assert journal.stats["syncs"] == 1
+        assert lines(journal_path) == [{"s": "done", "t": "a.com"}]
+        journal.close()
+
+class TestResume:
+
+    def test_lookups_are_journaled_once_for_every_caller(self, journal_path, cache):
+        journal = CheckpointJournal(journal_path)
+        
+        async def main():
+            # Both targets share one in-flight lookup
+            await asyncio.gather(scan(journal, "a.com", "192.0.2.1"), scan(journal, "b.com", "192.0.2.1"))
+        
+        asyncio.run(main())
+        journal.close()
+        
+        records = lines(journal_path)
+        assert Lookup.calls == ["192.0.2.1"]
+        assert records[0] == {"k": "test_source", "c": "192.0.2.1", "v": {"ip": "192.0.2.1", "error": None}}
+        assert sorted(records[1:], key=lambda record: record["p"]) == [
+            {"p": "a.com", "k": "test_source", "c": "192.0.2.1"},
+            {"p": "b.com", "k": "test_source", "c": "192.0.2.1"},
+        ]
+    
+    def test_resume_reuses_lookups_the_cache_lost(self, journal_path, cache):
+        journal = CheckpointJournal(journal_path)
+        asyncio.run(scan(journal, "a.com", "192.0.2.1"))
+        journal.mark("a.com", "interrupted")
+        journal.close()
+        
+        # Evicted (or expired) in the meantime
+        cache.clear()
+        
+        resumed = CheckpointJournal(journal_path, resume=True)
+        result = asyncio.run(scan(resumed, "a.com", "192.0.2.1"))
+        other = asyncio.run(scan(resumed, "b.com", "192.0.2.2"))
+        resumed.close()
+        
+        assert result == {"ip": "192.0.2.1", "error": None}
+        assert other == {"ip": "192.0.2.2", "error": None}
+        assert Lookup.calls == ["192.0.2.1", "192.0.2.2"]
+        assert resumed.stats["reused"] == 1
+    
+    def test_resume_without_the_cache(self, journal_path, monkeypatch):
+        monkeypatch.setattr(ResultCache, "enabled", False)
+        journal = CheckpointJournal(journal_path)
+        asyncio.run(scan(journal, "a.com", "192.0.2.1"))
+        journal.close()
+        
+        resumed = CheckpointJournal(journal_path, resume=True)
+        result = asyncio.run(scan(resumed, "a.com", "192.0.2.1"))
+        resumed.close()
+        
+        assert result == {"ip": "192.0.2.1", "error": None}
+        assert Lookup.calls == ["192.0.2.1"]
+    
+    def test_done_targets_lookups_are_not_reused(self, journal_path, cache):
+        journal = CheckpointJournal(journal_path)
+        asyncio.run(scan(journal, "a.com", "192.0.2.1"))
+        journal.mark("a.com")
+        journal.close()
+        
+        resumed = CheckpointJournal(journal_path, resume=True)
+        
+        assert resumed.lookups == {}
+        resumed.close()
+    
+    def test_lookup_shared_through_the_pipeline_memo_is_resumed(self, journal_path):
+        calls = []
+        
+        def pipeline():
+            pipeline = Pipeline(memo_size=10, memo_seconds=300)
+            
+            @pipeline.node("hosting", inputs=("ip",), key=lambda ip: ("hosting", ip))
+            async def hosting(ip):
+                calls.append(ip)
+                return {"ip": ip, "org": "Example Hosting", "error": None}
+            
+            return pipeline
+        
+        async def scan_all(journal, pipeline, targets):
+            async def one(target):
+                journal.bind(target)
+                return await pipeline.run(["hosting"], ip="192.0.2.1")
+            
+            # One after the other, so the second target is a memo hit
+            return [await asyncio.ensure_future(one(target)) for target in targets]
+        
+        journal = CheckpointJournal(journal_path)
+        first = pipeline()
+        asyncio.run(scan_all(journal, first, ["a.com", "b.com"]))
+        journal.mark("a.com")
+        journal.close()
+        
+        assert calls == ["192.0.2.1"]
+        assert first.stats["memo_hits"] == 1
+        
+        # A new process: no memo, and b.com was never finished
+        resumed = CheckpointJournal(journal_path, resume=True)
+        second = pipeline()
+        results = asyncio.run(scan_all(resumed, second, resumed.unfinished(["a.com", "b.com"])))
+        resumed.close()
+        
+        assert results == [{"hosting": {"ip": "192.0.2.1", "org": "Example Hosting", "error": None}}]
+        assert calls == ["192.0.2.1"]
+        assert second.stats["resumed"] == 1
+        assert resumed.stats["reused"] == 1
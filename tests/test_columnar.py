@@ -0,0 +1,115 @@
+"""
+Tests for the columnar export: typed schemas, row groups and recovery from a failed write
+"""
+
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+
+import pyarrow.ipc
+import pyarrow.parquet as pq
+
+from report.columnar import ColumnarSink
+
+def ip_record(n, **findings):
+    findings.setdefault("geolocation", {"country": "Testland", "latitude": 1.5, "longitude": "2.5"})
+    findings.setdefault("asn", {"asn": "AS15169"})
+    findings.setdefault("shodan", {"open_ports": [443, 22]})
+    findings.setdefault("portscan", {"open_ports": [22, 8080]})
+    return {"target": f"192.0.2.{n}", "type": "ip", "timestamp": "2024-01-01T12:00:00", "findings": findings}
+
+def write_all(sink, records):
+    with sink:
+        for record in records:
+            sink.write(record)
+    return sink
+
+class TestSchema:
+
+    def test_columns_are_typed(self):
+        schema = ColumnarSink.schema("ip")
+        
+        assert schema.field("scanned_at").type == pa.timestamp("us")
+        assert schema.field("asn").type == pa.int64()
+        assert schema.field("latitude").type == pa.float64()
+        assert schema.field("open_ports").type == pa.list_(pa.int32())
+    
+    def test_flatten_coerces_and_merges(self):
+        row = ColumnarSink.flatten(ip_record(1))
+        
+        assert row["asn"] == 15169
+        assert row["longitude"] == 2.5
+        assert row["open_ports"] == [22, 443, 8080]
+        assert row["city"] is None
+    
+    def test_values_a_column_cannot_hold_become_null(self):
+        record = {"target": "example.com", "type": "domain", "timestamp": None,
+                  "findings": {"ssl": {"has_ssl": "yes", "key_size": 2 ** 40}}}
+        
+        row = ColumnarSink.flatten(record)
+        
+        assert (row["has_ssl"], row["ssl_key_size"]) == (None, None)
+    
+    def test_parquet_file_has_the_schema(self, tmp_path):
+        sink = write_all(ColumnarSink(str(tmp_path), format="parquet"), [ip_record(1)])
+        
+        table = pq.read_table(sink.files[0])
+        assert table.schema.equals(ColumnarSink.schema("ip"))
+        assert table.column("target").to_pylist() == ["192.0.2.1"]
+    
+    def test_one_file_per_report_type(self, tmp_path):
+        email = {"target": "a@example.com", "type": "email", "timestamp": None,
+                 "findings": {"hibp": {"breach_count": 2}}}
+        sink = write_all(ColumnarSink(str(tmp_path)), [ip_record(1), email, {"target": "x", "type": "unknown", "findings": {}}])
+        
+        assert len(sink.files) == 2
+        assert sink.stats["skipped"] == 1
+
+class TestRowGroups:
+
+    def test_rows_are_written_in_groups(self, tmp_path):
+        sink = write_all(ColumnarSink(str(tmp_path), format="parquet", row_group_size=2), [ip_record(n) for n in range(5)])
+        
+        metadata = pq.ParquetFile(sink.files[0]).metadata
+        assert metadata.num_row_groups == 3
+        assert [metadata.row_group(i).num_rows for i in range(3)] == [2, 2, 1]
+        assert sink.stats["row_groups"] == 3
+    
+    def test_arrow_ipc_batches(self, tmp_path):
+        sink = write_all(ColumnarSink(str(tmp_path), format="arrow", row_group_size=2), [ip_record(n) for n in range(3)])
+        
+        with pa.memory_map(sink.files[0]) as source:
+            reader = pa.ipc.open_file(source)
+            assert reader.num_record_batches == 2
+            assert reader.read_all().num_rows == 3
+    
+    def test_flush_writes_a_partial_group(self, tmp_path):
+        sink = ColumnarSink(str(tmp_path), row_group_size=100)
+        sink.write(ip_record(1))
+        
+        sink.flush()
+        
+        assert sink.stats["row_groups"] == 1
+        sink.close()
+
+class TestFailedWrite:
+
+    def test_bad_group_is_dropped_and_the_buffer_reset(self, tmp_path):
+        sink = ColumnarSink(str(tmp_path), format="parquet", row_group_size=2)
+        sink.write(ip_record(1))
+        # A value that slipped past flatten(): the whole group fails to convert
+        sink._tables["ip"]["columns"]["asn"][-1] = "not a number"
+        sink.write(ip_record(2))
+        
+        assert sink.stats["dropped"] == 2
+        assert sink._tables["ip"]["rows"] == 0
+        assert all(not column for column in sink._tables["ip"]["columns"].values())
+        
+        write_all(sink, [ip_record(3), ip_record(4)])
+        
+        assert pq.read_table(sink.files[0]).column("target").to_pylist() == ["192.0.2.3", "192.0.2.4"]
+        assert sink.stats["row_groups"] == 1
+    
+    def test_unknown_format(self, tmp_path):
+        with pytest.raises(ValueError):
+            ColumnarSink(str(tmp_path), format="csv")
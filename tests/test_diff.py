@@ -0,0 +1,168 @@
+"""
+Tests for findings diffs and the history deltas built on them
+"""
+
+import copy
+import json
+
+import pytest
+
+from engine.diff import apply_delta, delta, diff_findings
+from engine.history import ScanHistory
+
+BASE = {
+    "domain": "example.com",
+    "timestamp": "2024-01-01T00:00:00",
+    "dns": {
+        "a_records": ["93.184.216.34"],
+        "mx_records": ["mx1.example.com", "mx2.example.com"],
+        "txt_records": []
+    },
+    "ssl": {"has_ssl": True, "valid_until": "2025-01-01", "key_size": 2048},
+    "shodan": {
+        "open_ports": [80, 443],
+        "services": [{"port": 80, "product": "nginx"}, {"port": 443, "product": "nginx"}]
+    },
+    "risk_score": 10
+}
+
+DELETE = object()
+
+def changed(**updates):
+    """Copy of BASE with some keys (nested ones as a__b) replaced, or removed with DELETE"""
+    document = copy.deepcopy(BASE)
+    for path, value in updates.items():
+        parent = document
+        keys = path.split("__")
+        for key in keys[:-1]:
+            parent = parent[key]
+        if value is DELETE:
+            parent.pop(keys[-1])
+        else:
+            parent[keys[-1]] = value
+    return document
+
+ROUND_TRIPS = {
+    "identical": BASE,
+    "scalar changed": changed(risk_score=40),
+    "key added": changed(dns__caa_records=["0 issue \"letsencrypt.org\""]),
+    "key removed": changed(ssl__key_size=DELETE),
+    "dict replaced by scalar": changed(ssl="unavailable", shodan__error="Invalid Shodan API key"),
+    "list item appended": changed(shodan__open_ports=[80, 443, 8080]),
+    "list item removed": changed(dns__mx_records=["mx2.example.com"]),
+    "list reordered": changed(dns__mx_records=["mx2.example.com", "mx1.example.com"]),
+    "dict list item changed": changed(shodan__services=[
+        {"port": 80, "product": "nginx"},
+        {"port": 443, "product": "apache"}
+    ]),
+    "list emptied": changed(shodan__open_ports=[]),
+    "bool vs int": changed(ssl__has_ssl=1),
+    "value to None": changed(risk_score=None, ssl__valid_until=None),
+}
+
+class TestDelta:
+
+    @pytest.mark.parametrize("new", ROUND_TRIPS.values(), ids=list(ROUND_TRIPS))
+    def test_round_trip(self, new):
+        # As stored by ScanHistory
+        ops = json.loads(json.dumps(delta(BASE, new)))
+        
+        assert apply_delta(copy.deepcopy(BASE), ops) == new
+    
+    @pytest.mark.parametrize("new", ROUND_TRIPS.values(), ids=list(ROUND_TRIPS))
+    def test_round_trip_keeps_types(self, new):
+        rebuilt = apply_delta(copy.deepcopy(BASE), delta(BASE, new))
+        
+        assert repr(rebuilt) == repr(new)
+    
+    def test_identical_documents_need_no_ops(self):
+        assert delta(BASE, copy.deepcopy(BASE)) == []
+    
+    def test_appended_items_use_a_list_op(self):
+        new = changed(shodan__open_ports=[80, 443, 8080])
+        
+        assert delta(BASE, new) == [["+", ["shodan", "open_ports"], [8080]]]
+    
+    def test_whole_document_replacement(self):
+        assert apply_delta(copy.deepcopy(BASE), delta(BASE, None)) is None
+        assert apply_delta(None, delta(None, BASE)) == BASE
+    
+    def test_chain_of_deltas(self):
+        versions = [BASE] + list(ROUND_TRIPS.values())
+        
+        document = copy.deepcopy(BASE)
+        for old, new in zip(versions, versions[1:]):
+            document = apply_delta(document, delta(old, new))
+            assert document == new
+
+class TestDiffFindings:
+
+    def test_timestamp_is_ignored(self):
+        assert diff_findings(BASE, changed(timestamp="2024-02-01T00:00:00")) == []
+    
+    def test_list_order_is_ignored(self):
+        new = changed(dns__mx_records=["mx2.example.com", "mx1.example.com"])
+        
+        assert diff_findings(BASE, new) == []
+    
+    def test_reports_items_and_values(self):
+        new = changed(
+            risk_score=40,
+            shodan__open_ports=[443, 8080],
+            dns__caa_records=["0 issue \"letsencrypt.org\""],
+            ssl__key_size=DELETE
+        )
+        
+        assert diff_findings(BASE, new) == [
+            {"path": "dns.caa_records", "op": "added", "value": ["0 issue \"letsencrypt.org\""]},
+            {"path": "risk_score", "op": "changed", "old": 10, "new": 40},
+            {"path": "shodan.open_ports", "op": "added", "items": [8080]},
+            {"path": "shodan.open_ports", "op": "removed", "items": [80]},
+            {"path": "ssl.key_size", "op": "removed", "value": 2048},
+        ]
+    
+    def test_dict_items_compare_by_content(self):
+        new = changed(shodan__services=[
+            {"product": "nginx", "port": 443},
+            {"port": 80, "product": "nginx"}
+        ])
+        
+        assert diff_findings(BASE, new) == []
+
+class TestHistoryChains:
+
+    @pytest.fixture
+    def history(self, tmp_path):
+        store = ScanHistory(str(tmp_path / "history.db"), batch_size=1000, flush_seconds=3600, snapshot_interval=4)
+        yield store
+        store.close()
+    
+    def test_every_scan_is_rebuilt_exactly(self, history):
+        versions = [BASE] + list(ROUND_TRIPS.values())
+        for index, findings in enumerate(versions):
+            history.add("example.com", "domain", findings, scanned_at=1000 + index)
+        
+        rows = history.history("example.com", limit=len(versions), include_findings=True)
+        
+        assert [row["findings"] for row in reversed(rows)] == versions
+    
+    def test_rescans_are_stored_as_deltas(self, history):
+        for index in range(8):
+            history.add("example.com", "domain", changed(risk_score=index), scanned_at=1000 + index)
+        history.flush()
+        
+        depths = [row[0] for row in history._conn.execute("SELECT depth FROM scans ORDER BY scanned_at")]
+        
+        # A full snapshot every snapshot_interval scans, deltas in between
+        assert depths == [0, 1, 2, 3, 0, 1, 2, 3]
+        assert history.latest("example.com")["findings"] == changed(risk_score=7)
+    
+    def test_changes_between_scans(self, history):
+        history.add("example.com", "domain", BASE, scanned_at=1000)
+        history.add("example.com", "domain", changed(timestamp="later"), scanned_at=1001)
+        history.add("example.com", "domain", changed(risk_score=40), scanned_at=1002)
+        
+        changes = history.changes("example.com")
+        
+        assert len(changes) == 1
+        assert changes[0]["changes"] == [{"path": "risk_score", "op": "changed", "old": 10, "new": 40}]
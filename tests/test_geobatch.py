@@ -0,0 +1,116 @@
+"""
+Tests for batched ip-api geolocation: coalescing lookups and mapping results back to each IP
+"""
+
+import asyncio
+import contextlib
+
+import pytest
+
+from config import Config
+from engine import HTTPClient
+from modules.ip import GeoBatcher
+
+def record(ip, city):
+    return {"status": "success", "query": ip, "country": "Testland", "countryCode": "TL", "city": city}
+
+class Response:
+    """Just enough of an aiohttp response"""
+    
+    def __init__(self, status, body=None):
+        self.status = status
+        self.body = body
+    
+    async def json(self, content_type=None):
+        return self.body
+
+@pytest.fixture
+def posts(monkeypatch):
+    """Replace HTTPClient.post; set posts.reply to a function of the posted IPs"""
+    sent = []
+    
+    @contextlib.asynccontextmanager
+    async def post(url, json=None, **kwargs):
+        sent.append(list(json))
+        yield posts.reply(json)
+    
+    posts = type("Posts", (), {"sent": sent, "reply": None})
+    monkeypatch.setattr(HTTPClient, "post", post)
+    monkeypatch.setattr(Config, "GEO_BATCH_SIZE", 100)
+    monkeypatch.setattr(Config, "GEO_BATCH_WINDOW", 0.01)
+    return posts
+
+class TestBatcher:
+
+    def test_concurrent_lookups_share_one_batch(self, posts):
+        posts.reply = lambda ips: Response(200, [record(ip, f"city-{ip}") for ip in ips])
+        
+        async def main():
+            batcher = GeoBatcher.for_running_loop()
+            results = await asyncio.gather(*(
+                batcher.lookup(ip) for ip in ["192.0.2.1", "192.0.2.2", "192.0.2.1", "192.0.2.3"]
+            ))
+            return batcher, results
+        
+        batcher, results = asyncio.run(main())
+        
+        assert posts.sent == [["192.0.2.1", "192.0.2.2", "192.0.2.3"]]
+        assert [result["city"] for result in results] == [
+            "city-192.0.2.1", "city-192.0.2.2", "city-192.0.2.1", "city-192.0.2.3"
+        ]
+        # Each waiter gets its own copy
+        assert results[0] is not results[2]
+        assert batcher._tasks == set()
+    
+    def test_full_batch_is_sent_without_waiting(self, posts, monkeypatch):
+        monkeypatch.setattr(Config, "GEO_BATCH_SIZE", 2)
+        monkeypatch.setattr(Config, "GEO_BATCH_WINDOW", 60)
+        posts.reply = lambda ips: Response(200, [record(ip, "x") for ip in ips])
+        
+        async def main():
+            batcher = GeoBatcher.for_running_loop()
+            return await asyncio.wait_for(
+                asyncio.gather(batcher.lookup("192.0.2.1"), batcher.lookup("192.0.2.2")), 5
+            )
+        
+        asyncio.run(main())
+        
+        assert posts.sent == [["192.0.2.1", "192.0.2.2"]]
+
+class TestPostBatch:
+
+    def test_results_follow_the_query_field(self, posts):
+        # ip-api echoes each address in "query"; the reply order is not relied on
+        posts.reply = lambda ips: Response(200, [record("192.0.2.2", "second"), record("192.0.2.1", "first")])
+        
+        results = asyncio.run(GeoBatcher.geolocate_many(["192.0.2.1", "192.0.2.2"]))
+        
+        assert results["192.0.2.1"]["city"] == "first"
+        assert results["192.0.2.2"]["city"] == "second"
+    
+    def test_missing_and_failed_records(self, posts):
+        posts.reply = lambda ips: Response(200, [{"status": "fail", "query": "192.0.2.1"}])
+        
+        results = asyncio.run(GeoBatcher.geolocate_many(["192.0.2.1", "192.0.2.2"]))
+        
+        assert results["192.0.2.1"]["error"] == "IP geolocation failed"
+        assert results["192.0.2.2"]["error"] == "Missing from batch response"
+    
+    def test_http_error_answers_every_ip(self, posts):
+        posts.reply = lambda ips: Response(429)
+        
+        results = asyncio.run(GeoBatcher.geolocate_many(["192.0.2.1", "192.0.2.2"]))
+        
+        assert {ip: result["error"] for ip, result in results.items()} == {
+            "192.0.2.1": "HTTP 429", "192.0.2.2": "HTTP 429"
+        }
+    
+    def test_large_lists_are_chunked(self, posts, monkeypatch):
+        monkeypatch.setattr(Config, "GEO_BATCH_SIZE", 500)
+        posts.reply = lambda ips: Response(200, [record(ip, "x") for ip in ips])
+        ips = [f"192.0.2.{n}" for n in range(1, 251)]
+        
+        results = asyncio.run(GeoBatcher.geolocate_many(ips))
+        
+        assert [len(chunk) for chunk in posts.sent] == [100, 100, 50]
+        assert sorted(results) == sorted(ips)
@@ -0,0 +1,213 @@
+"""
+Tests for the lookup pipeline: dependency order, optional inputs and the shared-call memo
+"""
+
+import asyncio
+
+import pytest
+
+from engine.cache import ResultCache
+from engine.pipeline import Pipeline
+
+@pytest.fixture(autouse=True)
+def no_refresh(monkeypatch):
+    monkeypatch.setattr(ResultCache, "refresh", False)
+
+def run(pipeline, outputs, **seeds):
+    return asyncio.run(pipeline.run(outputs, **seeds))
+
+class TestOrdering:
+
+    def test_nodes_wait_for_their_inputs(self):
+        pipeline = Pipeline()
+        events = []
+        
+        @pipeline.node("ip", ["domain"])
+        async def ip(domain):
+            await asyncio.sleep(0.02)
+            events.append("ip")
+            return "192.0.2.1"
+        
+        @pipeline.node("whois", ["domain"])
+        async def whois(domain):
+            events.append("whois")
+            return {"domain": domain}
+        
+        @pipeline.node("geo", ["ip"])
+        async def geo(address):
+            events.append("geo")
+            return {"ip": address}
+        
+        values = run(pipeline, ["geo", "whois"], domain="example.com")
+        
+        assert values == {"geo": {"ip": "192.0.2.1"}, "whois": {"domain": "example.com"}}
+        # whois does not wait for the slow ip branch; geo does
+        assert events == ["whois", "ip", "geo"]
+    
+    def test_shared_input_is_computed_once_per_run(self):
+        pipeline = Pipeline()
+        calls = []
+        
+        @pipeline.node("ip", ["domain"])
+        async def ip(domain):
+            calls.append(domain)
+            return "192.0.2.1"
+        
+        @pipeline.node("geo", ["ip"])
+        async def geo(address):
+            return address
+        
+        @pipeline.node("asn", ["ip"])
+        async def asn(address):
+            return address
+        
+        run(pipeline, ["geo", "asn"], domain="example.com")
+        
+        assert calls == ["example.com"]
+    
+    def test_seeds_override_nodes(self):
+        pipeline = Pipeline()
+        
+        @pipeline.node("ip", ["domain"])
+        async def ip(domain):
+            raise AssertionError("seeded nodes are not run")
+        
+        @pipeline.node("geo", ["ip"])
+        async def geo(address):
+            return address
+        
+        assert run(pipeline, ["geo"], ip="192.0.2.1") == {"geo": "192.0.2.1"}
+    
+    def test_unknown_node(self):
+        with pytest.raises(KeyError):
+            run(Pipeline(), ["missing"])
+
+class TestOptionalInputs:
+
+    @pytest.fixture
+    def pipeline(self):
+        pipeline = Pipeline()
+        
+        @pipeline.node("report", ["ip", "shodan"], optional=["shodan"])
+        async def report(ip, shodan):
+            return {"ip": ip, "shodan": shodan}
+        
+        return pipeline
+    
+    def test_optional_input_passes_none_through(self, pipeline):
+        values = run(pipeline, ["report"], ip="192.0.2.1", shodan=None)
+        
+        assert values == {"report": {"ip": "192.0.2.1", "shodan": None}}
+    
+    def test_missing_required_input_skips_the_node(self, pipeline):
+        values = run(pipeline, ["report"], ip=None, shodan={"ports": [80]})
+        
+        assert values == {"report": None}
+        assert pipeline.stats["skipped"] == 1
+
+class TestMemo:
+
+    @staticmethod
+    def keyed(pipeline, result):
+        calls = []
+        
+        @pipeline.node("shodan", ["ip"], key=lambda ip: ("shodan", ip))
+        async def shodan(ip):
+            calls.append(ip)
+            await asyncio.sleep(0.01)
+            return result(ip)
+        
+        return calls
+    
+    def test_results_are_memoized_across_runs(self):
+        pipeline = Pipeline(memo_size=10, memo_seconds=300)
+        calls = self.keyed(pipeline, lambda ip: {"ip": ip, "error": None})
+        
+        first = run(pipeline, ["shodan"], ip="192.0.2.1")
+        first["shodan"]["ip"] = "changed by a caller"
+        second = run(pipeline, ["shodan"], ip="192.0.2.1")
+        
+        assert calls == ["192.0.2.1"]
+        assert second == {"shodan": {"ip": "192.0.2.1", "error": None}}
+        assert pipeline.stats["memo_hits"] == 1
+    
+    def test_concurrent_runs_share_one_call(self):
+        pipeline = Pipeline(memo_size=10, memo_seconds=300)
+        calls = self.keyed(pipeline, lambda ip: {"ip": ip, "error": None})
+        
+        async def main():
+            return await asyncio.gather(*(pipeline.run(["shodan"], ip="192.0.2.1") for _ in range(3)))
+        
+        results = asyncio.run(main())
+        
+        assert calls == ["192.0.2.1"]
+        assert all(result == {"shodan": {"ip": "192.0.2.1", "error": None}} for result in results)
+        assert pipeline.stats["shared"] == 2
+    
+    def test_errors_are_not_memoized(self):
+        pipeline = Pipeline(memo_size=10, memo_seconds=300)
+        calls = self.keyed(pipeline, lambda ip: {"ip": ip, "error": "rate limited"})
+        
+        run(pipeline, ["shodan"], ip="192.0.2.1")
+        run(pipeline, ["shodan"], ip="192.0.2.1")
+        
+        assert calls == ["192.0.2.1", "192.0.2.1"]
+        assert pipeline.stats["memo_hits"] == 0
+    
+    def test_expired_entries_are_fetched_again(self):
+        pipeline = Pipeline(memo_size=10, memo_seconds=0)
+        calls = self.keyed(pipeline, lambda ip: {"ip": ip, "error": None})
+        
+        run(pipeline, ["shodan"], ip="192.0.2.1")
+        run(pipeline, ["shodan"], ip="192.0.2.1")
+        
+        assert len(calls) == 2
+    
+    def test_memo_is_bounded(self):
+        pipeline = Pipeline(memo_size=2, memo_seconds=300)
+        calls = self.keyed(pipeline, lambda ip: {"ip": ip, "error": None})
+        
+        for ip in ["192.0.2.1", "192.0.2.2", "192.0.2.3", "192.0.2.1"]:
+            run(pipeline, ["shodan"], ip=ip)
+        
+        assert calls == ["192.0.2.1", "192.0.2.2", "192.0.2.3", "192.0.2.1"]
+    
+    def test_refresh_bypasses_the_memo(self, monkeypatch):
+        pipeline = Pipeline(memo_size=10, memo_seconds=300)
+        calls = self.keyed(pipeline, lambda ip: {"ip": ip, "error": None})
+        
+        run(pipeline, ["shodan"], ip="192.0.2.1")
+        monkeypatch.setattr(ResultCache, "refresh", True)
+        run(pipeline, ["shodan"], ip="192.0.2.1")
+        
+        assert calls == ["192.0.2.1", "192.0.2.1"]
+        assert pipeline.stats["memo_hits"] == 0
+
+class TestSourceTrace:
+
+    @staticmethod
+    def traced(pipeline):
+        @pipeline.node("shodan", ["ip"], key=lambda ip: ("shodan", ip))
+        async def shodan(ip):
+            # What a @cached lookup notes for the scan that runs it
+            ResultCache._note("shodan", "fetched")
+            await asyncio.sleep(0.01)
+            return {"ip": ip, "error": None}
+    
+    def test_memo_hits_and_shared_calls_are_traced_as_cached(self):
+        pipeline = Pipeline(memo_size=10, memo_seconds=300)
+        self.traced(pipeline)
+        
+        async def scan():
+            trace = ResultCache.trace()
+            await pipeline.run(["shodan"], ip="192.0.2.1")
+            return trace
+        
+        async def main():
+            concurrent = await asyncio.gather(scan(), scan())
+            later = await asyncio.ensure_future(scan())
+            return concurrent + [later]
+        
+        traces = asyncio.run(main())
+        
+        assert traces == [{"shodan": "fetched"}, {"shodan": "cached"}, {"shodan": "cached"}]
@@ -0,0 +1,142 @@
+"""
+Tests for the TCP connect scanner: port specs, open/closed/filtered ports and local resource errors
+"""
+
+import asyncio
+import errno
+import socket
+import time
+
+import pytest
+
+from engine import portscan
+from engine.portscan import PortScanner
+
+async def listen(banner=None):
+    """Local TCP server sending banner on connect; returns (server, port)"""
+    async def handle(reader, writer):
+        if banner:
+            writer.write(banner)
+            await writer.drain()
+        writer.close()
+    
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    return server, server.sockets[0].getsockname()[1]
+
+def closed_port():
+    """A local port with nothing listening on it"""
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+class TestParsePorts:
+
+    def test_ranges_and_lists(self):
+        assert PortScanner.parse_ports("22, 80,8000-8002,80") == [22, 80, 8000, 8001, 8002]
+        assert PortScanner.parse_ports([443, 80, 443]) == [80, 443]
+    
+    def test_named_lists(self):
+        assert len(PortScanner.parse_ports("top100")) == 100
+        assert len(PortScanner.parse_ports("TOP1000")) == 1000
+    
+    @pytest.mark.parametrize("spec", ["0", "80-22", "65536", "http"])
+    def test_invalid(self, spec):
+        with pytest.raises(ValueError):
+            PortScanner.parse_ports(spec)
+
+class TestScan:
+
+    def test_open_and_closed_ports(self):
+        async def main():
+            server, open_port = await listen(b"SSH-2.0-OpenSSH_9.6p1 Ubuntu\r\n")
+            shut = closed_port()
+            scanner = PortScanner(ports=[open_port, shut], timeout=1, banners=True)
+            try:
+                return await scanner.scan_host("127.0.0.1"), open_port, scanner.stats
+            finally:
+                server.close()
+        
+        result, open_port, stats = asyncio.run(main())
+        
+        assert result["error"] is None
+        assert result["open_ports"] == [open_port]
+        service, = result["services"]
+        assert (service["product"], service["version"]) == ("OpenSSH", "9.6p1")
+        assert service["banner"].startswith("SSH-2.0-")
+        assert (stats["attempts"], stats["open"]) == (2, 1)
+    
+    def test_filtered_port_gives_up_after_the_timeout(self):
+        # TEST-NET-1: never answers (or is unreachable), either way not open
+        scanner = PortScanner(ports=[81], timeout=0.2, banners=False)
+        
+        started = time.monotonic()
+        result = asyncio.run(scanner.scan_host("192.0.2.1"))
+        
+        assert result["open_ports"] == []
+        assert time.monotonic() - started < 2
+    
+    def test_unresolvable_host(self):
+        scanner = PortScanner(ports=[80], timeout=0.2)
+        
+        result = asyncio.run(scanner.scan_host("does-not-exist.invalid"))
+        
+        assert result["open_ports"] == []
+        assert result["error"].startswith("Could not resolve host")
+    
+    def test_many_hosts_yield_one_result_each(self):
+        async def main():
+            server, port = await listen()
+            scanner = PortScanner(ports=[port], timeout=1, banners=False, per_host=1)
+            try:
+                return [result async for result in scanner.scan_many(["127.0.0.1", "127.0.0.2", "127.0.0.1"])]
+            finally:
+                server.close()
+        
+        results = asyncio.run(main())
+        
+        assert sorted(result["ip"] for result in results) == ["127.0.0.1", "127.0.0.2"]
+
+class TestLocalErrors:
+
+    @pytest.fixture
+    def sockets(self, monkeypatch):
+        """socket.socket failing with EMFILE the first `failures` times"""
+        state = {"failures": 0}
+        real = socket.socket
+        
+        def make(*args, **kwargs):
+            if state["failures"]:
+                state["failures"] -= 1
+                raise OSError(errno.EMFILE, "Too many open files")
+            return real(*args, **kwargs)
+        
+        monkeypatch.setattr(portscan.socket, "socket", make)
+        monkeypatch.setattr(PortScanner, "LOCAL_BACKOFF", 0.001)
+        return state
+    
+    def scan(self, failures, sockets):
+        async def main():
+            server, port = await listen()
+            scanner = PortScanner(ports=[port], timeout=1, banners=False)
+            sockets["failures"] = failures
+            try:
+                return await scanner.scan_host("127.0.0.1"), port, scanner.stats
+            finally:
+                server.close()
+        
+        return asyncio.run(main())
+    
+    def test_emfile_is_retried(self, sockets):
+        result, port, stats = self.scan(2, sockets)
+        
+        assert result["open_ports"] == [port]
+        assert result["error"] is None
+    
+    def test_exhausted_sockets_are_an_error_not_a_closed_port(self, sockets):
+        result, port, stats = self.scan(PortScanner.LOCAL_RETRIES + 1, sockets)
+        
+        assert result["open_ports"] == []
+        assert result["error"] == "1 of 1 port(s) not scanned: Too many open files"
+        assert stats["unscanned"] == 1
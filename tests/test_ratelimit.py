@@ -0,0 +1,151 @@
+"""
+Tests for rate limit keys and token buckets shared between processes through SQLite
+"""
+
+import asyncio
+
+import pytest
+
+from config import Config
+from engine import ratelimit
+from engine.ratelimit import RateLimiter, SharedTokenBucket, TokenBucket
+
+class Clock:
+    """Stand-in for time.time() that only moves when told to"""
+    
+    def __init__(self):
+        self.now = 1000000.0
+    
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(ratelimit.time, "time", clock)
+    return clock
+
+@pytest.fixture
+def limits(monkeypatch):
+    limits = {"ip-api.com": (45, 60), "ip-api.com/batch": (15, 60), "api.shodan.io": (1, 1)}
+    monkeypatch.setattr(Config, "RATE_LIMITS", limits)
+    return limits
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "ratelimit.db")
+
+def drain(bucket):
+    """Take tokens until the bucket asks us to wait; returns how many were taken"""
+    taken = 0
+    while bucket.try_acquire() == 0:
+        taken += 1
+    return taken
+
+class TestKeys:
+
+    @pytest.mark.parametrize("url, key", [
+        ("http://ip-api.com/json/192.0.2.1", "ip-api.com"),
+        ("http://ip-api.com/batch", "ip-api.com/batch"),
+        ("http://ip-api.com/batch/", "ip-api.com/batch"),
+        ("http://ip-api.com/batchx", "ip-api.com"),
+        ("https://api.shodan.io/shodan/host/192.0.2.1", "api.shodan.io"),
+        ("https://example.com/", "example.com"),
+    ])
+    def test_key_for(self, limits, url, key):
+        assert RateLimiter.key_for(url) == key
+    
+    def test_buckets_are_per_key(self, limits, path):
+        RateLimiter.configure(shared_path=path)
+        try:
+            single = RateLimiter.bucket_for("ip-api.com")
+            batch = RateLimiter.bucket_for("ip-api.com/batch")
+            
+            assert isinstance(batch, SharedTokenBucket)
+            assert (single.rate, batch.rate) == (45, 15)
+            assert RateLimiter.bucket_for("ip-api.com/batch") is batch
+            assert RateLimiter.bucket_for("example.com") is None
+        finally:
+            RateLimiter.configure()
+
+class TestTokenBucket:
+
+    def test_capacity_then_wait(self):
+        bucket = TokenBucket(rate=3, per=60)
+        
+        assert drain(bucket) == 3
+        assert bucket.try_acquire() == pytest.approx(20, rel=0.01)
+    
+    def test_penalize_blocks_and_drains(self):
+        bucket = TokenBucket(rate=3, per=60)
+        bucket.penalize(5)
+        
+        assert 4 < bucket.try_acquire() <= 5
+
+class TestSharedTokenBucket:
+
+    def test_processes_share_one_budget(self, path, clock):
+        # Two workers (separate connections) on one host's budget of 8
+        first = SharedTokenBucket(path, "ip-api.com", rate=8, per=60)
+        second = SharedTokenBucket(path, "ip-api.com", rate=8, per=60)
+        
+        taken = 0
+        for bucket in [first, second] * 4:
+            if bucket.try_acquire() == 0:
+                taken += 1
+        
+        assert taken == 8
+        assert first.try_acquire() > 0
+        assert second.try_acquire() > 0
+    
+    def test_tokens_are_leased_in_blocks(self, path, clock):
+        bucket = SharedTokenBucket(path, "ip-api.com", rate=40, per=60)
+        
+        assert drain(bucket) == 40
+        # 40 tokens in leases of min(RATE_LIMIT_LEASE_TOKENS, capacity / 4)
+        assert bucket.stats["leases"] == 40 // bucket.lease_size
+    
+    def test_host_and_path_keys_have_separate_budgets(self, path, clock):
+        single = SharedTokenBucket(path, "ip-api.com", rate=4, per=60)
+        batch = SharedTokenBucket(path, "ip-api.com/batch", rate=4, per=60)
+        
+        assert drain(batch) == 4
+        assert drain(single) == 4
+    
+    def test_budget_refills_over_time(self, path, clock):
+        bucket = SharedTokenBucket(path, "ip-api.com", rate=4, per=60)
+        drain(bucket)
+        
+        clock.now += 30
+        
+        assert drain(bucket) == 2
+    
+    def test_unspent_lease_expires(self, path, clock):
+        bucket = SharedTokenBucket(path, "ip-api.com", rate=8, per=60)
+        bucket.try_acquire()
+        assert bucket.leased == 1
+        
+        # Long enough for the shared budget to earn the leased tokens back
+        clock.now += 60
+        
+        assert bucket._take_leased() is None
+    
+    def test_penalty_pauses_every_process(self, path, clock):
+        first = SharedTokenBucket(path, "ip-api.com", rate=8, per=60)
+        second = SharedTokenBucket(path, "ip-api.com", rate=8, per=60)
+        
+        first.penalize(30)
+        
+        assert second.try_acquire() == pytest.approx(30)
+        clock.now += 31
+        assert second.try_acquire() == 0
+    
+    def test_async_acquire(self, path, clock):
+        bucket = SharedTokenBucket(path, "ip-api.com", rate=8, per=60)
+        
+        async def main():
+            await asyncio.gather(*(bucket.acquire() for _ in range(5)))
+        
+        asyncio.run(main())
+        
+        assert bucket.stats["taken"] == 5
@@ -0,0 +1,199 @@
+"""
+Tests for the DNS engine: matching responses to queries, failure handling and the TTL cache
+"""
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("dns.message")
+
+import dns.message
+import dns.rcode
+import dns.rdatatype
+import dns.rrset
+
+from engine import resolver
+from engine.cache import ResultCache
+from engine.resolver import DNSEngine, DNSLookupError
+from modules.email import EmailRecon
+
+class FakeServer(asyncio.DatagramProtocol):
+    """
+    Nameserver on 127.0.0.1 answering by name
+      nx.test          NXDOMAIN with a 30 s SOA minimum
+      fail.test        SERVFAIL
+      spoofed.test     a reply with the wrong ID first, then the real one
+      *.test           A 192.0.2.1, TTL 60 (MX 10 mail.<name> for MX)
+    """
+    
+    def __init__(self):
+        self.transport = None
+        self.queries = []
+    
+    def connection_made(self, transport):
+        self.transport = transport
+    
+    def datagram_received(self, data, addr):
+        query = dns.message.from_wire(data)
+        question = query.question[0]
+        name = question.name.to_text().rstrip(".")
+        self.queries.append(name)
+        response = dns.message.make_response(query)
+        
+        if name.startswith("nx."):
+            response.set_rcode(dns.rcode.NXDOMAIN)
+            response.authority.append(dns.rrset.from_text(
+                "test.", 3600, "IN", "SOA", "ns.test. admin.test. 1 3600 600 86400 30"
+            ))
+        elif name.startswith("fail."):
+            response.set_rcode(dns.rcode.SERVFAIL)
+        elif question.rdtype == dns.rdatatype.MX:
+            response.answer.append(dns.rrset.from_text(name + ".", 60, "IN", "MX", f"10 mail.{name}."))
+        else:
+            response.answer.append(dns.rrset.from_text(name + ".", 60, "IN", "A", "192.0.2.1"))
+        
+        if name.startswith("spoofed."):
+            forged = dns.message.make_response(query)
+            forged.id = (query.id + 1) % 65536
+            forged.answer.append(dns.rrset.from_text(name + ".", 60, "IN", "A", "203.0.113.66"))
+            self.transport.sendto(forged.to_wire(), addr)
+        
+        self.transport.sendto(response.to_wire(), addr)
+
+class Clock:
+    """Stand-in for time.monotonic() in the resolver"""
+    
+    def __init__(self):
+        self.now = 1000.0
+    
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(resolver.time, "monotonic", clock)
+    return clock
+
+def with_server(test):
+    """Run test(engine, server) on a fresh loop against a FakeServer"""
+    async def main():
+        loop = asyncio.get_running_loop()
+        transport, server = await loop.create_datagram_endpoint(FakeServer, local_addr=("127.0.0.1", 0))
+        port = transport.get_extra_info("sockname")[1]
+        engine = DNSEngine(nameservers=["127.0.0.1"], port=port, timeout=1)
+        
+        try:
+            return await test(engine, server)
+        finally:
+            engine.close()
+            transport.close()
+    
+    return asyncio.run(main())
+
+class TestQuery:
+
+    def test_answer(self):
+        async def test(engine, server):
+            return await engine.query("a.test", "A")
+        
+        assert with_server(test) == ["192.0.2.1"]
+    
+    def test_reply_with_the_wrong_id_is_ignored(self):
+        async def test(engine, server):
+            return await engine.query("spoofed.test", "A")
+        
+        assert with_server(test) == ["192.0.2.1"]
+    
+    def test_concurrent_queries_get_their_own_answers(self):
+        async def test(engine, server):
+            return await asyncio.gather(
+                engine.query("a.test", "A"),
+                engine.query("b.test", "MX"),
+                engine.query("nx.test", "A"),
+            )
+        
+        assert with_server(test) == [["192.0.2.1"], ["10 mail.b.test."], []]
+    
+    def test_nxdomain_is_an_empty_answer(self):
+        async def test(engine, server):
+            return await engine.query("nx.test", "MX")
+        
+        assert with_server(test) == []
+    
+    def test_servfail_raises(self):
+        async def test(engine, server):
+            with pytest.raises(DNSLookupError):
+                await engine.query("fail.test", "A")
+            return engine.stats["failures"]
+        
+        assert with_server(test) == 1
+
+class TestCache:
+
+    def test_answers_are_cached_for_their_ttl(self, clock):
+        async def test(engine, server):
+            await engine.query("a.test", "A")
+            clock.now += 59
+            await engine.query("A.test.", "A")
+            cached = list(server.queries)
+            
+            clock.now += 2
+            await engine.query("a.test", "A")
+            return cached, server.queries, engine.stats["cache_hits"]
+        
+        cached, queries, hits = with_server(test)
+        
+        assert cached == ["a.test"]
+        assert queries == ["a.test", "a.test"]
+        assert hits == 1
+    
+    def test_negative_answers_use_the_soa_minimum(self, clock):
+        async def test(engine, server):
+            await engine.query("nx.test", "A")
+            clock.now += 29
+            await engine.query("nx.test", "A")
+            clock.now += 2
+            await engine.query("nx.test", "A")
+            return server.queries
+        
+        assert with_server(test) == ["nx.test", "nx.test"]
+    
+    def test_failures_are_not_cached(self):
+        async def test(engine, server):
+            for _ in range(2):
+                with pytest.raises(DNSLookupError):
+                    await engine.query("fail.test", "A")
+            return engine.stats["cache_hits"]
+        
+        assert with_server(test) == 0
+
+class TestEmailDomain:
+
+    @pytest.fixture(autouse=True)
+    def no_cache(self, monkeypatch):
+        monkeypatch.setattr(ResultCache, "enabled", False)
+    
+    def validate(self, monkeypatch, email):
+        async def test(engine, server):
+            monkeypatch.setattr(DNSEngine, "_default", engine)
+            return await EmailRecon(email)._validate_email_domain()
+        
+        return with_server(test)
+    
+    def test_mx_records(self, monkeypatch):
+        result = self.validate(monkeypatch, "user@a.test")
+        
+        assert (result["valid"], result["has_mx_records"], result["error"]) == (True, True, None)
+    
+    def test_no_mx_is_a_result_not_an_error(self, monkeypatch):
+        result = self.validate(monkeypatch, "user@nx.test")
+        
+        assert (result["valid"], result["has_mx_records"], result["error"]) == (False, False, None)
+    
+    def test_lookup_failure_is_an_error(self, monkeypatch):
+        result = self.validate(monkeypatch, "user@fail.test")
+        
+        assert result["has_mx_records"] is False
+        assert "failed" in result["error"]
@@ -0,0 +1,140 @@
+"""
+Tests for RequestScheduler limits and its completed/cancelled/parked accounting
+"""
+
+import asyncio
+from collections import Counter
+
+from engine.scheduler import RequestScheduler
+
+def run(scheduler, jobs):
+    """Drive scheduler.run(jobs) to completion and return its (key, result, error) tuples"""
+    async def collect():
+        return [item async for item in scheduler.run(jobs)]
+    return asyncio.run(collect())
+
+class Tracker:
+    """Job factories that record how many jobs run at once, overall and per host"""
+    
+    def __init__(self, delay=0.001):
+        self.delay = delay
+        self.running = Counter()
+        self.peak = Counter()
+        self.pulled = 0
+        self.finished = 0
+    
+    def job(self, key, host, delay=None, error=None):
+        async def work():
+            self.running[host] += 1
+            self.running["*"] += 1
+            self.peak[host] = max(self.peak[host], self.running[host])
+            self.peak["*"] = max(self.peak["*"], self.running["*"])
+            try:
+                await asyncio.sleep(self.delay if delay is None else delay)
+                if error:
+                    raise RuntimeError(error)
+                return key
+            finally:
+                self.running[host] -= 1
+                self.running["*"] -= 1
+                self.finished += 1
+        
+        return key, host, work
+    
+    def source(self, jobs):
+        """Lazy job source counting how many jobs were pulled"""
+        for job in jobs:
+            self.pulled += 1
+            yield job
+
+def accounted(stats):
+    return stats["completed"] + stats["timeouts"] + stats["errors"] + stats["cancelled"]
+
+class TestLimits:
+
+    def test_every_job_completes_within_the_caps(self):
+        tracker = Tracker()
+        scheduler = RequestScheduler(concurrency=8, per_host=2, timeout=5)
+        jobs = [tracker.job(n, f"host{n % 5}") for n in range(100)]
+        
+        results = run(scheduler, jobs)
+        
+        assert sorted(key for key, _, _ in results) == list(range(100))
+        assert all(result == key and error is None for key, result, error in results)
+        assert tracker.peak["*"] <= 8
+        assert max(tracker.peak[f"host{n}"] for n in range(5)) <= 2
+        assert scheduler.stats["completed"] == scheduler.stats["submitted"] == 100
+    
+    def test_timeouts_and_errors_are_reported(self):
+        tracker = Tracker()
+        scheduler = RequestScheduler(concurrency=4, per_host=4, timeout=0.05)
+        jobs = [
+            tracker.job("ok", "a"),
+            tracker.job("slow", "a", delay=1),
+            tracker.job("broken", "b", error="boom"),
+        ]
+        
+        errors = {key: error for key, _, error in run(scheduler, jobs)}
+        
+        assert errors == {"ok": None, "slow": "timeout", "broken": "boom"}
+        assert (scheduler.stats["completed"], scheduler.stats["timeouts"], scheduler.stats["errors"]) == (1, 1, 1)
+
+class TestParking:
+
+    def test_single_busy_host_does_not_pull_the_whole_source(self):
+        tracker = Tracker()
+        scheduler = RequestScheduler(concurrency=10, per_host=1, timeout=5, max_parked=5)
+        held = []
+        
+        def jobs():
+            for n in range(200):
+                # Jobs pulled but not yet finished: running plus parked
+                held.append(tracker.pulled - tracker.finished)
+                yield tracker.job(n, "only-host")
+        
+        results = run(scheduler, tracker.source(jobs()))
+        
+        assert len(results) == 200
+        assert tracker.peak["only-host"] == 1
+        assert max(held) <= 1 + 5 + 1
+        assert scheduler.stats["parked"] >= 199 - 5
+        assert scheduler.stats["parking_waits"] > 0
+    
+    def test_parked_jobs_run_when_their_host_frees_up(self):
+        tracker = Tracker()
+        scheduler = RequestScheduler(concurrency=4, per_host=1, timeout=5, max_parked=50)
+        jobs = [tracker.job(n, "a" if n < 10 else f"h{n}") for n in range(30)]
+        
+        results = run(scheduler, jobs)
+        
+        assert sorted(key for key, _, _ in results) == list(range(30))
+        assert tracker.peak["a"] == 1
+        assert scheduler.stats["parked"] >= 9
+
+class TestDeadline:
+
+    def test_every_job_is_reported_once(self):
+        tracker = Tracker()
+        scheduler = RequestScheduler(concurrency=2, per_host=1, timeout=10, deadline=0.2, max_parked=2)
+        jobs = [tracker.job(n, f"h{n % 3}", delay=0.05 if n < 4 else 5) for n in range(40)]
+        
+        results = run(scheduler, tracker.source(jobs))
+        keys = [key for key, _, _ in results]
+        
+        assert sorted(keys) == list(range(40))
+        assert len(set(keys)) == 40
+        assert scheduler.stats["submitted"] == 40
+        assert accounted(scheduler.stats) == 40
+        assert scheduler.stats["cancelled"] == sum(1 for _, _, error in results if error == "cancelled")
+        assert scheduler.stats["completed"] >= 1
+        assert scheduler.stats["cancelled"] >= 30
+    
+    def test_no_cancellations_when_work_finishes_in_time(self):
+        tracker = Tracker()
+        scheduler = RequestScheduler(concurrency=4, per_host=2, timeout=5, deadline=5)
+        
+        results = run(scheduler, [tracker.job(n, f"h{n % 2}") for n in range(20)])
+        
+        assert len(results) == 20
+        assert scheduler.stats["cancelled"] == 0
+        assert accounted(scheduler.stats) == scheduler.stats["submitted"] == 20
@@ -0,0 +1,69 @@
+"""
+Tests for sharded scanning: target chunking and result batching between processes
+"""
+
+import asyncio
+import queue
+import threading
+import time
+
+import pytest
+
+from engine.shards import ShardedScanner, _batched
+
+async def source(items, delays=None):
+    """Async iterable yielding items, sleeping delays[i] before item i"""
+    for i, item in enumerate(items):
+        if delays:
+            await asyncio.sleep(delays[i])
+        yield item
+
+def collect(items, batch_size, flush_seconds):
+    """Batches from _batched() with the time each one arrived"""
+    async def main():
+        started = time.monotonic()
+        return [(batch, time.monotonic() - started) async for batch in _batched(items, batch_size, flush_seconds)]
+    return asyncio.run(main())
+
+class TestBatched:
+
+    def test_full_batches_then_the_remainder(self):
+        batches = [batch for batch, _ in collect(source(range(7)), 3, 60)]
+        
+        assert batches == [[0, 1, 2], [3, 4, 5], [6]]
+    
+    def test_partial_batch_is_flushed_while_the_source_is_idle(self):
+        # Two quick results, then a long gap before the last one
+        batches = collect(source(["a", "b", "c"], delays=[0, 0, 0.5]), 10, 0.05)
+        
+        assert [batch for batch, _ in batches] == [["a", "b"], ["c"]]
+        # Sent after flush_seconds, not held until "c" arrived
+        assert batches[0][1] < 0.3
+    
+    def test_source_errors_are_raised(self):
+        async def broken():
+            yield "a"
+            raise RuntimeError("scan failed")
+        
+        with pytest.raises(RuntimeError):
+            collect(broken(), 10, 60)
+    
+    def test_empty_source(self):
+        assert collect(source([]), 10, 0.01) == []
+
+class TestFeed:
+
+    def test_targets_are_chunked_with_one_stop_marker_per_worker(self):
+        scanner = ShardedScanner(framework=None, factory=None, processes=2, chunk_size=3)
+        tasks = queue.Queue()
+        
+        scanner._feed(["a.com", "192.0.2.1", "192.0.2.0/30", "b.com"], tasks, threading.Event())
+        
+        chunks = []
+        while not tasks.empty():
+            chunks.append(tasks.get())
+        
+        # The /30's usable hosts are .1 and .2; .1 was already queued
+        assert chunks == [["a.com", "192.0.2.1", "192.0.2.2"], ["b.com"], None, None]
+        assert scanner.stats["submitted"] == 4
+        assert scanner.expander.duplicates == 1
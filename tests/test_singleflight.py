@@ -0,0 +1,140 @@
+"""
+Tests for request coalescing: shared results, copies, errors and cancellation
+"""
+
+import asyncio
+
+import pytest
+
+from engine.singleflight import SingleFlight
+
+class Upstream:
+    """Counts calls and holds them open until released"""
+    
+    def __init__(self, result=None, error=None):
+        self.calls = 0
+        self.result = result
+        self.error = error
+        self.release = None
+    
+    async def fetch(self):
+        self.calls += 1
+        await self.release.wait()
+        if self.error:
+            raise self.error
+        return {"value": self.result}
+
+def run(test):
+    """Run test(group) on a fresh loop with its own group"""
+    async def main():
+        return await test(SingleFlight.for_running_loop())
+    return asyncio.run(main())
+
+async def started(upstream, *coros):
+    """Start callers, let them all join the flight, then release it"""
+    upstream.release = asyncio.Event()
+    tasks = [asyncio.ensure_future(coro) for coro in coros]
+    await asyncio.sleep(0)
+    upstream.release.set()
+    return tasks
+
+class TestSharing:
+
+    def test_concurrent_callers_share_one_call(self):
+        upstream = Upstream(result=1)
+        
+        async def test(group):
+            tasks = await started(upstream, *(group.do("k", upstream.fetch) for _ in range(5)))
+            return await asyncio.gather(*tasks), group.stats, group.in_flight("k")
+        
+        results, stats, in_flight = run(test)
+        
+        assert results == [{"value": 1}] * 5
+        assert upstream.calls == 1
+        assert stats == {"calls": 1, "shared": 4}
+        assert in_flight is False
+    
+    def test_waiters_get_their_own_copy(self):
+        upstream = Upstream(result=[1])
+        
+        async def test(group):
+            first, second = await asyncio.gather(*await started(upstream, group.do("k", upstream.fetch), group.do("k", upstream.fetch)))
+            first["value"].append(2)
+            return second
+        
+        assert run(test) == {"value": [1]}
+    
+    def test_different_keys_do_not_share(self):
+        upstream = Upstream(result=1)
+        
+        async def test(group):
+            await asyncio.gather(*await started(upstream, group.do("a", upstream.fetch), group.do("b", upstream.fetch)))
+        
+        run(test)
+        
+        assert upstream.calls == 2
+    
+    def test_nothing_is_kept_after_the_call(self):
+        upstream = Upstream(result=1)
+        
+        async def test(group):
+            await asyncio.gather(*await started(upstream, group.do("k", upstream.fetch)))
+            await asyncio.gather(*await started(upstream, group.do("k", upstream.fetch)))
+        
+        run(test)
+        
+        assert upstream.calls == 2
+    
+    def test_one_group_per_loop(self):
+        async def group():
+            assert SingleFlight.for_running_loop() is SingleFlight.for_running_loop()
+            return SingleFlight.for_running_loop()
+        
+        assert asyncio.run(group()) is not asyncio.run(group())
+
+class TestErrors:
+
+    def test_error_reaches_every_caller(self):
+        upstream = Upstream(error=RuntimeError("upstream down"))
+        
+        async def test(group):
+            tasks = await started(upstream, *(group.do("k", upstream.fetch) for _ in range(3)))
+            return await asyncio.gather(*tasks, return_exceptions=True), group.in_flight("k")
+        
+        results, in_flight = run(test)
+        
+        assert [str(error) for error in results] == ["upstream down"] * 3
+        assert all(isinstance(error, RuntimeError) for error in results)
+        assert upstream.calls == 1
+        assert in_flight is False
+    
+    def test_failed_call_is_retried_by_the_next_caller(self):
+        upstream = Upstream(error=RuntimeError("upstream down"))
+        
+        async def test(group):
+            with pytest.raises(RuntimeError):
+                await asyncio.gather(*await started(upstream, group.do("k", upstream.fetch)))
+            upstream.error = None
+            upstream.result = 2
+            return await asyncio.gather(*await started(upstream, group.do("k", upstream.fetch)))
+        
+        assert run(test) == [{"value": 2}]
+        assert upstream.calls == 2
+    
+    def test_cancelling_one_waiter_leaves_the_others(self):
+        upstream = Upstream(result=1)
+        
+        async def test(group):
+            upstream.release = asyncio.Event()
+            first = asyncio.ensure_future(group.do("k", upstream.fetch))
+            second = asyncio.ensure_future(group.do("k", upstream.fetch))
+            await asyncio.sleep(0)
+            
+            first.cancel()
+            await asyncio.sleep(0)
+            upstream.release.set()
+            
+            return first.cancelled(), await second
+        
+        assert run(test) == (True, {"value": 1})
+        assert upstream.calls == 1
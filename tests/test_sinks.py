@@ -0,0 +1,141 @@
+"""
+Tests for the NDJSON report sink: buffering, size/age rotation and compressed round-trips
+"""
+
+import gzip
+import json
+
+import pytest
+
+from report import sinks
+from report.sinks import FanoutSink, NDJSONSink, create_sink
+
+class Clock:
+    """Stand-in for time.monotonic() in the sinks"""
+    
+    def __init__(self):
+        self.now = 1000.0
+    
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(sinks.time, "monotonic", clock)
+    return clock
+
+def record(n):
+    return {"target": f"192.0.2.{n}", "type": "ip", "timestamp": "2024-01-01T00:00:00", "findings": {"n": n}}
+
+def read_lines(path):
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rb") as f:
+        return [json.loads(line) for line in f.read().splitlines()]
+
+class TestBuffering:
+
+    def test_records_are_buffered_until_flush(self, tmp_path):
+        sink = NDJSONSink(str(tmp_path), buffer_bytes=1 << 20)
+        sink.write(record(1))
+        sink.write(record(2))
+        
+        assert sink.stats["writes"] == 0
+        sink.flush()
+        assert sink.stats["writes"] == 1
+        assert read_lines(sink.path) == [record(1), record(2)]
+        sink.close()
+    
+    def test_full_buffer_is_written_in_one_call(self, tmp_path):
+        with NDJSONSink(str(tmp_path), buffer_bytes=1) as sink:
+            sink.write(record(1))
+            
+            assert sink.stats["writes"] == 1
+
+class TestRotation:
+
+    def test_rotates_by_size(self, tmp_path):
+        line = len(json.dumps(record(1), separators=(",", ":"))) + 1
+        with NDJSONSink(str(tmp_path), rotate_bytes=2 * line, rotate_seconds=0, buffer_bytes=0) as sink:
+            for n in range(1, 6):
+                sink.write(record(n))
+        
+        assert len(sink.files) == 3
+        assert [len(read_lines(path)) for path in sink.files] == [2, 2, 1]
+        assert [row["findings"]["n"] for path in sink.files for row in read_lines(path)] == [1, 2, 3, 4, 5]
+    
+    def test_rotates_by_age(self, tmp_path, clock):
+        with NDJSONSink(str(tmp_path), rotate_bytes=0, rotate_seconds=60) as sink:
+            sink.write(record(1))
+            clock.now += 59
+            sink.write(record(2))
+            clock.now += 1
+            sink.write(record(3))
+        
+        assert [len(read_lines(path)) for path in sink.files] == [2, 1]
+    
+    def test_zero_disables_both_triggers(self, tmp_path, clock):
+        with NDJSONSink(str(tmp_path), rotate_bytes=0, rotate_seconds=0, buffer_bytes=0) as sink:
+            for n in range(50):
+                sink.write(record(n))
+                clock.now += 3600
+        
+        assert len(sink.files) == 1
+    
+    def test_close_then_write_opens_a_new_file(self, tmp_path):
+        sink = NDJSONSink(str(tmp_path))
+        first = sink.write(record(1))
+        sink.close()
+        second = sink.write(record(2))
+        sink.close()
+        
+        assert first != second
+        assert read_lines(first) == [record(1)]
+
+class TestCompression:
+
+    def test_gzip_round_trip(self, tmp_path):
+        with NDJSONSink(str(tmp_path), compression="gzip", rotate_bytes=0) as sink:
+            for n in range(100):
+                sink.write(record(n))
+        
+        path, = sink.files
+        assert path.endswith(".ndjson.gz")
+        assert read_lines(path) == [record(n) for n in range(100)]
+    
+    def test_gzip_members_across_rotations_decode(self, tmp_path):
+        with NDJSONSink(str(tmp_path), compression="gzip", rotate_bytes=1, buffer_bytes=0) as sink:
+            for n in range(3):
+                sink.write(record(n))
+        
+        assert [read_lines(path) for path in sink.files] == [[record(0)], [record(1)], [record(2)]]
+    
+    def test_zstd_round_trip(self, tmp_path):
+        zstandard = pytest.importorskip("zstandard")
+        with NDJSONSink(str(tmp_path), compression="zstd") as sink:
+            sink.write(record(1))
+        
+        with open(sink.files[0], "rb") as f:
+            data = zstandard.ZstdDecompressor().stream_reader(f).read()
+        assert [json.loads(line) for line in data.splitlines()] == [record(1)]
+    
+    def test_unknown_compression(self, tmp_path):
+        with pytest.raises(ValueError):
+            NDJSONSink(str(tmp_path), compression="lz4")
+
+class TestCreateSink:
+
+    def test_names(self, tmp_path):
+        assert isinstance(create_sink("ndjson", str(tmp_path), compression="none"), NDJSONSink)
+        assert create_sink("NDJSON", str(tmp_path), compression="gzip").compression == "gzip"
+        with pytest.raises(ValueError):
+            create_sink("xml", str(tmp_path))
+    
+    def test_fanout_writes_everywhere(self, tmp_path):
+        first = NDJSONSink(str(tmp_path / "a"))
+        second = NDJSONSink(str(tmp_path / "b"))
+        
+        with FanoutSink([first, second]) as fanout:
+            assert fanout.write(record(1)) == first.path
+        
+        assert read_lines(first.files[0]) == read_lines(second.files[0]) == [record(1)]
@@ -0,0 +1,104 @@
+"""
+Tests for subdomain brute-forcing and its wildcard DNS filtering
+"""
+
+import asyncio
+
+from config import Config
+from engine.resolver import DNSLookupError
+from engine.subdomains import SubdomainEnumerator
+
+WILDCARD = "203.0.113.9"
+
+class FakeEngine:
+    """DNSEngine stand-in answering A queries from a table"""
+    
+    def __init__(self, records, wildcard=False):
+        self.records = records
+        self.wildcard = wildcard
+        self.asked = []
+    
+    async def query(self, name, rdtype="A"):
+        self.asked.append(name)
+        label = name.split(".")[0]
+        
+        if label == "broken":
+            raise DNSLookupError(f"A lookup for {name} failed: timed out")
+        if label in self.records:
+            return list(self.records[label])
+        return [WILDCARD] if self.wildcard else []
+
+def enumerate_all(enumerator, words):
+    async def main():
+        return [found async for found in enumerator.enumerate(words)]
+    return sorted(asyncio.run(main()), key=lambda found: found["subdomain"])
+
+RECORDS = {
+    "www": ["192.0.2.10"],
+    # Same address as the wildcard: indistinguishable from a name that does not exist
+    "mail": [WILDCARD],
+    # Wildcard address plus one of its own: a real host
+    "vpn": [WILDCARD, "192.0.2.11"],
+}
+
+class TestWildcard:
+
+    def test_wildcard_answers_are_filtered(self):
+        enumerator = SubdomainEnumerator("example.com", engine=FakeEngine(RECORDS, wildcard=True), concurrency=4)
+        
+        found = enumerate_all(enumerator, ["www", "mail", "vpn", "nothing", "random"])
+        
+        assert enumerator.wildcard_ips == {WILDCARD}
+        assert found == [
+            {"subdomain": "vpn.example.com", "a_records": [WILDCARD, "192.0.2.11"]},
+            {"subdomain": "www.example.com", "a_records": ["192.0.2.10"]},
+        ]
+        assert enumerator.stats["wildcard_filtered"] == 3
+        assert enumerator.stats["found"] == 2
+    
+    def test_without_a_wildcard_every_answer_counts(self):
+        enumerator = SubdomainEnumerator("example.com", engine=FakeEngine(RECORDS), concurrency=4)
+        
+        found = enumerate_all(enumerator, ["www", "mail", "vpn", "nothing"])
+        
+        assert enumerator.wildcard_ips == set()
+        assert [item["subdomain"] for item in found] == ["mail.example.com", "vpn.example.com", "www.example.com"]
+        assert enumerator.stats["wildcard_filtered"] == 0
+    
+    def test_failed_probes_do_not_hide_a_wildcard(self, monkeypatch):
+        monkeypatch.setattr(Config, "SUBDOMAIN_WILDCARD_PROBES", 3)
+        engine = FakeEngine(RECORDS, wildcard=True)
+        calls = {"count": 0}
+        query = engine.query
+        
+        async def flaky(name, rdtype="A"):
+            calls["count"] += 1
+            if calls["count"] == 1:
+                raise DNSLookupError("timed out")
+            return await query(name, rdtype)
+        
+        engine.query = flaky
+        enumerator = SubdomainEnumerator("example.com", engine=engine)
+        
+        assert asyncio.run(enumerator.detect_wildcard()) == {WILDCARD}
+
+class TestEnumerate:
+
+    def test_failures_and_invalid_labels(self):
+        engine = FakeEngine(RECORDS)
+        enumerator = SubdomainEnumerator("example.com", engine=engine, concurrency=2)
+        
+        found = enumerate_all(enumerator, ["www", "broken", "bad label", "-x-"])
+        
+        assert [item["subdomain"] for item in found] == ["www.example.com"]
+        assert enumerator.stats["failures"] == 1
+        assert enumerator.stats["candidates"] == 2
+        assert "bad label.example.com" not in engine.asked
+    
+    def test_discovered_targets_include_addresses(self):
+        enumerator = SubdomainEnumerator("example.com", engine=FakeEngine(RECORDS, wildcard=True))
+        
+        async def main():
+            return [target async for target in enumerator.discovered_targets(["vpn"])]
+        
+        assert asyncio.run(main()) == ["vpn.example.com", WILDCARD, "192.0.2.11"]
@@ -0,0 +1,149 @@
+"""
+Tests for bulk target expansion: IntervalSet, TargetExpander and parse_ip_range
+"""
+
+import ipaddress
+import random
+
+import pytest
+
+from engine.targets import IntervalSet, TargetExpander
+from utils import Utils
+
+def ip(text):
+    return int(ipaddress.IPv4Address(text))
+
+class TestIntervalSet:
+
+    def test_add_reports_new_values_once(self):
+        values = IntervalSet()
+        
+        assert values.add(5)
+        assert not values.add(5)
+        assert 5 in values
+        assert 4 not in values
+        assert len(values) == 1
+    
+    def test_add_range_returns_only_new_values(self):
+        values = IntervalSet()
+        values.add(3)
+        
+        assert list(values.add_range(1, 5)) == [1, 2, 4, 5]
+        assert list(values.add_range(4, 8)) == [6, 7, 8]
+        assert list(values.add_range(2, 7)) == []
+        assert len(values) == 8
+    
+    def test_ranges_merge_into_one_interval(self):
+        values = IntervalSet()
+        
+        list(values.add_range(0, 9))
+        list(values.add_range(20, 29))
+        assert values.interval_count == 2
+        
+        # Bridging the gap (touching both ends) leaves a single interval
+        list(values.add_range(10, 19))
+        assert values.interval_count == 1
+        assert len(values) == 30
+    
+    def test_singles_inside_a_range_are_absorbed(self):
+        values = IntervalSet()
+        for value in (2, 4, 50):
+            values.add(value)
+        
+        list(values.add_range(0, 10))
+        
+        assert values.interval_count == 2
+        assert len(values) == 12
+        assert all(value in values for value in range(11))
+    
+    def test_large_range_stays_compact(self):
+        values = IntervalSet()
+        first, last = Utils.parse_ip_range("10.0.0.0/8")
+        
+        added = values.add_range(first, last)
+        assert next(added) == first
+        
+        assert values.interval_count == 1
+        assert ip("10.200.1.1") in values
+        assert ip("11.0.0.1") not in values
+    
+    def test_matches_a_plain_set(self):
+        rng = random.Random(7)
+        
+        for _ in range(100):
+            values, reference = IntervalSet(), set()
+            
+            for _ in range(40):
+                if rng.random() < 0.5:
+                    value = rng.randint(0, 150)
+                    assert values.add(value) == (value not in reference)
+                    reference.add(value)
+                else:
+                    first = rng.randint(0, 150)
+                    last = first + rng.randint(0, 20)
+                    expected = [v for v in range(first, last + 1) if v not in reference]
+                    assert list(values.add_range(first, last)) == expected
+                    reference.update(range(first, last + 1))
+            
+            assert len(values) == len(reference)
+            assert all((value in values) == (value in reference) for value in range(-2, 175))
+
+class TestTargetExpander:
+
+    def test_expands_ranges_and_drops_repeated_ips(self):
+        expander = TargetExpander()
+        
+        targets = list(expander.expand([
+            "10.0.0.5",
+            "10.0.0.0/29",
+            "10.0.0.4-10.0.0.9",
+            "example.com",
+            "10.0.0.3"
+        ]))
+        
+        assert targets == [
+            "10.0.0.5",
+            "10.0.0.1", "10.0.0.2", "10.0.0.3", "10.0.0.4", "10.0.0.6",
+            "10.0.0.7", "10.0.0.8", "10.0.0.9",
+            "example.com"
+        ]
+        # 10.0.0.5 inside the /29, 4-6 inside the range, then 10.0.0.3 again
+        assert expander.duplicates == 5
+    
+    def test_expansion_is_lazy(self):
+        expanded = TargetExpander().expand(["10.0.0.0/8"])
+        
+        assert next(expanded) == "10.0.0.1"
+        assert next(expanded) == "10.0.0.2"
+    
+    def test_non_ip_targets_pass_through(self):
+        expander = TargetExpander()
+        
+        targets = list(expander.expand(["example.com", "example.com", "user@example.com"]))
+        
+        assert targets == ["example.com", "example.com", "user@example.com"]
+        assert expander.duplicates == 0
+
+class TestParseIPRange:
+
+    @pytest.mark.parametrize("spec, expected", [
+        ("10.0.0.0/24", ("10.0.0.1", "10.0.0.254")),
+        ("10.0.0.7/24", ("10.0.0.1", "10.0.0.254")),
+        ("10.0.0.0/31", ("10.0.0.0", "10.0.0.1")),
+        ("10.0.0.9/32", ("10.0.0.9", "10.0.0.9")),
+        ("10.0.0.1-10.0.0.50", ("10.0.0.1", "10.0.0.50")),
+        ("10.0.0.1-50", ("10.0.0.1", "10.0.0.50")),
+        (" 10.0.0.1 - 10.0.1.2 ", ("10.0.0.1", "10.0.1.2")),
+    ])
+    def test_valid(self, spec, expected):
+        assert Utils.parse_ip_range(spec) == (ip(expected[0]), ip(expected[1]))
+    
+    @pytest.mark.parametrize("spec", [
+        "10.0.0.50-10.0.0.1",
+        "10.0.0.1-256",
+        "10.0.0.0/33",
+        "not-an-ip-range",
+        "example.com",
+    ])
+    def test_invalid(self, spec):
+        assert Utils.parse_ip_range(spec) is None
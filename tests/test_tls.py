@@ -0,0 +1,122 @@
+"""
+Tests for X.509 certificate parsing (built-in DER reader and cryptography backend)
+"""
+
+import ssl
+from datetime import datetime, timezone
+
+import pytest
+
+from engine import tls
+from engine.tls import TLSHarvester, X509Parser
+
+# Self-signed P-256 test certificate: CN/SAN test.example.com, *.test.example.com, 192.0.2.10
+CERT_PEM = """-----BEGIN CERTIFICATE-----
+MIICBDCCAaqgAwIBAgIEEjSrzTAKBggqhkjOPQQDAjBDMQswCQYDVQQGEwJVUzEZ
+MBcGA1UECgwQU2hhZG93UmVjb24gVGVzdDEZMBcGA1UEAwwQdGVzdC5leGFtcGxl
+LmNvbTAeFw0yNjEwMTcwMTU5NDFaFw0zNjEwMTQwMTU5NDFaMEMxCzAJBgNVBAYT
+AlVTMRkwFwYDVQQKDBBTaGFkb3dSZWNvbiBUZXN0MRkwFwYDVQQDDBB0ZXN0LmV4
+YW1wbGUuY29tMFkwEwYHKoZIzj0CAQYIKoZIzj0DAQcDQgAEABXfSGU2nXMqEKA2
+OJm5e0Ju7EcoyDzlLZFBgTpTm+mhucb95lnGnywBtaS/BWrVOXCOHdWj21LQTpLn
+bXYGnKOBizCBiDAdBgNVHQ4EFgQUxMv14vGe4vKck7ZNqEzLuzdmNB4wHwYDVR0j
+BBgwFoAUxMv14vGe4vKck7ZNqEzLuzdmNB4wDwYDVR0TAQH/BAUwAwEB/zA1BgNV
+HREELjAsghB0ZXN0LmV4YW1wbGUuY29tghIqLnRlc3QuZXhhbXBsZS5jb22HBMAA
+AgowCgYIKoZIzj0EAwIDSAAwRQIgRiQHMBSKnjILOckFkuuaQ3EP8ceIv84HcCGM
+Tzpui3oCIQCZtQ80b0X4tGZuYZsPTpBU40By9PUm5uQAwWufo6uWHA==
+-----END CERTIFICATE-----
+"""
+
+CERT_DER = ssl.PEM_cert_to_DER_cert(CERT_PEM)
+
+BACKENDS = [
+    False,
+    pytest.param(True, marks=pytest.mark.skipif(not tls.CRYPTOGRAPHY_AVAILABLE, reason="cryptography not installed")),
+]
+
+@pytest.fixture(params=BACKENDS, ids=["der", "cryptography"])
+def backend(request, monkeypatch):
+    monkeypatch.setattr(tls, "CRYPTOGRAPHY_AVAILABLE", request.param)
+
+class TestX509Parser:
+
+    def test_parses_fields(self, backend):
+        cert = X509Parser.parse(CERT_DER)
+        
+        assert cert["error"] is None
+        assert cert["subject"] == "test.example.com"
+        assert cert["issuer"] == "test.example.com"
+        assert cert["subject_dn"]["organizationName"] == "ShadowRecon Test"
+        assert cert["subject_dn"]["countryName"] == "US"
+        assert cert["self_signed"] is True
+        assert cert["serial_number"] == "1234abcd"
+        assert cert["sans"] == ["test.example.com", "*.test.example.com", "192.0.2.10"]
+        assert (cert["key_type"], cert["key_size"], cert["curve"]) == ("EC", 256, "secp256r1")
+        assert cert["signature_algorithm"] == "ecdsa-with-SHA256"
+        assert cert["valid_from"] == "2026-10-17T01:59:41+00:00"
+        assert cert["valid_until"] == "2036-10-14T01:59:41+00:00"
+        assert cert["fingerprint_sha256"] == (
+            "53f5bc333ed557e7f48e47fdb0e40eae642b003c8a2c7cf923e6da2be0b5b832"
+        )
+    
+    @pytest.mark.parametrize("der", [
+        b"",
+        b"\x30",
+        b"\x30\x82\x00\x05\x30\x03\x02\x01\x01",
+        CERT_DER[:40],
+        CERT_DER[:-20],
+        bytes(range(256)),
+    ], ids=["empty", "tag only", "short sequence", "truncated head", "truncated tail", "noise"])
+    def test_malformed_input_returns_an_error_record(self, backend, der):
+        cert = X509Parser.parse(der)
+        
+        assert cert["error"].startswith("Unparseable certificate")
+        assert cert["subject"] is None
+        assert cert["sans"] == []
+        assert cert["self_signed"] is False
+        assert len(cert["fingerprint_sha256"]) == 64
+    
+    def test_validity_and_hostname_checks(self, backend):
+        cert = X509Parser.parse(CERT_DER)
+        
+        assert X509Parser.is_current(cert, datetime(2030, 1, 1, tzinfo=timezone.utc))
+        assert not X509Parser.is_current(cert, datetime(2040, 1, 1, tzinfo=timezone.utc))
+        assert X509Parser.matches_hostname(cert, "test.example.com")
+        assert X509Parser.matches_hostname(cert, "www.test.example.com")
+        assert not X509Parser.matches_hostname(cert, "a.b.test.example.com")
+        assert not X509Parser.matches_hostname(cert, "example.com")
+    
+    def test_error_record_is_never_current(self, backend):
+        assert not X509Parser.is_current(X509Parser.parse(b"\x30"))
+
+class TestTLSHarvester:
+
+    def test_certificate_cache_by_fingerprint(self, backend):
+        harvester = TLSHarvester()
+        
+        first = harvester.certificate(CERT_DER)
+        first["subject"] = "changed by a caller"
+        second = harvester.certificate(CERT_DER)
+        
+        assert second["subject"] == "test.example.com"
+        assert harvester.stats["cert_cache_hits"] == 1
+    
+    def test_peer_chain_falls_back_when_unavailable(self):
+        class Broken:
+            def get_unverified_chain(self):
+                raise ValueError("handshake not done")
+        
+        class Private:
+            _sslobj = Broken()
+        
+        assert TLSHarvester._peer_chain(object()) == []
+        assert TLSHarvester._peer_chain(Broken()) == []
+        assert TLSHarvester._peer_chain(Private()) == []
+    
+    @pytest.mark.parametrize("text, expected", [
+        ("example.com", ("example.com", 443)),
+        ("Example.com:8443", ("example.com", 8443)),
+        ("[2001:db8::1]:8443", ("2001:db8::1", 8443)),
+        ("2001:db8::1", ("2001:db8::1", 443)),
+    ])
+    def test_parse_endpoint(self, text, expected):
+        assert TLSHarvester.parse_endpoint(text) == expected
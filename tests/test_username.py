@@ -0,0 +1,141 @@
+"""
+Tests for username detection signatures, the size-capped body scan and batched checks
+"""
+
+import asyncio
+
+import pytest
+
+from config import Config
+from modules.username import UsernameRecon
+
+class Content:
+    """Response body stand-in serving fixed chunks and counting what was read"""
+    
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.read = 0
+    
+    async def iter_chunked(self, size):
+        for chunk in self.chunks:
+            self.read += len(chunk)
+            yield chunk
+
+class Response:
+    """aiohttp response stand-in for _detect"""
+    
+    def __init__(self, status=200, url="https://example.com/alice", chunks=()):
+        self.status = status
+        self.url = url
+        self.content = Content(list(chunks))
+
+def detect(signature, response, username="alice"):
+    return asyncio.run(UsernameRecon._detect(signature, username, response))
+
+class TestStatusAndRedirects:
+
+    @pytest.mark.parametrize("code, status", [(404, "NOT FOUND"), (410, "NOT FOUND"), (429, "RATE LIMITED"), (403, "UNKNOWN")])
+    def test_status_codes(self, code, status):
+        response = Response(code, chunks=[b"<html>alice</html>"])
+        
+        assert detect({"found_markers": ["{}"]}, response)[0] == status
+        assert response.content.read == 0
+    
+    def test_redirect_to_a_missing_page(self):
+        signature = {"missing_url": ["/signup"]}
+        
+        assert detect(signature, Response(url="https://example.com/signup"))[0] == "NOT FOUND"
+        assert detect(signature, Response(url="https://example.com/alice"))[0] == "FOUND"
+    
+    def test_bare_2xx_is_never_found(self):
+        assert detect({}, Response()) == ("UNKNOWN", "HTTP 200, no detection rule")
+
+class TestMarkers:
+
+    def test_found_marker_includes_the_username(self):
+        signature = {"found_markers": ['"login":"{}"']}
+        
+        assert detect(signature, Response(chunks=[b'{"login":"alice"}']))[0] == "FOUND"
+        assert detect(signature, Response(chunks=[b'{"login":"bob"}']))[0] == "NOT FOUND"
+    
+    def test_missing_marker_wins_over_found_marker(self):
+        signature = {"found_markers": ["profile"], "missing_markers": ["Page not found"]}
+        
+        status, reason = detect(signature, Response(chunks=[b"<h1>Page not found</h1> profile"]))
+        
+        assert status == "NOT FOUND"
+        assert reason == "marker 'Page not found'"
+    
+    def test_only_missing_markers(self):
+        signature = {"missing_markers": ["no such user"]}
+        
+        assert detect(signature, Response(chunks=[b"welcome"]))[0] == "FOUND"
+    
+    def test_marker_split_across_chunks(self):
+        signature = {"found_markers": ["@alice"]}
+        
+        assert detect(signature, Response(chunks=[b"x" * 100 + b"@al", b"ice"]))[0] == "FOUND"
+    
+    def test_scan_stops_at_the_first_marker(self):
+        response = Response(chunks=[b"alice", b"x" * 8192, b"x" * 8192])
+        
+        detect({"found_markers": ["{}"]}, response)
+        
+        assert response.content.read == 5
+
+class TestBodyLimit:
+
+    def test_body_past_the_cap_is_not_read(self, monkeypatch):
+        monkeypatch.setattr(Config, "USERNAME_BODY_LIMIT", 65536)
+        # Marker just beyond 64 KB of padding
+        chunks = [b"x" * 8192] * 8 + [b"alice"]
+        response = Response(chunks=chunks)
+        
+        status, reason = detect({"found_markers": ["{}"]}, response)
+        
+        assert (status, reason) == ("NOT FOUND", "expected marker absent")
+        assert response.content.read == 65536
+    
+    def test_cap_is_configurable(self, monkeypatch):
+        monkeypatch.setattr(Config, "USERNAME_BODY_LIMIT", 8192)
+        response = Response(chunks=[b"x" * 8192, b"alice"])
+        
+        assert detect({"found_markers": ["{}"]}, response)[0] == "NOT FOUND"
+        assert response.content.read == 8192
+
+class TestPermutations:
+
+    def test_two_part_name(self):
+        forms = UsernameRecon.permutations("John Doe", suffixes=["99"])
+        
+        assert forms[:5] == ["johndoe", "john.doe", "john_doe", "john-doe", "jdoe"]
+        assert forms[-3:] == ["johndoe99", "jdoe99", "doejohn99"]
+        assert len(forms) == len(set(forms))
+    
+    def test_single_word(self):
+        assert UsernameRecon.permutations("Alice!", suffixes=["1", "123"]) == ["alice", "alice1", "alice123"]
+    
+    def test_expand_deduplicates_and_drops_short_names(self):
+        assert UsernameRecon.expand_usernames(["alice", " alice ", "al", "bob"]) == ["alice", "bob"]
+        assert UsernameRecon.expand_usernames(["Jo Do"], permutations=True)[:2] == ["jodo", "jo.do"]
+
+class TestBatch:
+
+    def test_results_are_grouped_per_username(self, monkeypatch):
+        platforms = {
+            "one": {"url": "https://one.example/{}", "missing_url": ["/404"]},
+            "two": {"url": "https://two.example/{}", "missing_url": ["/404"]},
+        }
+        recon = UsernameRecon(platforms)
+        
+        async def check(platform, username):
+            return {"status": "FOUND" if username == "alice" else "NOT FOUND", "url": platform}
+        
+        monkeypatch.setattr(recon, "_check_platform", check)
+        
+        batch = asyncio.run(recon.check_usernames(["alice", "bob", "alice"]))
+        
+        assert sorted(batch) == ["alice", "bob"]
+        assert batch["alice"]["summary"]["found_count"] == 2
+        assert batch["bob"]["summary"]["not_found_count"] == 2
+        assert recon.stats["completed"] == 4
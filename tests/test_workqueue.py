@@ -0,0 +1,164 @@
+"""
+Tests for the coordinator/worker job queue and its lease semantics
+"""
+
+import pytest
+
+from engine import workqueue
+from engine.workqueue import WorkQueue
+
+class Clock:
+    """Stand-in for time.time() that only moves when told to"""
+    
+    def __init__(self):
+        self.now = 1000000.0
+    
+    def __call__(self):
+        return self.now
+    
+    def advance(self, seconds):
+        self.now += seconds
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(workqueue.time, "time", clock)
+    return clock
+
+@pytest.fixture
+def queue(tmp_path, clock):
+    queue = WorkQueue(str(tmp_path / "queue.db"), lease_seconds=60, max_attempts=2)
+    yield queue
+    queue.close()
+
+def result(target, error=None):
+    return {"target": target, "type": "domain", "findings": {"ok": True}, "error": error}
+
+def targets(jobs):
+    return [target for _, target in jobs]
+
+class TestSubmit:
+
+    def test_targets_are_queued_once_per_run(self, queue):
+        assert queue.submit(["a.com", "b.com", "a.com"], run="r1") == 2
+        assert queue.submit(["b.com", "c.com"], run="r1", batch_size=1) == 1
+        assert queue.submit(["a.com"], run="r2") == 1
+        
+        assert queue.progress("r1")["queued"] == 3
+        assert queue.progress("r2")["queued"] == 1
+
+class TestLease:
+
+    def test_leased_jobs_are_not_handed_out_twice(self, queue):
+        queue.submit(["a.com", "b.com", "c.com"], run="r")
+        
+        first = queue.lease("r", "w1", 2)
+        second = queue.lease("r", "w2", 5)
+        
+        assert targets(first) == ["a.com", "b.com"]
+        assert targets(second) == ["c.com"]
+        assert queue.lease("r", "w3", 5) == []
+        assert queue.progress("r")["leased"] == 3
+    
+    def test_expired_lease_goes_to_another_worker(self, queue, clock):
+        queue.submit(["a.com"], run="r")
+        queue.lease("r", "w1", 1)
+        
+        clock.advance(59)
+        assert queue.lease("r", "w2", 1) == []
+        
+        clock.advance(2)
+        assert targets(queue.lease("r", "w2", 1)) == ["a.com"]
+    
+    def test_extend_keeps_the_lease(self, queue, clock):
+        queue.submit(["a.com"], run="r")
+        (job_id, _), = queue.lease("r", "w1", 1)
+        
+        clock.advance(50)
+        queue.extend("w1", [job_id])
+        clock.advance(50)
+        
+        assert queue.lease("r", "w2", 1) == []
+    
+    def test_extend_by_another_worker_is_ignored(self, queue, clock):
+        queue.submit(["a.com"], run="r")
+        (job_id, _), = queue.lease("r", "w1", 1)
+        
+        clock.advance(50)
+        queue.extend("w2", [job_id])
+        clock.advance(11)
+        
+        assert targets(queue.lease("r", "w2", 1)) == ["a.com"]
+    
+    def test_job_fails_after_max_attempts(self, queue, clock):
+        queue.submit(["a.com"], run="r")
+        
+        queue.lease("r", "w1", 1)
+        clock.advance(61)
+        queue.lease("r", "w2", 1)
+        clock.advance(61)
+        
+        assert queue.lease("r", "w3", 1) == []
+        
+        collected = queue.collect("r")
+        assert len(collected) == 1
+        assert collected[0]["target"] == "a.com"
+        assert collected[0]["findings"] is None
+        assert collected[0]["error"] == "lease expired after 2 attempt(s)"
+
+class TestComplete:
+
+    def test_complete_and_collect(self, queue):
+        queue.submit(["a.com", "b.com"], run="r")
+        jobs = queue.lease("r", "w1", 2)
+        
+        queue.complete("w1", [(job_id, result(target)) for job_id, target in jobs])
+        
+        assert queue.progress("r") == {"queued": 0, "leased": 0, "done": 2, "failed": 0, "uncollected": 2}
+        assert sorted(r["target"] for r in queue.collect("r")) == ["a.com", "b.com"]
+        assert queue.collect("r") == []
+        assert queue.progress("r")["uncollected"] == 0
+    
+    def test_worker_that_lost_its_lease_cannot_complete(self, queue, clock):
+        queue.submit(["a.com"], run="r")
+        (job_id, _), = queue.lease("r", "w1", 1)
+        
+        clock.advance(61)
+        queue.lease("r", "w2", 1)
+        
+        queue.complete("w1", [(job_id, result("a.com", error="stale"))])
+        assert queue.progress("r")["done"] == 0
+        
+        queue.complete("w2", [(job_id, result("a.com"))])
+        collected = queue.collect("r")
+        assert [r["error"] for r in collected] == [None]
+
+class TestRelease:
+
+    def test_released_job_is_retried(self, queue):
+        queue.submit(["a.com"], run="r")
+        (job_id, _), = queue.lease("r", "w1", 1)
+        
+        queue.release("w1", [job_id], error="worker shutting down")
+        
+        assert queue.progress("r")["queued"] == 1
+        assert targets(queue.lease("r", "w2", 1)) == ["a.com"]
+    
+    def test_release_on_last_attempt_fails_the_job(self, queue):
+        queue.submit(["a.com"], run="r")
+        (job_id, _), = queue.lease("r", "w1", 1)
+        queue.release("w1", [job_id], error="boom")
+        queue.lease("r", "w2", 1)
+        
+        queue.release("w2", [job_id], error="boom again")
+        
+        assert queue.progress("r")["failed"] == 1
+        assert [r["error"] for r in queue.collect("r")] == ["boom again"]
+    
+    def test_release_by_another_worker_is_ignored(self, queue):
+        queue.submit(["a.com"], run="r")
+        (job_id, _), = queue.lease("r", "w1", 1)
+        
+        queue.release("w2", [job_id])
+        
+        assert queue.progress("r")["leased"] == 1
@@ -4,6 +4,10 @@ Helper functions for OSINT operations and data processing
 """
 
 import re
+import asyncio
+import contextvars
+import functools
+import ipaddress
 import logging
 from urllib.parse import urlparse, quote
 from datetime import datetime
@@ -36,6 +40,78 @@ class Utils:
         except ValueError:
             return False
     
+    @staticmethod
+    def parse_ip_range(spec):
+        """
+        Parse an IPv4 CIDR block or range into (first, last) integer bounds
+        Accepts '10.0.0.0/24', '10.0.0.1-10.0.0.50' and '10.0.0.1-50'
+        CIDR blocks larger than /31 exclude the network and broadcast addresses
+        Returns None if spec is not a valid range
+        """
+        try:
+            if '/' in spec:
+                network = ipaddress.IPv4Network(spec.strip(), strict=False)
+                first = int(network.network_address)
+                last = int(network.broadcast_address)
+                if network.prefixlen < 31:
+                    first, last = first + 1, last - 1
+                return first, last
+            
+            if '-' in spec:
+                start, end = (part.strip() for part in spec.split('-', 1))
+                if Utils.validate_ip(start) and end.isdigit() and int(end) <= 255:
+                    end = f"{start.rsplit('.', 1)[0]}.{end}"
+                if not (Utils.validate_ip(start) and Utils.validate_ip(end)):
+                    return None
+                first = int(ipaddress.IPv4Address(start))
+                last = int(ipaddress.IPv4Address(end))
+                return (first, last) if first <= last else None
+        
+        except ValueError:
+            return None
+        
+        return None
+    
+    @staticmethod
+    def validate_ip_range(spec):
+        """Validate IPv4 CIDR block or range format"""
+        return Utils.parse_ip_range(spec) is not None
+    
+    @staticmethod
+    def expand_ip_range(spec):
+        """Lazily yield every address in a CIDR block or range as a string"""
+        bounds = Utils.parse_ip_range(spec)
+        if bounds is None:
+            return
+        
+        first, last = bounds
+        for value in range(first, last + 1):
+            yield str(ipaddress.IPv4Address(value))
+    
+    @staticmethod
+    def classify_target(target):
+        """
+        Detect target type for bulk scans
+        Returns 'email', 'ip', 'ip_range', 'domain', or None if unrecognized
+        """
+        if Utils.validate_email(target):
+            return "email"
+        if Utils.validate_ip(target):
+            return "ip"
+        if Utils.validate_ip_range(target):
+            return "ip_range"
+        if Utils.validate_domain(target):
+            return "domain"
+        return None
+    
+    @staticmethod
+    async def run_blocking(func, *args, **kwargs):
+        """Run a blocking call in the default executor without stalling the event loop"""
+        loop = asyncio.get_running_loop()
+        # Carry context variables (e.g. the cache trace) into the worker thread
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(None, functools.partial(context.run, func, *args, **kwargs))
+    
     @staticmethod
     def is_valid_url(url):
         """Check if string is valid URL"""